@@ -0,0 +1,202 @@
+""" ancestry.py - a run's family tree, indexed for clade questions.
+
+The event log says who was born to whom and when each died, but only one event
+at a time. Asking which founder's descendants dominate at some tick, or who the
+survivors' most recent common ancestor was, meant replaying every event and
+splitting dotted identities apart by hand. That is slow on a long log, and it
+depends on which naming a run used.
+
+AncestryIndex reads the births and deaths once and keeps the tree as a few flat
+arrays, indexed by a node number given to each creature in birth order:
+
+    parents   each creature's parent's node, or -1 for a founder
+    roots     the founder each creature descends from
+
+A parent is always born before its children, so a node's number is larger than
+its parent's. The tree can therefore be laid out in one pass, with no child
+lists or recursion. Subtree sizes are summed from the youngest node back to the
+oldest. Each node is then given its place in a pre-order walk of the tree,
+children in birth order. The tour makes a clade one contiguous stretch of the
+walk: a creature descends from an ancestor exactly when its place falls inside
+the ancestor's stretch. That is two comparisons however deep the tree. The most
+recent common ancestor of any set is the common ancestor of the first and last
+of them in the walk, found by climbing from one until the stretch covers the
+other.
+
+Each founder also keeps the ticks of every birth and death in its lineage, in
+order. How many of a lineage were alive at a tick is then two bisections, and a
+founder's births over time come straight from its list.
+
+Identities are whatever the log used: integer ids or dotted strings.
+"""
+
+import array
+import bisect
+
+# The parent node a founder is recorded with.
+NONE = -1
+
+
+class AncestryIndex:  # pylint: disable=too-many-instance-attributes
+    """ Every creature's place in the family tree, from one pass over a log.
+
+        The attributes are the flat arrays the questions are answered from,
+        which is why there are more than a class usually carries.
+    """
+
+    def __init__(self, records):
+        """
+        :param records: Event dicts in log order; births and deaths are used,
+            anything else is passed over
+        """
+        self.identities = []
+        self._nodes = {}
+        self.parents = array.array('q')
+        self.roots = array.array('q')
+        # Per founder node: ticks of every birth and every death in its lineage.
+        self._births = {}
+        self._deaths = {}
+        for record in records:
+            kind = record['kind']
+            if kind == 'birth':
+                self._add(record)
+            elif kind == 'death':
+                node = self._nodes.get(record['identity'])
+                if node is not None:
+                    self._deaths[self.roots[node]].append(record['tick'])
+        self.sizes, self.places = self._tour()
+
+    def _add(self, birth):
+        """ Gives a newborn the next node. One whose parent never appeared in
+            the log is taken as a founder, so a damaged log still indexes. """
+        node = len(self.identities)
+        parent = self._nodes.get(birth.get('parent'), NONE)
+        self.identities.append(birth['identity'])
+        self._nodes[birth['identity']] = node
+        self.parents.append(parent)
+        self.roots.append(node if parent == NONE else self.roots[parent])
+        if parent == NONE:
+            self._births[node] = array.array('q')
+            self._deaths[node] = array.array('q')
+        self._births[self.roots[node]].append(birth['tick'])
+
+    def _tour(self):
+        """ Lays the tree out as a pre-order walk.
+        :return: (each node's subtree size, each node's place in the walk)
+        """
+        count = len(self.parents)
+        parents = self.parents
+        sizes = array.array('q', [1]) * count
+        for node in range(count - 1, -1, -1):
+            if parents[node] != NONE:
+                sizes[parents[node]] += sizes[node]
+        places = array.array('q', [0]) * count
+        # Where the next child of each node goes in the walk.
+        cursor = array.array('q', [0]) * count
+        next_root = 0
+        for node in range(count):
+            parent = parents[node]
+            if parent == NONE:
+                places[node] = next_root
+                next_root += sizes[node]
+            else:
+                places[node] = cursor[parent]
+                cursor[parent] += sizes[node]
+            cursor[node] = places[node] + 1
+        return sizes, places
+
+    def __len__(self):
+        return len(self.identities)
+
+    def __contains__(self, identity):
+        return identity in self._nodes
+
+    def _node(self, identity):
+        """ :return: A creature's node
+            :raises KeyError: If the log has no birth for it """
+        try:
+            return self._nodes[identity]
+        except KeyError:
+            raise KeyError(f'no birth of {identity!r} in the log') from None
+
+    def _covers(self, ancestor, node):
+        """ :return: True if node is in ancestor's clade, by node """
+        return self.places[ancestor] <= self.places[node] < (
+            self.places[ancestor] + self.sizes[ancestor])
+
+    def parent(self, identity):
+        """ :return: A creature's parent, or None for a founder """
+        parent = self.parents[self._node(identity)]
+        return None if parent == NONE else self.identities[parent]
+
+    def founder_of(self, identity):
+        """ :return: The founder a creature descends from; itself for a founder """
+        return self.identities[self.roots[self._node(identity)]]
+
+    def founders(self):
+        """ :return: Every founder, in birth order """
+        return [self.identities[node] for node in self._births]
+
+    def is_ancestor(self, ancestor, identity):
+        """ :return: True if ancestor is identity or one of its ancestors """
+        return self._covers(self._node(ancestor), self._node(identity))
+
+    def clade_size(self, identity):
+        """ :return: How many creatures the log saw born in a creature's clade,
+            itself included """
+        return self.sizes[self._node(identity)]
+
+    def common_ancestor(self, identities):
+        """ The most recent creature every one of them descends from, counting
+            each as its own ancestor.
+        :param identities: One or more creatures
+        :return: Its identity, or None if they descend from different founders
+            or there are none
+        """
+        nodes = [self._node(identity) for identity in identities]
+        if not nodes:
+            return None
+        first = min(nodes, key=self.places.__getitem__)
+        last = max(nodes, key=self.places.__getitem__)
+        while first != NONE and not self._covers(first, last):
+            first = self.parents[first]
+        return None if first == NONE else self.identities[first]
+
+    def founder_counts(self, tick):
+        """ How many of each founder's lineage were alive at the end of a tick.
+        :return: dict of founder to living descendants, leaving out lineages
+            with none
+        """
+        counts = {}
+        for root, births in self._births.items():
+            alive = (bisect.bisect_right(births, tick)
+                     - bisect.bisect_right(self._deaths[root], tick))
+            if alive:
+                counts[self.identities[root]] = alive
+        return counts
+
+    def dominant_lineage(self, tick):
+        """ The founder with the most living descendants at the end of a tick.
+            Ties go to the founder born first.
+        :return: (founder, living descendants), or None if nobody was alive
+        """
+        counts = self.founder_counts(tick)
+        if not counts:
+            return None
+        founder = max(counts, key=counts.get)
+        return founder, counts[founder]
+
+    def births_over_time(self, founder):
+        """ A founder lineage's cumulative births, the founder's own included.
+        :return: List of (tick, births so far), one per tick with a birth
+        """
+        node = self._node(founder)
+        if node not in self._births:
+            raise KeyError(f'{founder!r} is not a founder')
+        timeline = []
+        for total, tick in enumerate(self._births[node], 1):
+            if timeline and timeline[-1][0] == tick:
+                timeline[-1] = (tick, total)
+            else:
+                timeline.append((tick, total))
+        return timeline
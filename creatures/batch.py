@@ -0,0 +1,308 @@
+""" batch.py - many creature runs at once, within one machine's process budget.
+
+    python -m creatures.batch --seeds 1-20 --ticks 200
+    python -m creatures.batch --seeds 1-10 --grid regrowth=200,400 --grid founders=10,40
+    python -m creatures.batch --seeds 1-50 --budget 4000 -- --broadcast --zygote
+
+One experiment is dozens of seeds for every set of parameters, and run.py runs
+one seed at a time. This runs the whole set: every seed under every combination
+of the --grid values, each as its own `python -m creatures.run` process, with
+anything after `--` passed on to every run. Each run writes its own seed-N
+directory and manifest exactly as it would alone. A combination's runs share a
+directory named for it, so the same seed under two parameter sets never
+collides.
+
+Runs overlap, and two limits decide how many. A run blocks on its tick for as
+long as its slowest creature takes to answer, leaving its core idle, so more
+runs are started than there are cores, RUNS_PER_CORE to each, and one waiting
+run's core goes to another. And every run is charged, before it starts, the
+most processes it can ever hold: its process cap plus its supervisor, or for
+the pool backend its workers. Runs are only started while the charges of
+everything running fit the machine-wide budget, so a batch cannot exhaust the
+process table however its populations grow. A run whose charge does not fit
+waits, and smaller runs behind it go first.
+
+When everything is done the manifests are read back into one table, printed
+and written to batch.tsv under the results root.
+"""
+
+import argparse
+import collections
+import itertools
+import os
+import subprocess
+import sys
+import time
+
+from creatures import events, run, supervisor
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Creature processes every run in the batch may hold between them. Well below
+# a typical per-user process limit, leaving room for everything else.
+DEFAULT_PROCESS_BUDGET = 2000
+
+# Runs started per core. A run spends part of every tick waiting for its
+# creatures rather than computing, so one run per core leaves cores idle.
+RUNS_PER_CORE = 2
+
+# How often finished runs are looked for, in seconds.
+POLL_SECONDS = 0.05
+
+# The table's columns: who the run was, then its manifest's summary.
+COLUMNS = ('parameters', 'seed', 'status', 'ticks', 'living', 'births',
+           'starvation', 'old_age', 'crashed', 'timeout', 'cap_hits', 'wall_seconds')
+
+
+class Job:  # pylint: disable=too-few-public-methods
+    """ One run in a batch: its seed, its parameters and what it may cost. """
+
+    def __init__(self, seed, parameters, arguments, processes):
+        """
+        :param seed: The run's seed
+        :param parameters: Its --grid values, as (name, value) pairs
+        :param arguments: Its whole run.py command line
+        :param processes: The most processes it can hold at once
+        """
+        self.seed = seed
+        self.parameters = parameters
+        self.arguments = arguments
+        self.processes = processes
+
+    @property
+    def name(self):
+        """ :return: The parameter set's name, such as 'regrowth-200', or ''
+            when the batch varies nothing but the seed """
+        return '_'.join(f'{key}-{value}' for key, value in self.parameters)
+
+    @property
+    def directory(self):
+        """ :return: The run directory the job writes """
+        return run.run_directory(
+            self.arguments[self.arguments.index('--results-root') + 1], self.seed)
+
+    @property
+    def log_path(self):
+        """ :return: Where whatever the run prints goes. Beside its directory,
+            not inside it, since run.py replaces the directory when it starts. """
+        return self.directory + '.log'
+
+
+def parse_seeds(text):
+    """ Reads a seed list such as '1-5,9,12-13'.
+    :return: List of seeds, in the order given
+    """
+    seeds = []
+    for part in text.split(','):
+        first, _, last = part.strip().partition('-')
+        seeds.extend(range(int(first), int(last or first) + 1))
+    return seeds
+
+
+def parse_grid(specs):
+    """ Reads --grid values such as ['regrowth=200,400', 'founders=10'].
+    :return: List of (name, [value, ...]) in the order given
+    """
+    grid = []
+    for spec in specs:
+        name, separator, values = spec.partition('=')
+        if not separator or not values:
+            raise ValueError(f'--grid takes name=value,value...; got {spec!r}')
+        grid.append((name.strip().replace('_', '-'), values.split(',')))
+    return grid
+
+
+def processes_needed(arguments):
+    """ The most processes a run with these arguments can hold at once, which
+        is what it is charged against the budget.
+    :param arguments: A run.py command line
+    :return: Process count
+    :raises ValueError: If run.py would not accept the command line
+    """
+    parser = run.argument_parser()
+    # Raise rather than exit, so that a bad --grid is reported by the batch.
+    parser.exit_on_error = False
+    try:
+        args, unknown = parser.parse_known_args(arguments)
+    except argparse.ArgumentError as error:
+        raise ValueError(f'run.py would not accept this: {error}') from None
+    if unknown:
+        raise ValueError(f'run.py does not take {" ".join(unknown)}')
+    if args.backend == 'inprocess':
+        return 1
+    if args.backend == 'pool':
+        return (args.workers or os.cpu_count() or 1) + 1
+    cap = args.max_processes or supervisor.DEFAULT_MAX_PROCESSES
+    return cap + 1 + (1 if args.zygote else 0)
+
+
+def plan(seeds, grid, *, results_root, passthrough=()):
+    """ Lays out every run of a batch.
+    :param seeds: The seeds to run under every parameter set
+    :param grid: (name, values) pairs from parse_grid
+    :param results_root: Where the batch's runs are written
+    :param passthrough: Further run.py arguments, given to every run
+    :return: List of Jobs, parameter set by parameter set
+    """
+    jobs = []
+    names = [name for name, _ in grid]
+    for values in itertools.product(*(values for _, values in grid)):
+        parameters = list(zip(names, values))
+        root = results_root
+        if parameters:
+            root = os.path.join(results_root, Job(None, parameters, [], 0).name)
+        for seed in seeds:
+            arguments = ['--seed', str(seed), '--results-root', root, '--quiet']
+            for name, value in parameters:
+                arguments += [f'--{name}', value]
+            arguments += list(passthrough)
+            jobs.append(Job(seed, parameters, arguments, processes_needed(arguments)))
+    return jobs
+
+
+def _launch(job):
+    """ Starts one run as its own process.
+    :return: The Popen
+    """
+    os.makedirs(os.path.dirname(job.directory), exist_ok=True)
+    with open(job.log_path, 'w', encoding='utf-8') as output:
+        return subprocess.Popen([sys.executable, '-m', 'creatures.run'] + job.arguments,
+                                cwd=HERE, stdout=output, stderr=subprocess.STDOUT)
+
+
+def run_batch(jobs, *, budget=DEFAULT_PROCESS_BUDGET, cores=None, launch=_launch,
+              report=None):
+    """ Runs every job, as many at a time as the cores and the budget allow.
+    :param jobs: Jobs from plan()
+    :param budget: Processes every running job may hold between them
+    :param cores: Cores to fill; defaults to all of them
+    :param launch: Starts a job and returns something with Popen's poll()
+    :param report: Called with each job and its exit status as it finishes
+    :return: dict of job to exit status, and the most processes ever charged
+        at once, as (statuses, peak)
+    :raises ValueError: If some job could never fit the budget
+    """
+    for job in jobs:
+        if job.processes > budget:
+            raise ValueError(f'seed {job.seed} {job.name} can hold {job.processes} '
+                             f'processes, more than the whole budget of {budget}')
+    slots = (cores or os.cpu_count() or 1) * RUNS_PER_CORE
+    pending = collections.deque(jobs)
+    running = {}
+    statuses = {}
+    charged = peak = 0
+    while pending or running:
+        for job in list(pending):
+            if len(running) >= slots:
+                break
+            if charged + job.processes <= budget:
+                pending.remove(job)
+                running[job] = launch(job)
+                charged += job.processes
+        peak = max(peak, charged)
+
+        finished = [job for job, process in running.items() if process.poll() is not None]
+        for job in finished:
+            statuses[job] = running.pop(job).poll()
+            charged -= job.processes
+            if report is not None:
+                report(job, statuses[job])
+        if not finished:
+            time.sleep(POLL_SECONDS)
+    return statuses, peak
+
+
+def table(jobs, statuses):
+    """ Reads every run's manifest back into one row per run.
+    :return: List of row dicts with the keys in COLUMNS
+    """
+    rows = []
+    for job in jobs:
+        row = dict.fromkeys(COLUMNS, '')
+        row.update(parameters=job.name or '-', seed=job.seed,
+                   status='ok' if statuses.get(job) == 0 else f'exit {statuses.get(job)}')
+        path = os.path.join(job.directory, 'manifest.json')
+        if statuses.get(job) == 0 and os.path.isfile(path):
+            summary = events.read_manifest(path)['summary']
+            row.update({key: summary[key] for key in
+                        ('ticks', 'living', 'births', 'cap_hits', 'wall_seconds')})
+            row.update(summary['deaths'])
+        rows.append(row)
+    return rows
+
+
+def write_table(path, rows):
+    """ Writes the table as tab-separated values, one run per line. """
+    with open(path, 'w', encoding='utf-8') as handle:
+        handle.write('\t'.join(COLUMNS) + '\n')
+        for row in rows:
+            handle.write('\t'.join(str(row[column]) for column in COLUMNS) + '\n')
+
+
+def _print_table(rows):
+    """ Prints the table with its columns lined up. """
+    widths = {column: max([len(column)] + [len(str(row[column])) for row in rows])
+              for column in COLUMNS}
+    print('  '.join(column.ljust(widths[column]) for column in COLUMNS))
+    for row in rows:
+        print('  '.join(str(row[column]).ljust(widths[column]) for column in COLUMNS))
+
+
+def main(arguments):
+    """ Entry point for the command line. """
+    if '--' in arguments:
+        split = arguments.index('--')
+        arguments, passthrough = arguments[:split], arguments[split + 1:]
+    else:
+        passthrough = []
+    parser = argparse.ArgumentParser(
+        description='Run many seeds and parameter sets at once. '
+                    'Arguments after -- are passed to every run.')
+    parser.add_argument('--seeds', default='1-10',
+                        help='Seeds to run, such as 1-20 or 1,4,9-12.')
+    parser.add_argument('--ticks', type=int, default=100)
+    parser.add_argument('--grid', action='append', default=[], metavar='NAME=V1,V2',
+                        help='Run every seed under each value of a run.py option; '
+                             'repeat to vary several, and every combination is run.')
+    parser.add_argument('--budget', type=int, default=DEFAULT_PROCESS_BUDGET,
+                        help='Processes all running runs may hold between them.')
+    parser.add_argument('--cores', type=int, default=os.cpu_count(),
+                        help=f'Cores to fill; {RUNS_PER_CORE} runs are started per core.')
+    parser.add_argument('--results-root', default=run.DEFAULT_RESULTS_ROOT)
+    args = parser.parse_args(arguments)
+
+    try:
+        jobs = plan(parse_seeds(args.seeds), parse_grid(args.grid),
+                    results_root=args.results_root,
+                    passthrough=['--ticks', str(args.ticks)] + passthrough)
+    except ValueError as error:
+        parser.error(str(error))
+    started = time.monotonic()
+
+    def report(job, status):
+        print(f'  seed {job.seed} {job.name} '
+              f'{"done" if status == 0 else f"failed with exit {status}"}', flush=True)
+
+    try:
+        statuses, peak = run_batch(jobs, budget=args.budget, cores=args.cores,
+                                   report=report)
+    except ValueError as error:
+        parser.error(str(error))
+    for job in jobs:
+        # A run that went well printed nothing, so only failures leave a log.
+        if os.path.isfile(job.log_path) and not os.path.getsize(job.log_path):
+            os.remove(job.log_path)
+    rows = table(jobs, statuses)
+    os.makedirs(args.results_root, exist_ok=True)
+    write_table(os.path.join(args.results_root, 'batch.tsv'), rows)
+    print()
+    _print_table(rows)
+    print(f'\n{len(jobs)} runs in {time.monotonic() - started:.1f}s, at most '
+          f'{peak} of {args.budget} processes charged at once')
+    if any(row['cap_hits'] for row in rows if row['cap_hits'] != ''):
+        print('WARNING: some runs hit their process cap; see cap_hits.')
+    return 0 if all(status == 0 for status in statuses.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
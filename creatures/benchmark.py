@@ -0,0 +1,124 @@
+""" benchmark.py - how fast the forked supervisor ticks as the population grows.
+
+    python -m creatures.benchmark
+    python -m creatures.benchmark --populations 10,100 --ticks 5 --output -
+
+Regenerates the recorded results in data/supervisor_benchmark_raw.txt, so a
+change that slows the supervisor shows up as a diff in that file rather than as
+a run that somehow takes longer.
+
+Each population is run with profiling on (see timers.py), asked serially and
+then in broadcast mode, and reported as ticks per second, the median and 99th
+percentile time a creature took to answer, the memory each creature's process
+holds alone (see forking.py), and the share of the tick spent in each phase.
+Where there is no /proc to measure memory from, uss is reported as n/a. The
+world is set up so that the population stays put for the length of a
+measurement: food is plentiful, nothing mutates, and the process cap is the
+population, so every birth is capped and nobody dies of age before the
+measurement ends. What is measured is the supervisor, not the ecology.
+"""
+
+import argparse
+import os
+import platform
+import sys
+import time
+
+from creatures import supervisor
+from creatures.timers import PHASES, PhaseTimers
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, 'data', 'supervisor_benchmark_raw.txt')
+
+# Populations swept, with the default process cap added, since that is the
+# largest population a default run can reach.
+DEFAULT_POPULATIONS = (10, 100, 1000)
+DEFAULT_TICKS = 10
+
+MODES = {'serial': {}, 'broadcast': {'broadcast': True}}
+
+# Food per creature per tick: far more than any creature can eat, so nobody
+# starves during a measurement.
+FOOD_PER_CREATURE = 100
+
+
+def measure(population, ticks, **options):
+    """ Runs one population for a number of ticks with profiling on.
+    :param population: Creatures to run
+    :param ticks: Ticks to time
+    :param options: Further Supervisor options, such as broadcast
+    :return: dict of the measurements
+    """
+    with supervisor.Supervisor(regrowth=population * FOOD_PER_CREATURE,
+                               max_processes=population, mutation_probability=0.0,
+                               profile=True, **options) as sup:
+        started = time.perf_counter()
+        sup.start(founders=population, seed=1)
+        start_seconds = time.perf_counter() - started
+        # Forking the founders is timed above; the phases are the ticks'.
+        sup.timers = PhaseTimers()
+        started = time.perf_counter()
+        for _ in range(ticks):
+            sup.tick()
+        elapsed = time.perf_counter() - started
+        summary = sup.summary()
+    profile = summary['profile']
+    # Absent when no creature's memory could be read, as where there is no /proc.
+    memory = summary.get('memory')
+    spent = sum(phase['ms'] for phase in profile['phases'].values()) or 1
+    return {'population': population, 'living': summary['living'],
+            'start_seconds': start_seconds, 'ticks_per_second': ticks / elapsed,
+            'p50_ms': profile['ask_latency_ms']['p50'],
+            'p99_ms': profile['ask_latency_ms']['p99'],
+            'uss_kb': None if memory is None else memory['mean_uss_kb'],
+            'shares': {name: profile['phases'][name]['ms'] / spent for name in PHASES}}
+
+
+def _line(mode, result):
+    """ :return: One measurement as a line of the results file """
+    shares = ' '.join(f'{name} {share:.0%}' for name, share in result['shares'].items())
+    uss = 'n/a' if result['uss_kb'] is None else f'{result["uss_kb"]:.0f}kB'
+    return (f'  {mode:9} pop={result["population"]:5} living={result["living"]:5} '
+            f'ticks/s={result["ticks_per_second"]:8.2f} '
+            f'ask p50={result["p50_ms"]:.3f}ms p99={result["p99_ms"]:.3f}ms '
+            f'start={result["start_seconds"]:.2f}s uss={uss}  [{shares}]')
+
+
+def main(arguments):
+    """ Entry point for the command line. """
+    parser = argparse.ArgumentParser(description='Time the forked supervisor at '
+                                                 'several population sizes.')
+    parser.add_argument('--populations',
+                        default=','.join(str(size) for size in sorted(
+                            set(DEFAULT_POPULATIONS) | {supervisor.DEFAULT_MAX_PROCESSES})),
+                        help='Comma-separated population sizes.')
+    parser.add_argument('--ticks', type=int, default=DEFAULT_TICKS)
+    parser.add_argument('--modes', default=','.join(MODES),
+                        help=f'Comma-separated; any of {", ".join(MODES)}.')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help='Where to write the results; - to only print them.')
+    args = parser.parse_args(arguments)
+
+    lines = ['Supervisor scaling benchmark, raw output. Regenerate with: '
+             'python -m creatures.benchmark',
+             f'{os.cpu_count()} cores, Python {platform.python_version()}, '
+             f'{platform.system()} {platform.release()}; {args.ticks} ticks per '
+             f'measurement; shares are of the profiled time.', '']
+    for line in lines:
+        print(line)
+    for mode in args.modes.split(','):
+        lines.append(f'== {mode} ==')
+        print(lines[-1], flush=True)
+        for population in (int(size) for size in args.populations.split(',')):
+            lines.append(_line(mode, measure(population, args.ticks, **MODES[mode])))
+            print(lines[-1], flush=True)
+        lines.append('')
+    if args.output != '-':
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            handle.write('\n'.join(lines))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
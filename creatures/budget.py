@@ -0,0 +1,198 @@
+""" budget.py - asks a creature for a decision without giving it forever.
+
+A forked creature that hangs is simply killed. A creature hosted inside some
+other process cannot be: killing it kills its host. So a hosted creature runs
+under interval timers instead, one on wall-clock time and one on CPU time, whose
+signal handlers raise into the creature's own code and unwind it.
+
+The exception raised is a BaseException, so genome.decide's `except Exception`
+does not catch it and report a crash. A mutant with a bare `except:` can still
+swallow one, so the timers keep firing every few milliseconds until the
+creature's code is left, and anything that had a timer fire is reported as a
+timeout whether or not it managed to answer afterwards.
+
+This only works for creatures stuck in Python bytecode. Signal handlers run
+between bytecodes, so a creature stuck inside one long C call, such as an
+enormous integer power, cannot be interrupted here. Whoever hosts creatures
+must still watch its host from outside and kill it if it stops answering.
+
+Time budgets are only as repeatable as the machine is idle. A caller that needs
+the same creature to get the same verdict on every run can add a step budget:
+every line of the creature's own code it executes is counted by a trace
+function, and running out is a timeout however fast or slow the machine is.
+The wall-clock timer then stays only as a backstop for what tracing cannot see,
+such as a creature stuck inside one long C call.
+
+A forked creature gets a CPU budget too, though nothing has to be unwound: its
+process is its own, so it can simply end. limit_cpu() makes a creature that
+spends too long deciding tell the supervisor so and exit, straight away rather
+than at the supervisor's wall-clock timeout. The verdict is then the creature's
+own CPU time, which a busy machine does not inflate, rather than the time it
+happened to wait for a core.
+"""
+
+import math
+import os
+import resource
+import signal
+import sys
+
+from creatures import genome
+
+# How often a budget that has run out fires again, in seconds, in case the
+# first interruption was swallowed by a bare except.
+REFIRE_INTERVAL = 0.005
+
+# The filename genome.load gives a creature's code, since it executes source
+# without one. Only frames running creature code are counted against a step
+# budget, so the cost of decide() itself never depends on how it is written.
+CREATURE_FILENAME = '<string>'
+
+
+# What a forked creature that ran out of CPU time sends in place of a reply, in
+# the form a pool worker reports a timeout.
+CPU_EXHAUSTED_REPLY = b'{"timeout": true}\n'
+
+
+class BudgetExceededError(Exception):
+    """ Raised when a creature runs out of time before answering. """
+
+
+class _OverBudget(BaseException):
+    """ Raised inside a creature's code when a timer fires. """
+
+
+def _step_counter(steps, fired):
+    """ Builds a trace function that allows a creature a number of lines.
+
+        Running out raises _OverBudget inside the creature. Python removes a
+        trace function that raises, so a creature that swallows the exception
+        runs on untraced until the wall-clock backstop fires; it is recorded as
+        a timeout either way, because running out is what decides the verdict.
+    :param steps: Lines of creature code allowed
+    :param fired: List the exhaustion is recorded in
+    :return: A global trace function for sys.settrace
+    """
+    remaining = [steps]
+
+    def count(_frame, event, _):
+        if event == 'line':
+            remaining[0] -= 1
+            if remaining[0] < 0:
+                fired.append('steps')
+                raise _OverBudget()
+        return count
+
+    def enter(frame, *_):
+        return count if frame.f_code.co_filename == CREATURE_FILENAME else None
+
+    return enter
+
+
+def decide_within_budget(source, *, wall, cpu=None, steps=None, **senses):
+    """ genome.decide, bounded by wall-clock and CPU time, and optionally by
+        the number of lines the creature executes.
+
+        Must be called from the main thread, since that is the only thread
+        Python delivers signals to.
+    :param source: Creature source
+    :param wall: Seconds of wall-clock time allowed
+    :param cpu: Seconds of CPU time allowed, or None for no separate limit
+    :param steps: Lines of creature code allowed, or None for no step limit
+    :param senses: The keyword arguments genome.decide takes
+    :return: The normalised decision
+    :raises BudgetExceededError: If any budget ran out
+    :raises genome.MisbehavingCreatureError: If the creature crashed, including
+        by trying to exit the process it is hosted in
+    """
+    fired = []
+
+    def interrupt(signum, frame):
+        fired.append(signum)
+        # Only ever unwind the creature. A timer landing in this function,
+        # after decide() returned or while the timers are being disarmed, is
+        # recorded but must not escape to the caller.
+        if frame is None or frame.f_code.co_filename != __file__:
+            raise _OverBudget()
+
+    previous = (signal.signal(signal.SIGALRM, interrupt),
+                signal.signal(signal.SIGPROF, interrupt))
+    signal.setitimer(signal.ITIMER_REAL, wall, REFIRE_INTERVAL)
+    if cpu is not None:
+        signal.setitimer(signal.ITIMER_PROF, cpu, REFIRE_INTERVAL)
+    tracer = sys.gettrace()
+    if steps is not None:
+        sys.settrace(_step_counter(steps, fired))
+    try:
+        decision = genome.decide(source, **senses)
+    except _OverBudget:
+        decision = None
+    except (SystemExit, GeneratorExit) as error:
+        raise genome.MisbehavingCreatureError(
+            f'act() tried to exit: {type(error).__name__}') from error
+    finally:
+        if steps is not None:
+            sys.settrace(tracer)
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGALRM, previous[0])
+        signal.signal(signal.SIGPROF, previous[1])
+    if 'steps' in fired:
+        raise BudgetExceededError('step budget exhausted')
+    if fired:
+        raise BudgetExceededError(
+            'cpu budget exhausted' if signal.SIGPROF in fired else 'wall-clock budget exhausted')
+    return decision
+
+
+def limit_cpu(channel, lifetime):
+    """ Makes a forked creature end itself once it has used too much CPU.
+
+        Called once, in the creature's own process. decide_on_cpu() arms the
+        per-decision timer; this decides what its firing does: the creature
+        sends CPU_EXHAUSTED_REPLY on its socket and exits. Nothing is raised
+        into the creature's code, so no except clause of its own can stop it.
+
+        A creature spinning inside one long C call never reaches a signal
+        handler, so its whole life is capped as well, with RLIMIT_CPU: the
+        soft limit signals the same handler, and a second later the kernel
+        kills the process whether or not that ran.
+    :param channel: The creature's socket to the supervisor
+    :param lifetime: CPU seconds the creature may use in its whole life
+    :return: None
+    """
+    def expire(*_):
+        try:
+            channel.sendall(CPU_EXHAUSTED_REPLY)
+        except OSError:
+            pass
+        os._exit(0)  # pylint: disable=protected-access
+
+    signal.signal(signal.SIGPROF, expire)
+    signal.signal(signal.SIGXCPU, expire)
+    soft = max(1, math.ceil(lifetime))
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    else:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, soft + 1))
+
+
+def decide_on_cpu(source, cpu, **senses):
+    """ genome.decide, in a forked creature set up by limit_cpu(), with the
+        process ended if the decision takes more than its CPU allowance.
+    :param source: Creature source
+    :param cpu: Seconds of CPU time allowed, counting time in the kernel, or
+        None for no limit
+    :param senses: The keyword arguments genome.decide takes
+    :return: The normalised decision
+    :raises genome.MisbehavingCreatureError: If the creature crashed
+    """
+    if cpu is None:
+        return genome.decide(source, **senses)
+    signal.setitimer(signal.ITIMER_PROF, cpu)
+    try:
+        return genome.decide(source, **senses)
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
@@ -0,0 +1,433 @@
+""" columnar.py - a compact binary form of the creatures event log.
+
+    python -m creatures.columnar results/creatures/seed-1/events.jsonl events.col
+    python -m creatures.columnar events.col events.jsonl
+
+events.jsonl spells out "kind", "identity" and "generation" on every line, and
+reading it back means parsing every one of those lines as JSON. A sweep over
+hundreds of seeds spends most of its time doing exactly that.
+
+This format stores the same records in blocks of a few thousand. Inside a block
+each kind of event is a small table stored column by column, integers as packed
+int64 arrays and strings as indexes into the block's own string table, and the
+whole block is compressed with zlib or lzma. Repeated keys vanish, and runs of
+similar numbers compress well. Blocks are independent, so a reader can start at
+any of them.
+
+Nothing is lost. A record that does not match its kind's columns exactly, such
+as one with an extra field, is stored whole as its JSON text, so converting a
+log to this format and back gives the records it started with. Re-encoded as
+JSON lines they are byte-identical to what EventLog wrote.
+
+Replay tells the two formats apart by the first bytes of the file, so either
+can be replayed (see events.open_source).
+"""
+
+import array
+import json
+import lzma
+import os
+import struct
+import sys
+import zlib
+
+from creatures.jsonlines import JsonLinesSource
+
+MAGIC = b'MUTCOL1\n'
+
+# Each block starts with its codec, record count and compressed size.
+BLOCK_HEADER = struct.Struct('<BII')
+
+# Records per block. Larger blocks compress better; smaller ones make resuming
+# from a position cheaper.
+DEFAULT_BLOCK_RECORDS = 4096
+
+# A record's position packs its block's file offset with its index inside the
+# block, so a position is one integer, as it is for JSON lines.
+_INDEX_BITS = 20
+
+CODECS = {'none': 0, 'zlib': 1, 'lzma': 2}
+
+_INT64 = (-(1 << 63), 1 << 63)
+
+# The columns each known kind of event is stored as, after its tick, in the
+# order EventLog's methods take them. Kind 'raw' holds anything else whole.
+# Column types: q is an int64; s a string; x an identity, which is a dotted
+# string, an integer id from a LineageTable, or None; j any JSON value, stored
+# as its text; f a float64 that a record may leave out, as EventLog leaves out
+# usage it could not measure.
+SCHEMAS = {
+    'birth': (('identity', 'x'), ('generation', 'q'), ('parent', 'x')),
+    'death': (('identity', 'x'), ('cause', 's'), ('age', 'q'), ('generation', 'q'),
+              ('cpu_seconds', 'f'), ('wall_seconds', 'f')),
+    'birth_failed': (('parent', 'x'), ('reason', 's')),
+    'snapshot': (('population', 'q'), ('food', 'q'), ('strategy', 'j')),
+}
+KINDS = tuple(SCHEMAS) + ('raw',)
+
+# How an identity column says what each row holds.
+_IDENTITY_TAGS = {type(None): 0, str: 1, int: 2}
+
+
+# What an f column decodes to for a record that left the field out.
+_ABSENT = object()
+
+
+def _fits(record):
+    """ :return: True if a record can be stored as its kind's columns and read
+        back exactly """
+    schema = SCHEMAS.get(record.get('kind'))
+    if schema is None:
+        return False
+    names = {'kind', 'tick'} | {name for name, _ in schema}
+    required = names - {name for name, column_type in schema if column_type == 'f'}
+    if not required <= set(record) <= names:
+        return False
+    return all(_VALID[column_type](record.get(name, _ABSENT))
+               for name, column_type in (('tick', 'q'),) + schema)
+
+
+def _is_int64(value):
+    """ :return: True for an int, but not a bool, that fits in an int64 """
+    return (isinstance(value, int) and not isinstance(value, bool)
+            and _INT64[0] <= value < _INT64[1])
+
+
+# What each column type can hold and give back exactly.
+_VALID = {
+    'q': _is_int64,
+    's': lambda value: isinstance(value, str),
+    'x': lambda value: value is None or isinstance(value, str) or _is_int64(value),
+    'j': lambda value: True,
+    'f': lambda value: value is _ABSENT or isinstance(value, float),
+}
+
+
+def _int64s(values):
+    """ :return: Little-endian int64 bytes """
+    return _packed('q', values)
+
+
+def _float64s(values):
+    """ :return: Little-endian float64 bytes """
+    return _packed('d', values)
+
+
+def _packed(typecode, values):
+    packed = array.array(typecode, values)
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _read_int64s(payload, offset, count):
+    """ :return: (list of ints, offset after them) """
+    return _read_packed('q', payload, offset, count)
+
+
+def _read_float64s(payload, offset, count):
+    """ :return: (list of floats, offset after them) """
+    return _read_packed('d', payload, offset, count)
+
+
+def _read_packed(typecode, payload, offset, count):
+    packed = array.array(typecode)
+    packed.frombytes(payload[offset:offset + count * 8])
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return packed.tolist(), offset + count * 8
+
+
+class _Strings:
+    """ One block's string table. Index -1 stands for None. """
+
+    def __init__(self):
+        self.index = {}
+
+    def add(self, value):
+        """ :return: The index of a string, adding it if new """
+        if value is None:
+            return -1
+        return self.index.setdefault(value, len(self.index))
+
+    def encode(self):
+        """ :return: The table as bytes: count, lengths, then the text """
+        texts = [text.encode('utf-8', 'surrogatepass') for text in self.index]
+        return (struct.pack('<I', len(texts)) + _int64s([len(t) for t in texts])
+                + b''.join(texts))
+
+    @staticmethod
+    def decode(payload, offset):
+        """ :return: (list of strings, offset after the table) """
+        (count,) = struct.unpack_from('<I', payload, offset)
+        lengths, offset = _read_int64s(payload, offset + 4, count)
+        strings = []
+        for length in lengths:
+            strings.append(payload[offset:offset + length].decode('utf-8', 'surrogatepass'))
+            offset += length
+        return strings, offset
+
+
+def encode_block(records):
+    """ Lays a block's records out as columns.
+    :param records: Event dicts, in log order
+    :return: The uncompressed block payload
+    """
+    strings = _Strings()
+    kinds = bytearray()
+    tables = {kind: [] for kind in KINDS}
+    for record in records:
+        kind = record['kind'] if _fits(record) else 'raw'
+        kinds.append(KINDS.index(kind))
+        tables[kind].append(record)
+
+    parts = [struct.pack('<I', len(records)), bytes(kinds)]
+    for kind, schema in SCHEMAS.items():
+        rows = tables[kind]
+        parts.append(_int64s([row['tick'] for row in rows]))
+        for name, column_type in schema:
+            if column_type == 'q':
+                parts.append(_int64s([row[name] for row in rows]))
+            elif column_type == 'j':
+                parts.append(_int64s([strings.add(json.dumps(row[name], sort_keys=True))
+                                      for row in rows]))
+            elif column_type == 'x':
+                # A tag per row saying which of the three it is, then one int64:
+                # the id itself, or the string's index.
+                values = [row[name] for row in rows]
+                parts.append(bytes(_IDENTITY_TAGS[type(value)] for value in values))
+                parts.append(_int64s([value if isinstance(value, int) else strings.add(value)
+                                      for value in values]))
+            elif column_type == 'f':
+                # A byte per row saying whether the record has the field, then
+                # the floats, 0.0 standing in for those it left out.
+                parts.append(bytes(name in row for row in rows))
+                parts.append(_float64s([row.get(name, 0.0) for row in rows]))
+            else:
+                parts.append(_int64s([strings.add(row[name]) for row in rows]))
+    parts.append(_int64s([strings.add(json.dumps(row, sort_keys=True))
+                          for row in tables['raw']]))
+    return strings.encode() + b''.join(parts)
+
+
+def decode_block(payload):
+    """ Rebuilds a block's records from its columns.
+    :param payload: An uncompressed block payload
+    :return: List of event dicts, in log order
+    """
+    strings, offset = _Strings.decode(payload, 0)
+    (count,) = struct.unpack_from('<I', payload, offset)
+    offset += 4
+    kinds = payload[offset:offset + count]
+    offset += count
+    tables = {}
+    for code, (kind, schema) in enumerate(SCHEMAS.items()):
+        columns, offset = _decode_table(payload, offset, strings, schema, kinds.count(code))
+        names = [name for name, _ in columns]
+        tables[kind] = iter([{'kind': kind, **{name: value for name, value in zip(names, row)
+                                               if value is not _ABSENT}}
+                             for row in zip(*(values for _, values in columns))])
+    raw, offset = _read_int64s(payload, offset, kinds.count(KINDS.index('raw')))
+    tables['raw'] = iter([json.loads(strings[value]) for value in raw])
+    return [next(tables[KINDS[code]]) for code in kinds]
+
+
+def _decode_table(payload, offset, strings, schema, rows):
+    """ Reads one kind's table out of a block.
+    :param schema: The kind's columns, from SCHEMAS
+    :param rows: How many records of that kind the block holds
+    :return: (list of (column name, values), offset after the table)
+    """
+    ticks, offset = _read_int64s(payload, offset, rows)
+    columns = [('tick', ticks)]
+    for name, column_type in schema:
+        if column_type == 'x':
+            tags = payload[offset:offset + rows]
+            values, offset = _read_int64s(payload, offset + rows, rows)
+            values = [value if tag == _IDENTITY_TAGS[int]
+                      else None if tag == _IDENTITY_TAGS[type(None)]
+                      else strings[value] for tag, value in zip(tags, values)]
+            columns.append((name, values))
+            continue
+        if column_type == 'f':
+            present = payload[offset:offset + rows]
+            values, offset = _read_float64s(payload, offset + rows, rows)
+            columns.append((name, [value if has else _ABSENT
+                                   for has, value in zip(present, values)]))
+            continue
+        values, offset = _read_int64s(payload, offset, rows)
+        if column_type == 'j':
+            values = [json.loads(strings[value]) for value in values]
+        elif column_type == 's':
+            values = [strings[value] for value in values]
+        columns.append((name, values))
+    return columns, offset
+
+
+def _compress(codec, payload):
+    if codec == CODECS['zlib']:
+        return zlib.compress(payload, 6)
+    if codec == CODECS['lzma']:
+        return lzma.compress(payload)
+    return payload
+
+
+def _decompress(codec, data):
+    if codec == CODECS['zlib']:
+        return zlib.decompress(data)
+    if codec == CODECS['lzma']:
+        return lzma.decompress(data)
+    return data
+
+
+class ColumnarWriter:
+    """ Writes event records to a columnar log, a block at a time. """
+
+    def __init__(self, path, *, codec='zlib', block_records=DEFAULT_BLOCK_RECORDS):
+        """
+        :param path: Where to write; an existing file is replaced
+        :param codec: One of CODECS
+        :param block_records: Records per block, below 2 ** 20
+        """
+        if codec not in CODECS:
+            raise ValueError(f'unknown codec {codec!r}; expected one of {sorted(CODECS)}')
+        if not 0 < block_records < 1 << _INDEX_BITS:
+            raise ValueError(f'block_records must be between 1 and {(1 << _INDEX_BITS) - 1}')
+        self.codec = CODECS[codec]
+        self.block_records = block_records
+        self._pending = []
+        self._handle = open(path, 'wb')  # pylint: disable=consider-using-with
+        self._handle.write(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+        return False
+
+    def write(self, record):
+        """ Adds one event record. """
+        self._pending.append(record)
+        if len(self._pending) >= self.block_records:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        data = _compress(self.codec, encode_block(self._pending))
+        self._handle.write(BLOCK_HEADER.pack(self.codec, len(self._pending), len(data)))
+        self._handle.write(data)
+        self._pending = []
+
+    def close(self):
+        """ Writes the last block and closes the file. Safe to call twice. """
+        if self._handle is not None:
+            self._flush()
+            self._handle.close()
+            self._handle = None
+
+
+class ColumnarSource:
+    """ Reads records out of a columnar log, for Replay.
+
+        Positions are the block's file offset and the record's index in it,
+        packed into one integer. A truncated last block, from a conversion that
+        was killed, is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def size(self):
+        """ :return: Bytes in the log, or 0 if there is none """
+        return os.path.getsize(self.path) if os.path.isfile(self.path) else 0
+
+    def scan(self, position=0):
+        """ Streams records from a position to the end of the log.
+        :param position: Where to start; 0, or a position scan() yielded
+        :return: Iterator of (position, record)
+        """
+        if not os.path.isfile(self.path):
+            return
+        offset, skip = position >> _INDEX_BITS, position & ((1 << _INDEX_BITS) - 1)
+        with open(self.path, 'rb') as handle:
+            if offset == 0:
+                if handle.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(f'{self.path} is not a columnar event log')
+                offset = len(MAGIC)
+            handle.seek(offset)
+            while True:
+                header = handle.read(BLOCK_HEADER.size)
+                if len(header) < BLOCK_HEADER.size:
+                    return
+                codec, count, length = BLOCK_HEADER.unpack(header)
+                data = handle.read(length)
+                try:
+                    records = decode_block(_decompress(codec, data))
+                except (ValueError, struct.error, zlib.error, lzma.LZMAError):
+                    return
+                if len(data) < length or len(records) != count:
+                    return
+                for index in range(skip, count):
+                    yield (offset << _INDEX_BITS) | index, records[index]
+                skip = 0
+                offset += BLOCK_HEADER.size + length
+
+
+def is_columnar(path):
+    """ :return: True if the file at path is a columnar event log """
+    try:
+        with open(path, 'rb') as handle:
+            return handle.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def convert(source, destination, *, codec='zlib', block_records=DEFAULT_BLOCK_RECORDS):
+    """ Converts a log between JSON lines and columnar, whichever way round.
+
+        The direction is decided by the source's format. JSON lines come out
+        exactly as EventLog would have written them.
+    :param source: Path to an events.jsonl or a columnar log
+    :param destination: Path to write the converted log to
+    :param codec: Compression for a columnar destination
+    :param block_records: Records per block for a columnar destination
+    :return: How many records were converted
+    """
+    count = 0
+    if is_columnar(source):
+        with open(destination, 'w', encoding='utf-8') as handle:
+            for _, record in ColumnarSource(source).scan():
+                handle.write(json.dumps(record, sort_keys=True) + '\n')
+                count += 1
+        return count
+    with ColumnarWriter(destination, codec=codec, block_records=block_records) as writer:
+        for _, record in JsonLinesSource(source).scan():
+            writer.write(record)
+            count += 1
+    return count
+
+
+def main(arguments):
+    """ Entry point for the command line. """
+    import argparse  # pylint: disable=import-outside-toplevel
+    parser = argparse.ArgumentParser(
+        description='Convert a creatures event log between JSON lines and columnar.')
+    parser.add_argument('source', help='events.jsonl or a columnar log')
+    parser.add_argument('destination')
+    parser.add_argument('--codec', choices=sorted(CODECS), default='zlib',
+                        help='Compression for a columnar destination.')
+    parser.add_argument('--block-records', type=int, default=DEFAULT_BLOCK_RECORDS)
+    args = parser.parse_args(arguments)
+
+    count = convert(args.source, args.destination, codec=args.codec,
+                    block_records=args.block_records)
+    before, after = os.path.getsize(args.source), os.path.getsize(args.destination)
+    print(f'{count} records, {before} bytes -> {after} bytes '
+          f'({after / before if before else 0:.1%})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
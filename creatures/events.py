@@ -12,22 +12,72 @@ spawning a single process.
 
 That matters twice: analysis stops depending on luck, and phase 4 can animate a
 run from its log rather than by re-running it.
+
+Writing every event straight through to the file costs a system call per birth
+and death, which in a long run is real time. So the log buffers, and a policy
+says when to flush: every N records, every T seconds, at the end of every tick,
+or any mix of those, optionally with an fsync so a flushed record survives the
+machine going down and not just the process. Whatever is buffered when a run is
+killed outright is lost, but a record is only ever written whole, so what does
+reach the file reads back as before.
 """
 
+import bisect
+import functools
 import json
 import os
 import subprocess
 import sys
+import time
+
+from creatures import ancestry, columnar, lineage
+from creatures.jsonlines import JsonLinesSource
 
 HERE = os.path.dirname(os.path.abspath(__file__))
 
+# Ticks between the living sets a Replay index keeps. living_at() reads at most
+# this many ticks of log past the nearest one.
+DEFAULT_CHECKPOINT_EVERY = 100
+
+# A Replay's saved index sits next to the log under this suffix.
+INDEX_SUFFIX = '.index'
+INDEX_VERSION = 1
+
+# One encoder for every record, rather than json.dumps building one per call.
+_ENCODER = json.JSONEncoder(sort_keys=True)
 
-class EventLog:
-    """ Append-only writer for one run's events. """
 
-    def __init__(self, path):
+class EventLog:  # pylint: disable=too-many-instance-attributes
+    """ Append-only writer for one run's events.
+
+        The default policy flushes every record, exactly as an unbuffered log
+        would. The attribute count is the policy plus the counters stats()
+        reports.
+    """
+
+    def __init__(self, path, *, every=1, seconds=None, at_ticks=False, fsync=False):
+        """
+        :param path: Where to write events.jsonl
+        :param every: Flush once this many records are buffered; None or 0 for
+            no record-count trigger
+        :param seconds: Flush once the oldest buffered record is this old, in
+            seconds; None for no time trigger
+        :param at_ticks: Flush after every snapshot, which ends a tick
+        :param fsync: fsync the file after every flush
+        """
         self.path = path
+        self.every = every
+        self.seconds = seconds
+        self.at_ticks = at_ticks
+        self.fsync = fsync
         self._handle = None
+        self._buffer = []
+        self._buffered_since = None
+        self.records = 0
+        self.bytes_written = 0
+        self.flushes = 0
+        self.flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
 
     def __enter__(self):
         directory = os.path.dirname(self.path)
@@ -41,26 +91,82 @@ class EventLog:
         return False
 
     def close(self):
-        """ Closes the log. Safe to call more than once. """
+        """ Flushes and closes the log. Safe to call more than once. """
         if self._handle is not None:
+            self.flush()
             self._handle.close()
             self._handle = None
 
     def _write(self, kind, tick, **fields):
         record = {'kind': kind, 'tick': tick}
         record.update(fields)
-        self._handle.write(json.dumps(record, sort_keys=True) + '\n')
+        if not self._buffer:
+            self._buffered_since = time.monotonic()
+        self._buffer.append(_ENCODER.encode(record) + '\n')
+        self.records += 1
+        if self.every and len(self._buffer) >= self.every:
+            self.flush()
+        elif (self.seconds is not None
+              and time.monotonic() - self._buffered_since >= self.seconds):
+            self.flush()
+
+    def flush(self):
+        """ Writes out everything buffered, whatever the policy.
+        :return: None
+        """
+        if not self._buffer or self._handle is None:
+            return
+        started = time.perf_counter()
+        chunk = ''.join(self._buffer)
+        self._buffer = []
+        self._handle.write(chunk)
         self._handle.flush()
+        if self.fsync:
+            os.fsync(self._handle.fileno())
+        elapsed = time.perf_counter() - started
+        self.bytes_written += len(chunk.encode('utf-8'))
+        self.flushes += 1
+        self.flush_seconds += elapsed
+        self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+
+    def sync(self):
+        """ Flushes and fsyncs, whatever the policy, so that everything logged
+            so far survives the machine going down.
+        :return: The log's size in bytes
+        """
+        self.flush()
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        return os.fstat(self._handle.fileno()).st_size
+
+    def stats(self):
+        """ :return: dict of records and bytes written, flushes, and flush
+            latency in milliseconds """
+        count = self.flushes or 1
+        return {'records': self.records,
+                'bytes_written': self.bytes_written,
+                'flushes': self.flushes,
+                'mean_flush_ms': round(self.flush_seconds / count * 1000, 3),
+                'max_flush_ms': round(self.max_flush_seconds * 1000, 3)}
 
     def birth(self, *, tick, identity, generation, parent):
         """ Records a creature being born. """
         self._write('birth', tick, identity=identity, generation=generation,
                     parent=parent)
 
-    def death(self, *, tick, identity, cause, age, generation):
-        """ Records a creature dying, and why. """
+    # One argument per field of the event, so the count is the record's shape.
+    def death(self, *, tick, identity, cause, age,  # pylint: disable=too-many-arguments
+              generation, cpu_seconds=None, wall_seconds=None):
+        """ Records a creature dying, and why.
+        :param cpu_seconds: CPU time its process used over its life, if it had
+            a process of its own and that could be read; left out otherwise
+        :param wall_seconds: How long its process lived, likewise
+        """
+        usage = {name: value for name, value in (('cpu_seconds', cpu_seconds),
+                                                 ('wall_seconds', wall_seconds))
+                 if value is not None}
         self._write('death', tick, identity=identity, cause=cause, age=age,
-                    generation=generation)
+                    generation=generation, **usage)
 
     def birth_failed(self, *, tick, parent, reason):
         """ Records a birth that produced nothing.
@@ -80,44 +186,199 @@ class EventLog:
         """
         self._write('snapshot', tick, population=population, food=food,
                     strategy=strategy)
+        if self.at_ticks:
+            self.flush()
+
+
+def open_source(path):
+    """ :return: A source reading the log at path in whichever format it was
+        written: columnar (see columnar.py) or JSON lines """
+    if columnar.is_columnar(path):
+        return columnar.ColumnarSource(path)
+    return JsonLinesSource(path)
 
 
 def read(path):
-    """ Reads a log back.
+    """ Reads a log back, in either format.
 
         A run killed mid-write leaves a truncated final line. That line is
         skipped rather than treated as fatal, so an interrupted run is still
         analysable.
-    :param path: Path to an events.jsonl
+    :param path: Path to an events.jsonl or a columnar log
     :return: List of event dicts
     """
-    if not os.path.isfile(path):
-        return []
-    records = []
-    with open(path, encoding='utf-8') as handle:
-        for line in handle:
-            try:
-                records.append(json.loads(line))
-            except ValueError:
-                continue
-    return records
+    return [record for _, record in open_source(path).scan()]
+
+
+def _apply(living, event):
+    """ Updates a set of living identities with one event. """
+    if event['kind'] == 'birth':
+        living.add(event['identity'])
+    elif event['kind'] == 'death':
+        living.discard(event['identity'])
 
 
 class Replay:
-    """ Reconstructs a run from its log, without running anything. """
+    """ Reconstructs a run from its log, without running anything.
+
+        The log is read once, as a stream, into a small index: where each tick
+        starts, every snapshot, the run's totals, and who was alive at the end
+        of every checkpoint_every'th tick. Nothing else is kept, so a log far
+        larger than memory can be replayed, and asking who was alive at some
+        tick reads only from the checkpoint before it.
+
+        With sidecar=True the index is also saved next to the log, and a later
+        Replay of the same, unchanged log loads it instead of reading the log.
+    """
+
+    def __init__(self, path, *, checkpoint_every=DEFAULT_CHECKPOINT_EVERY,
+                 sidecar=False, source=None):
+        """
+        :param path: Path to an events.jsonl or a columnar log
+        :param checkpoint_every: Ticks between saved living sets; fewer means
+            faster living_at() and a larger index
+        :param sidecar: Load the index from, or save it to, path + INDEX_SUFFIX
+        :param source: Where records come from; defaults to reading path in
+            whichever format it is in
+        """
+        self.path = path
+        self.source = open_source(path) if source is None else source
+        self.checkpoint_every = checkpoint_every
+        index = self._load_sidecar() if sidecar else None
+        if index is None:
+            index = self._build()
+            if sidecar:
+                self._save_sidecar(index)
+        self._index = index
+        self._snapshot_ticks = [s[0] for s in index['snapshots']]
+        self._checkpoint_ticks = [c[0] for c in index['checkpoints']]
+
+    def _build(self):
+        """ Reads the whole log once and indexes it.
+        :return: The index dict
+        """
+        index = {'version': INDEX_VERSION, 'size': self.source.size(),
+                 'checkpoint_every': self.checkpoint_every,
+                 'ticks': [], 'offsets': [], 'snapshots': [], 'checkpoints': [],
+                 'births': 0, 'failed_births': 0, 'deaths': {},
+                 'deepest_generation': 0}
+        living = set()
+        current = None
+        for position, event in self.source.scan():
+            tick = event['tick']
+            if tick != current:
+                if current is not None and self._due(index, current):
+                    index['checkpoints'].append([current, position, sorted(living)])
+                index['ticks'].append(tick)
+                index['offsets'].append(position)
+                current = tick
+            _apply(living, event)
+            kind = event['kind']
+            if kind == 'snapshot':
+                index['snapshots'].append([tick, event['population'], event['food'],
+                                           event.get('strategy')])
+            elif kind == 'birth':
+                index['births'] += 1
+            elif kind == 'birth_failed':
+                index['failed_births'] += 1
+            elif kind == 'death':
+                index['deaths'][event['cause']] = index['deaths'].get(event['cause'], 0) + 1
+            if kind in ('birth', 'death'):
+                index['deepest_generation'] = max(index['deepest_generation'],
+                                                  event['generation'])
+        return index
+
+    @staticmethod
+    def _due(index, tick):
+        """ :return: True if the end of this tick should be checkpointed """
+        checkpoints = index['checkpoints']
+        return not checkpoints or tick - checkpoints[-1][0] >= index['checkpoint_every']
+
+    @property
+    def sidecar_path(self):
+        """ :return: Where this log's index is saved """
+        return self.path + INDEX_SUFFIX
+
+    def _load_sidecar(self):
+        """ :return: The saved index, or None if there is none or it no longer
+            describes the log """
+        try:
+            with open(self.sidecar_path, encoding='utf-8') as handle:
+                index = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if (not isinstance(index, dict) or index.get('version') != INDEX_VERSION
+                or index.get('size') != self.source.size()
+                or index.get('checkpoint_every') != self.checkpoint_every):
+            return None
+        return index
+
+    def _save_sidecar(self, index):
+        """ Writes the index next to the log, atomically, so a reader never
+            sees half of one. """
+        temporary = self.sidecar_path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as handle:
+            json.dump(index, handle)
+        os.replace(temporary, self.sidecar_path)
+
+    @functools.cached_property
+    def events(self):
+        """ Every event, loaded on first use. Avoid on large logs; everything
+            else Replay offers works without it.
+        :return: List of event dicts
+        """
+        return [event for _, event in self.source.scan()]
 
-    def __init__(self, path):
-        self.events = read(path)
+    @functools.cached_property
+    def lineage(self):
+        """ The run's lineage table, if its creatures had integer ids, for
+            turning them back into dotted names or asking about ancestry.
+        :return: The LineageTable saved beside the log, or None
+        """
+        path = os.path.join(os.path.dirname(self.path), lineage.LINEAGE_FILE)
+        return lineage.LineageTable.load(path) if os.path.isfile(path) else None
+
+    @functools.cached_property
+    def ancestry(self):
+        """ The run's family tree, indexed for clade questions (see
+            ancestry.py): ask it directly which lineage dominates at a tick or
+            whether one creature descends from another. Built on first use
+            from one more pass over the log, and kept for the life of this
+            Replay.
+        :return: The AncestryIndex
+        """
+        return ancestry.AncestryIndex(event for _, event in self.source.scan())
+
+    def common_ancestor(self, identities=None, *, tick=None):
+        """ The most recent common ancestor of a set of creatures, by default
+            of the survivors.
+        :param identities: The creatures; None for those alive at tick
+        :param tick: Whose survivors, when identities is None; None for the
+            last tick in the log
+        :return: Its identity, or None if they share no ancestor
+        """
+        if identities is None:
+            if tick is None:
+                if not self._index['ticks']:
+                    return None
+                tick = self._index['ticks'][-1]
+            identities = self.living_at(tick)
+        return self.ancestry.common_ancestor(identities)
+
+    @property
+    def ticks(self):
+        """ :return: Every tick the log has an event for, in order """
+        return list(self._index['ticks'])
 
     @property
     def population_over_time(self):
         """ :return: Population at the end of each tick """
-        return [e['population'] for e in self.events if e['kind'] == 'snapshot']
+        return [s[1] for s in self._index['snapshots']]
 
     @property
     def food_over_time(self):
         """ :return: Food in the pool at the end of each tick """
-        return [e['food'] for e in self.events if e['kind'] == 'snapshot']
+        return [s[2] for s in self._index['snapshots']]
 
     @property
     def strategy_over_time(self):
@@ -125,8 +386,19 @@ class Replay:
             one. Skips ticks where nobody was alive.
         :return: List of strategy dicts in tick order
         """
-        return [e['strategy'] for e in self.events
-                if e['kind'] == 'snapshot' and e.get('strategy') is not None]
+        return [s[3] for s in self._index['snapshots'] if s[3] is not None]
+
+    def snapshot_at(self, tick):
+        """ The world at the end of one tick, found by bisection.
+        :param tick: The tick of interest
+        :return: dict of population, food and strategy, or None if that tick
+            has no snapshot
+        """
+        position = bisect.bisect_left(self._snapshot_ticks, tick)
+        if position == len(self._snapshot_ticks) or self._snapshot_ticks[position] != tick:
+            return None
+        _, population, food, strategy = self._index['snapshots'][position]
+        return {'population': population, 'food': food, 'strategy': strategy}
 
     @property
     def strategy_drift(self):
@@ -145,12 +417,12 @@ class Replay:
     @property
     def births(self):
         """ :return: How many creatures were born """
-        return sum(1 for e in self.events if e['kind'] == 'birth')
+        return self._index['births']
 
     @property
     def failed_births(self):
         """ :return: How many births produced nothing """
-        return sum(1 for e in self.events if e['kind'] == 'birth_failed')
+        return self._index['failed_births']
 
     @property
     def birth_failure_rate(self):
@@ -164,36 +436,78 @@ class Replay:
     @property
     def deaths(self):
         """ :return: Count of deaths by cause """
-        counts = {}
-        for event in self.events:
-            if event['kind'] == 'death':
-                counts[event['cause']] = counts.get(event['cause'], 0) + 1
-        return counts
+        return dict(self._index['deaths'])
 
     @property
     def deepest_generation(self):
         """ :return: The furthest any lineage got from the founders """
-        return max((e['generation'] for e in self.events
-                    if e['kind'] in ('birth', 'death')), default=0)
+        return self._index['deepest_generation']
+
+    def events_at(self, tick):
+        """ Every event of one tick, read straight from where it starts.
+        :param tick: The tick of interest
+        :return: List of event dicts, empty if the tick has none
+        """
+        position = bisect.bisect_left(self._index['ticks'], tick)
+        if position == len(self._index['ticks']) or self._index['ticks'][position] != tick:
+            return []
+        found = []
+        for _, event in self.source.scan(self._index['offsets'][position]):
+            if event['tick'] != tick:
+                break
+            found.append(event)
+        return found
+
+    def _resume(self, tick):
+        """ The last checkpoint taken before a tick.
+        :return: (living set at that checkpoint, position to read on from)
+        """
+        position = bisect.bisect_left(self._checkpoint_ticks, tick) - 1
+        if position < 0:
+            return set(), 0
+        _, offset, living = self._index['checkpoints'][position]
+        return set(living), offset
 
     def living_at(self, tick):
         """ Who was alive at the end of a given tick.
 
             Phase 4 needs this to draw a frame without re-running the
-            simulation.
+            simulation. Reads only from the checkpoint before the tick.
         :param tick: The tick of interest
         :return: Set of creature identities
         """
-        living = set()
-        for event in self.events:
+        living, position = self._resume(tick + 1)
+        for _, event in self.source.scan(position):
             if event['tick'] > tick:
                 break
-            if event['kind'] == 'birth':
-                living.add(event['identity'])
-            elif event['kind'] == 'death':
-                living.discard(event['identity'])
+            _apply(living, event)
         return living
 
+    def frames(self, first=None, last=None):
+        """ Who was alive at the end of each tick in a range, in one pass from
+            the checkpoint before it.
+        :param first: First tick wanted; None for the start of the log
+        :param last: Last tick wanted; None for the end of the log
+        :return: Iterator of (tick, frozenset of identities), one per tick that
+            has events
+        """
+        if first is None:
+            if not self._index['ticks']:
+                return
+            first = self._index['ticks'][0]
+        living, position = self._resume(first)
+        current = None
+        for _, event in self.source.scan(position):
+            tick = event['tick']
+            if current is not None and tick != current and current >= first:
+                yield current, frozenset(living)
+            if last is not None and tick > last:
+                return
+            current = tick
+            _apply(living, event)
+        if current is not None and current >= first:
+            yield current, frozenset(living)
+
 
 def _git_sha():
     """ :return: Current commit SHA, or None outside a git checkout """
@@ -207,7 +521,7 @@ def _git_sha():
 
 # Seven run parameters plus the summary, all of which belong in the record.
 def write_manifest(path, *, seed, ticks, founders,  # pylint: disable=too-many-arguments
-                   regrowth, max_processes, timeout, summary):
+                   regrowth, max_processes, timeout, summary, settings=None):
     """ Records everything needed to set a run up again.
     :param path: Where to write manifest.json
     :param seed: Founder seed
@@ -217,6 +531,8 @@ def write_manifest(path, *, seed, ticks, founders,  # pylint: disable=too-many-a
     :param max_processes: The safety cap
     :param timeout: Seconds a creature gets to answer
     :param summary: Outcome counters from the run
+    :param settings: Any further run settings, such as the tick mode, recorded
+        as given
     :return: The manifest dict that was written
     """
     manifest = {
@@ -236,6 +552,7 @@ def write_manifest(path, *, seed, ticks, founders,  # pylint: disable=too-many-a
             'gives a statistically similar run, not an identical one. Use '
             'events.jsonl for what actually happened.'),
     }
+    manifest.update(settings or {})
     directory = os.path.dirname(path)
     if directory:
         os.makedirs(directory, exist_ok=True)
@@ -252,3 +569,34 @@ def read_manifest(path):
     """
     with open(path, encoding='utf-8') as handle:
         return json.load(handle)
+
+
+def write_checkpoint(path, state):
+    """ Saves a run's checkpoint atomically: a reader, or a run resuming after
+        a crash, sees either the previous checkpoint or this one, never part of
+        one.
+    :param path: Where to write checkpoint.json
+    :param state: The checkpoint dict
+    :return: None
+    """
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as handle:
+        json.dump(state, handle, sort_keys=True)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+    # The rename itself is only durable once the directory is.
+    directory = os.open(os.path.dirname(path) or '.', os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def read_checkpoint(path):
+    """ Reads a checkpoint back.
+    :param path: Path to checkpoint.json
+    :return: The checkpoint dict
+    """
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
@@ -0,0 +1,83 @@
+""" forking.py - forking creatures so they keep sharing their parent's memory.
+
+A forked creature starts out sharing every page of its parent's heap, and only
+pays for a page once something writes to it. Python writes to far more of them
+than a creature's own work would suggest. The cyclic garbage collector walks
+every tracked object it inherited, writing into each object's header as it
+goes. So a creature that does no more than decide, tick after tick, still
+gradually copies the whole supervisor heap it was forked with. The parent does
+the same in reverse whenever its own collector runs.
+
+fork() takes the steps the gc module documents for this. The parent's tracked
+objects are frozen just before the fork, so that no collection in the child
+ever walks them. They are thawed again in the parent straight afterwards, so
+the supervisor's own garbage is still collected. The child then turns its
+collector off altogether. A creature lives for a bounded number of ticks, and a
+decision makes no reference cycles worth collecting in that time.
+
+The child also closes every descriptor it inherited except the ones it was told
+to keep: the event log's file, other creatures' sockets, the poll set. That
+stops a creature from holding its siblings' sockets open, or writing into a log
+it knows nothing about. The Python objects wrapping those descriptors are left
+where they are rather than deleted, because freeing an object writes to the
+page it is on, which is the very copying this is meant to avoid.
+
+uss_kb() measures the result: the memory a process holds that no other process
+shares, read from /proc/<pid>/smaps_rollup.
+"""
+
+import gc
+import os
+
+# The smaps_rollup fields that make up a process's unique set size.
+_PRIVATE_FIELDS = ('Private_Clean:', 'Private_Dirty:')
+
+
+def fork(*keep):
+    """ Forks a creature's process.
+    :param keep: Descriptors the child goes on using. Standard input, output and
+        error are always kept; every other inherited descriptor is closed in
+        the child.
+    :return: The child's pid in the parent, 0 in the child, as os.fork()
+    """
+    gc.freeze()
+    pid = os.fork()
+    if pid == 0:
+        gc.disable()
+        _close_inherited(keep)
+    else:
+        gc.unfreeze()
+    return pid
+
+
+def reap(pid, block=False):
+    """ Reaps a child that has died.
+    :param block: Wait for it, rather than only taking it if already gone
+    :return: True if it has been reaped, or was long since gone
+    """
+    try:
+        done, _ = os.waitpid(pid, 0 if block else os.WNOHANG)
+    except ChildProcessError:
+        return True
+    return done != 0
+
+
+def _close_inherited(keep):
+    """ Closes every descriptor above standard error that is not in keep. """
+    start = 3
+    for fd in sorted(fd for fd in set(keep) if fd >= start):
+        os.closerange(start, fd)
+        start = fd + 1
+    os.closerange(start, os.sysconf('SC_OPEN_MAX'))
+
+
+def uss_kb(pid):
+    """ The memory a process holds that is shared with no other process.
+    :return: Kilobytes, or None if the process cannot be read
+    """
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', encoding='utf-8') as handle:
+            return sum(int(line.split()[1]) for line in handle
+                       if line.startswith(_PRIVATE_FIELDS))
+    except (OSError, ValueError, IndexError):
+        return None
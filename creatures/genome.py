@@ -16,6 +16,7 @@ produce the same genomes.
 """
 
 import ast
+import collections
 import contextlib
 import hashlib
 import io
@@ -23,6 +24,7 @@ import random
 import sys
 import os
 import warnings
+import weakref
 
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
                                 'legacy'))
@@ -54,6 +56,13 @@ ANCESTOR_SOURCE = '''def act(age, fuel, max_fuel, food_available, population):
     }
 '''
 
+# How many distinct genomes' act() callables one process keeps loaded. A forked
+# creature only ever needs one; the in-process assays in sim/ cycle through a
+# population of a few hundred distinct genomes, so this comfortably holds a
+# generation without growing without bound over a long sweep.
+DEFAULT_ACT_CACHE_SIZE = 1024
+
+
 class MisbehavingCreatureError(Exception):
     """ Raised when a creature's act() cannot be called or returns nonsense. """
 
@@ -102,10 +111,80 @@ def load(source):
     return act
 
 
+class ActCache:
+    """ A bounded, least-recently-used cache of loaded act() callables.
+
+        Keyed by a hash of the source text, so two creatures carrying the same
+        genome share one load however they came by it. A source that fails to
+        load is cached too, as its error message, so a broken genome is not
+        re-executed every time something asks it for a decision.
+
+        Loading once means a genome's module-level state now lives as long as
+        the cache entry: a mutant that keeps a counter in a global or a mutable
+        default argument sees it persist between decisions. That is what a
+        long-lived creature process would do anyway, and no selection pressure
+        rewards it, but it is a change from re-executing on every call. It is
+        also why whatever hosts a creature gives it an ActCache of its own:
+        creatures sharing one would share that state, and eviction would reset
+        it whenever other genomes happened to crowd it out.
+    """
+
+    def __init__(self, size=DEFAULT_ACT_CACHE_SIZE):
+        self.size = size
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(source):
+        """ :return: The content hash a source is cached under """
+        return hashlib.sha256(source.encode('utf-8', 'surrogatepass')).digest()
+
+    def load(self, source):
+        """ Returns the source's act(), loading it only on the first request.
+        :param source: Creature source
+        :return: The act callable
+        """
+        key = self.key(source)
+        try:
+            act, error = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            try:
+                act, error = load(source), None
+            except MisbehavingCreatureError as failure:
+                act, error = None, str(failure)
+            self._entries[key] = (act, error)
+            if len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        if error is not None:
+            raise MisbehavingCreatureError(error)
+        return act
+
+    def clear(self):
+        """ Forgets every loaded genome. The counters are kept. """
+        self._entries.clear()
+
+    def stats(self):
+        """ :return: dict of hits, misses, evictions and current size """
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'entries': len(self._entries)}
+
+
+# The process-wide cache decide() loads through when it is given none, for
+# one-off calls. Nothing that hosts creatures uses it; see ActCache.
+ACT_CACHE = ActCache()
+
+
 # Five sense inputs a creature conditions on, all keyword-only. The count
 # reflects how much of the world a creature can perceive, not a design problem.
 def decide(source, *, age, fuel, max_fuel,  # pylint: disable=too-many-arguments
-           food_available, population):
+           food_available, population, cache=None):
     """ Asks a creature what it wants to do, and never trusts the answer.
 
         A mutant can return anything at all, so the result is normalised: missing
@@ -119,9 +198,13 @@ def decide(source, *, age, fuel, max_fuel,  # pylint: disable=too-many-arguments
     :param max_fuel: The creature's fuel ceiling
     :param food_available: Food in the shared pool this tick
     :param population: How many creatures are alive
+    :param cache: The ActCache to load act() through; ACT_CACHE if None
     :return: dict with 'eat' (int), 'reproduce' (bool), 'endowment' (int)
     """
-    act = load(source)
+    # Loaded through a cache: decide() is the innermost call of every tick
+    # and every sim assay, and re-executing the genome each time used to
+    # dominate the profile of a full scaling sweep.
+    act = (ACT_CACHE if cache is None else cache).load(source)
     try:
         with contextlib.redirect_stdout(io.StringIO()):
             raw = act(age, fuel, max_fuel, food_available, population)
@@ -178,15 +261,71 @@ def derive_seed(parent_seed, birth_index):
     return int.from_bytes(digest[:8], 'big')
 
 
+class Genotype:  # pylint: disable=too-few-public-methods
+    """ One distinct genome source, shared by every creature that carries it.
+
+        Facts about a source that never change are worked out here once, when
+        the source first appears, rather than by every creature every tick.
+    """
+
+    __slots__ = ('id', 'source', 'is_ancestor', '__weakref__')
+
+    def __init__(self, identity, source):
+        # Short because it is used like a number, in tables and counts.
+        self.id = identity  # pylint: disable=invalid-name
+        self.source = source
+        self.is_ancestor = source == ANCESTOR_SOURCE
+
+
+class GenomeStore:
+    """ Interns genome sources, so each distinct one is held once.
+
+        Most of a population shares a handful of sources: an unmutated child
+        carries its parent's, and a mutation that happens twice produces the
+        same text twice. Each distinct source becomes one Genotype, with a
+        small id, and every Genome carrying it refers to that.
+
+        Held weakly. A Genotype lives as long as some Genome refers to it, so
+        the store never outgrows the genomes still in use, and a source that
+        dies out and later reappears is given a new id.
+    """
+
+    def __init__(self):
+        self._by_source = weakref.WeakValueDictionary()
+        self._next_id = 0
+
+    def intern(self, source):
+        """ :return: The Genotype for a source, made on first sight """
+        genotype = self._by_source.get(source)
+        if genotype is None:
+            genotype = Genotype(self._next_id, source)
+            self._by_source[source] = genotype
+            self._next_id += 1
+        return genotype
+
+    def __len__(self):
+        return len(self._by_source)
+
+
+# The process-wide store every Genome interns its source in.
+GENOMES = GenomeStore()
+
+
 class Genome:
     """ One creature's heritable material and its place in the lineage. """
 
     def __init__(self, source, seed, identity, generation):
-        self.source = source
+        self.genotype = GENOMES.intern(source)
         self.seed = seed
         self.identity = identity
         self.generation = generation
 
+    @property
+    def source(self):
+        """ :return: The creature's source, shared with every creature that
+            carries the same """
+        return self.genotype.source
+
     @classmethod
     def founder(cls, seed, identity='0'):
         """ Creates a founding creature of a run.
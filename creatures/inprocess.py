@@ -0,0 +1,126 @@
+""" inprocess.py - the creatures world in one process, the same every time.
+
+A forked run cannot be repeated: which creature times out, and so who is left to
+eat, depends on how busy the machine was. It is also slow, since every decision
+crosses a process boundary twice.
+
+InProcessSupervisor keeps the supervisor's rules and runs every creature in the
+supervisor's own process instead, calling its act() directly. Each creature
+loads its act() once, on its first decision, and keeps it: creatures carrying
+the same genome do not share one, so a mutant's module globals and mutable
+defaults are its own and live exactly as long as it does, just as they would
+in a process of its own. A hang is
+caught by a step budget rather than a clock: each creature may execute so many
+lines of its own code per decision (see budget.py), and one that runs out is
+recorded as a timeout on every machine at every load. A crash is still a crash.
+Given the same seed, two runs write byte-identical event logs.
+
+That makes it two things the forked backend is not: a fast path for large
+parameter sweeps, and an oracle. A forked serial run whose creatures never come
+near their timeout must write exactly the log this backend writes, so any
+difference is a bug in one of them.
+
+The price is isolation. A creature stuck inside one long C call is only caught
+by the wall-clock backstop, whose verdict is as unrepeatable as any other
+clock's. A creature that kills its host kills the run, and one that catches
+BaseException inside an endless loop can never be made to leave it, since
+everything this backend can do to it is an exception. Neither is a likely
+product of mutating the ancestor, but this is not the backend for hostile genomes.
+"""
+
+import time
+
+from creatures import budget, genome, supervisor
+
+# Lines of its own code a creature may execute per decision. The ancestor needs
+# about ten; a mutant that needs thousands is looping.
+DEFAULT_STEP_BUDGET = 10000
+
+# Wall-clock seconds before a creature is given up on regardless of steps, for
+# the few ways of hanging that tracing cannot see. Generous, so that on a slow
+# or busy machine it never decides the fate of a creature that would have
+# finished.
+DEFAULT_WALL_BACKSTOP = 5.0
+
+
+class InProcessSupervisor(supervisor.Supervisor):
+    """ A Supervisor whose creatures run inside it, deterministically.
+
+        Same world, same rules, same record. Creatures have no process, so
+        their pid is None.
+    """
+
+    REPRODUCIBILITY = (
+        'Reproducible: creatures ran in the supervisor process under a step '
+        'budget, so rerunning these parameters writes a byte-identical '
+        'events.jsonl, unless a creature hit the wall-clock backstop.')
+
+    def __init__(self, *, steps=DEFAULT_STEP_BUDGET,
+                 wall_backstop=DEFAULT_WALL_BACKSTOP, **kwargs):
+        """
+        :param steps: Lines of creature code allowed per decision
+        :param wall_backstop: Seconds allowed per decision whatever the steps
+        :param kwargs: Everything else Supervisor takes, except zygote and
+            transport, which only mean something for forked creatures
+        """
+        if kwargs.get('zygote') or kwargs.get('transport', 'json') != 'json':
+            raise ValueError('in-process creatures are not forked or sent '
+                             'anything, so zygote and transport do not apply')
+        super().__init__(**kwargs)
+        self.steps = steps
+        self.wall_backstop = wall_backstop
+
+    def _launch(self, gene, life):
+        """ A creature here is only its record, and its own act(). """
+        creature = supervisor.Creature(None, None, gene, life)
+        creature.acts = genome.ActCache(size=1)
+        return creature
+
+    def _end(self, creature):
+        """ Nothing to kill or reap. """
+
+    def _memory(self):
+        """ Every creature shares this one process, so there is nothing to
+            measure per creature. """
+        return None
+
+    def _usage(self, creature):
+        """ No process of its own, so nothing to record; and its timings would
+            make the log differ from run to run. """
+        return {}
+
+    def _decide(self, creature, food_available, population):
+        """ Asks one creature for its decision within its budgets.
+        :return: A decision dict, 'timeout' if it ran out, or None if it crashed
+        """
+        started = time.perf_counter()
+        try:
+            decision = budget.decide_within_budget(
+                creature.gene.source, wall=self.wall_backstop, steps=self.steps,
+                age=creature.life.age, fuel=creature.life.fuel,
+                max_fuel=creature.life.max_fuel, food_available=food_available,
+                population=population, cache=creature.acts)
+        except budget.BudgetExceededError:
+            return 'timeout'
+        except genome.MisbehavingCreatureError:
+            return None
+        self.timers.ask(time.perf_counter() - started)
+        return decision
+
+    def ask(self, creature):
+        """ Asks one creature, showing it the world as it stands now. """
+        return self._decide(creature, *self._senses(creature))
+
+    def _gather(self, creatures):
+        """ Asks every creature, showing each the world as the tick began.
+            Nobody eats until every creature has answered, so what each senses
+            is what was there at the start. """
+        return {creature: self._decide(creature, *self._senses(creature))
+                for creature in creatures}
+
+    def shutdown(self):
+        """ Forgets the population. Safe to call twice.
+        :return: None
+        """
+        self.living = []
+        super().shutdown()
@@ -0,0 +1,45 @@
+""" jsonlines.py - reading an events.jsonl back, record by record.
+
+EventLog writes one JSON record per line. Both Replay and the columnar
+converter read such a log back, so the reader lives here, where neither has to
+import the other to get at it.
+"""
+
+import json
+import os
+
+
+class JsonLinesSource:
+    """ Where a Replay reads records from: an events.jsonl.
+
+        A source yields each record with its position, an opaque value it can
+        later be asked to resume from, so a Replay can index a log once and come
+        back to any part of it without reading what comes before.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def size(self):
+        """ :return: Bytes in the log, or 0 if there is none """
+        return os.path.getsize(self.path) if os.path.isfile(self.path) else 0
+
+    def scan(self, position=0):
+        """ Streams records from a position to the end of the log.
+
+            A line that does not parse, such as the truncated last line of a
+            run killed mid-write, is skipped.
+        :param position: Where to start; 0, or a position scan() yielded
+        :return: Iterator of (position, record)
+        """
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, 'rb') as handle:
+            handle.seek(position)
+            for line in handle:
+                start, position = position, position + len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                yield start, record
@@ -170,3 +170,15 @@ class World:
         given = max(0, min(amount, self.food))
         self.food -= given
         return given
+
+    def state(self):
+        """ :return: Everything needed to rebuild this world, for a checkpoint """
+        return {'food': self.food, 'regrowth': self.regrowth, 'max_food': self.max_food}
+
+    def restore(self, state):
+        """ Takes on a world saved by state().
+        :return: None
+        """
+        self.food = state['food']
+        self.regrowth = state['regrowth']
+        self.max_food = state['max_food']
@@ -0,0 +1,202 @@
+""" lineage.py - small integer creature ids, and the table that says whose child each is.
+
+A dotted identity such as '3.0.2.1.0' names a creature by its whole ancestry:
+founder 3, its first child, that child's third, and so on. It needs no table,
+but it grows by a segment every generation, and it is copied into every birth
+and death event, so a deep run's log and memory grow with its depth as well as
+its size.
+
+A LineageTable instead gives every creature the next integer, and records once,
+in an append-only file beside the event log, its parent's id and its birth index
+under that parent. Ids cost the same however deep a lineage goes. The dotted
+name is still there when wanted: dotted() rebuilds it by walking up the table,
+and ancestry questions such as depth and common ancestor are answered the same
+way, in time proportional to depth.
+
+The file holds two int64s per creature, in id order: parent id (-1 for a
+founder) and birth index (the founder's index, for a founder). A run killed
+mid-write may leave a partial last record, which is ignored.
+"""
+
+import array
+import os
+import struct
+
+MAGIC = b'MUTLIN1\n'
+
+# What a run directory calls its lineage file, beside events.jsonl.
+LINEAGE_FILE = 'lineage.bin'
+RECORD = struct.Struct('<qq')
+
+# The parent id a founder is recorded with.
+NO_PARENT = -1
+
+
+class LineageTable:
+    """ Every creature's parent and birth index, by integer id. """
+
+    def __init__(self, path=None):
+        """
+        :param path: File to persist the table to, appending to whatever it
+            already holds; None to keep it in memory only
+        """
+        self.path = path
+        self.parents = array.array('q')
+        self.indexes = array.array('q')
+        self.depths = array.array('q')
+        self._handle = None
+        if path is not None:
+            self._read(path)
+            self._handle = open(path, 'ab')  # pylint: disable=consider-using-with
+            if self._handle.tell() == 0:
+                self._handle.write(MAGIC)
+
+    @classmethod
+    def load(cls, path):
+        """ Reads a saved table without opening it for writing.
+        :param path: A lineage file
+        :return: The LineageTable
+        """
+        table = cls()
+        table._read(path)  # pylint: disable=protected-access
+        return table
+
+    def _read(self, path):
+        """ Appends every complete record in a lineage file to this table. """
+        if not os.path.isfile(path):
+            return
+        with open(path, 'rb') as handle:
+            data = handle.read()
+        if not data:
+            return
+        if not data.startswith(MAGIC):
+            raise ValueError(f'{path} is not a lineage file')
+        usable = (len(data) - len(MAGIC)) // RECORD.size * RECORD.size
+        for parent, index in RECORD.iter_unpack(data[len(MAGIC):len(MAGIC) + usable]):
+            self._add(parent, index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+        return False
+
+    def __len__(self):
+        return len(self.parents)
+
+    def _add(self, parent, index):
+        """ :return: The id given to a new row """
+        self.parents.append(parent)
+        self.indexes.append(index)
+        self.depths.append(0 if parent == NO_PARENT else self.depths[parent] + 1)
+        if self._handle is not None:
+            self._handle.write(RECORD.pack(parent, index))
+        return len(self.parents) - 1
+
+    def founder(self, index):
+        """ Registers a founder.
+        :param index: Which founder of the run it is
+        :return: Its id
+        """
+        return self._add(NO_PARENT, index)
+
+    def child(self, parent, birth_index):
+        """ Registers a newborn.
+        :param parent: The parent's id
+        :param birth_index: Which of the parent's offspring it is, from zero
+        :return: Its id
+        """
+        if not 0 <= parent < len(self.parents):
+            raise KeyError(f'no creature with id {parent}')
+        return self._add(parent, birth_index)
+
+    def parent(self, identity):
+        """ :return: A creature's parent id, or None for a founder """
+        parent = self.parents[identity]
+        return None if parent == NO_PARENT else parent
+
+    def depth(self, identity):
+        """ :return: Generations between a creature and its founder; 0 for a
+            founder """
+        return self.depths[identity]
+
+    def ancestors(self, identity):
+        """ :return: Iterator of a creature's ancestors' ids, parent first,
+            founder last """
+        parent = self.parents[identity]
+        while parent != NO_PARENT:
+            yield parent
+            parent = self.parents[parent]
+
+    def founder_of(self, identity):
+        """ :return: The id of the founder a creature descends from; itself
+            for a founder """
+        root = identity
+        for root in self.ancestors(identity):
+            pass
+        return root
+
+    def dotted(self, identity):
+        """ The creature's name in the dotted form Genome.child gives when
+            there is no table, such as '3.0.2'.
+        :return: The dotted identity string
+        """
+        segments = [self.indexes[identity]]
+        segments.extend(self.indexes[ancestor] for ancestor in self.ancestors(identity))
+        return '.'.join(str(segment) for segment in reversed(segments))
+
+    def common_ancestor(self, first, second):
+        """ The most recent creature both descend from, counting each creature
+            as its own ancestor.
+        :return: Its id, or None if they descend from different founders
+        """
+        while self.depths[first] > self.depths[second]:
+            first = self.parents[first]
+        while self.depths[second] > self.depths[first]:
+            second = self.parents[second]
+        while first != second:
+            first, second = self.parents[first], self.parents[second]
+            if first == NO_PARENT:
+                return None
+        return first
+
+    def is_ancestor(self, ancestor, identity):
+        """ :return: True if ancestor is identity or one of its ancestors """
+        while self.depths[identity] > self.depths[ancestor]:
+            identity = self.parents[identity]
+        return identity == ancestor
+
+    def flush(self):
+        """ Writes out whatever the file handle has buffered. """
+        if self._handle is not None:
+            self._handle.flush()
+
+    def sync(self):
+        """ Writes out everything buffered and fsyncs it, so the rows so far
+            survive the machine going down.
+        :return: How many rows the table holds
+        """
+        if self._handle is not None:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+        return len(self)
+
+    def close(self):
+        """ Flushes and closes the file. Safe to call more than once. """
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+def truncate(path, rows):
+    """ Cuts a lineage file back to its first rows creatures, dropping any
+        written after, as resuming a run from a checkpoint needs.
+    :param path: A lineage file
+    :param rows: How many rows to keep
+    :raises ValueError: If the file holds fewer than that
+    """
+    size = len(MAGIC) + rows * RECORD.size
+    if os.path.getsize(path) < size:
+        raise ValueError(f'{path} holds fewer than {rows} creatures')
+    os.truncate(path, size)
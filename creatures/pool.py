@@ -0,0 +1,334 @@
+""" pool.py - many creatures per process, for populations the fork model cannot hold.
+
+One process per creature is what makes the forked supervisor honest: a crash or
+a hang takes down one creature and nothing else. It also caps a run at a few
+hundred creatures, since every creature costs a process, a socket and a slot in
+the kernel's process table.
+
+PoolSupervisor keeps the supervisor's rules and replaces only how creatures are
+hosted. A fixed pool of worker processes, one per core by default, each hosts
+many creatures. Every tick each worker is sent one batch of requests for its
+creatures and answers them one by one, each under its own wall-clock and CPU
+budget (see budget.py). Populations of tens of thousands then fit on one
+machine.
+
+Isolation is kept at the level that matters for the record. A creature that
+raises is reported as crashed and one that overruns its budget as a timeout,
+exactly as a forked creature would be. A creature that kills its host, by
+crashing the interpreter or hanging inside a single C call where no signal can
+reach it, is found from outside: the worker goes silent or exits, the creature
+it was answering for is recorded as timeout or crashed, and only that worker is
+respawned, with the rest of its creatures re-hosted and asked again.
+"""
+
+import collections
+import json
+import os
+import select
+import signal
+import socket
+import time
+
+from creatures import budget, forking, genome, supervisor
+
+# A creature cap rather than a process cap: workers are few, creatures many.
+# Still a safety valve, not a rule of the world, and still reported if hit.
+DEFAULT_MAX_CREATURES = 50000
+
+# How long past a creature's own budget a worker may go without answering
+# before it is assumed stuck somewhere its timers cannot reach.
+WATCHDOG_GRACE = 1.0
+
+
+def _worker_loop(channel, wall, cpu):
+    """ Runs inside a worker process, hosting creatures until told to stop.
+
+        Understands three commands, one JSON line each: host a genome under a
+        key, drop a key, and tick, which asks every listed creature for a
+        decision. Replies to a tick are written one line per creature, in the
+        order asked, as each is answered, so the supervisor always knows which
+        creature a silent worker was stuck on.
+    :param channel: Socket to the supervisor, the one descriptor the worker
+        keeps from the supervisor (see forking.py)
+    :param wall: Wall-clock seconds each creature gets per decision
+    :param cpu: CPU seconds each creature gets per decision
+    :return: Never; always exits the process
+    """
+    hosted = {}
+
+    def answer(message):
+        if message['cmd'] == 'host':
+            # Each creature loads its own act(), as it would in a process of
+            # its own, though the worker may host others with its genome.
+            hosted[message['key']] = (message['source'], genome.ActCache(size=1))
+        elif message['cmd'] == 'drop':
+            hosted.pop(message['key'], None)
+        elif message['cmd'] == 'tick':
+            # A generator, so each reply is written as soon as it is decided.
+            return (_answer_ask(*hosted[ask[0]], ask, wall, cpu) for ask in message['asks'])
+        return ()
+
+    supervisor.serve(channel, answer)
+
+
+def _answer_ask(source, acts, ask, wall, cpu):
+    """ One hosted creature's reply to a tick, in its worker.
+    :param source: The creature's genome source
+    :param acts: The creature's own genome.ActCache
+    :param ask: Its key, age, fuel, max_fuel, food available and population
+    :return: The reply, carrying its key
+    """
+    key, age, fuel, max_fuel, food, population = ask
+    try:
+        return {'key': key, 'decision': budget.decide_within_budget(
+            source, wall=wall, cpu=cpu, age=age, fuel=fuel, max_fuel=max_fuel,
+            food_available=food, population=population, cache=acts)}
+    except budget.BudgetExceededError:
+        return {'key': key, 'timeout': True}
+    except genome.MisbehavingCreatureError as error:
+        return {'key': key, 'error': str(error)}
+
+
+class Worker:  # pylint: disable=too-few-public-methods
+    """ One worker process and the creatures it hosts. """
+
+    def __init__(self, index):
+        self.index = index
+        self.pid = None
+        self.channel = None
+        self.hosted = {}
+        self.buffer = b''
+
+    def send(self, message):
+        """ Sends one command line to the worker.
+        :return: True if it was delivered
+        """
+        try:
+            self.channel.sendall((json.dumps(message) + '\n').encode('utf-8'))
+        except OSError:
+            return False
+        return True
+
+
+class PoolSupervisor(supervisor.Supervisor):
+    """ A Supervisor whose creatures share a fixed pool of worker processes.
+
+        Same world, same rules, same record. Everything a run sees through the
+        Supervisor API is unchanged except that a creature's pid is its
+        worker's, shared with every other creature that worker hosts.
+    """
+
+    def __init__(self, *, workers=None, cpu_budget=None,
+                 max_processes=DEFAULT_MAX_CREATURES, **kwargs):
+        """
+        :param workers: Worker processes to run; defaults to one per core
+        :param cpu_budget: CPU seconds a creature gets per decision; defaults
+            to the timeout
+        :param max_processes: The creature cap
+        :param kwargs: Everything else Supervisor takes, except broadcast,
+            which a pool always does
+        """
+        super().__init__(max_processes=max_processes, broadcast=True, **kwargs)
+        self.cpu_budget = self.timeout if cpu_budget is None else cpu_budget
+        self.worker_respawns = 0
+        self._keys = 0
+        self._worker_poller = select.epoll()
+        self._workers = [Worker(index) for index in range(workers or os.cpu_count() or 1)]
+        self._by_worker_fd = {}
+        for worker in self._workers:
+            self._start_worker(worker)
+
+    def _start_worker(self, worker):
+        """ Forks a worker process and hosts every creature assigned to it. """
+        ours, theirs = socket.socketpair()
+        pid = forking.fork(theirs.fileno())
+        if pid == 0:
+            _worker_loop(theirs, self.timeout, self.cpu_budget)
+        theirs.close()
+        worker.pid, worker.channel, worker.buffer = pid, ours, b''
+        self._worker_poller.register(ours.fileno(), select.POLLIN)
+        self._by_worker_fd[ours.fileno()] = worker
+        for key, creature in worker.hosted.items():
+            worker.send({'cmd': 'host', 'key': key, 'source': creature.gene.source})
+            creature.pid = pid
+
+    def _stop_worker(self, worker):
+        """ Kills a worker process and reaps it, keeping its assignments. """
+        fd = worker.channel.fileno()
+        self._by_worker_fd.pop(fd, None)
+        try:
+            self._worker_poller.unregister(fd)
+        except (OSError, ValueError):
+            pass
+        worker.channel.close()
+        worker.channel = None
+        try:
+            os.kill(worker.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        try:
+            os.waitpid(worker.pid, 0)
+        except ChildProcessError:
+            pass
+
+    def _respawn(self, worker, culprit):
+        """ Replaces a worker that died or went silent.
+        :param worker: The failed worker
+        :param culprit: The creature it was answering for, which is not
+            re-hosted; the tick records its death
+        """
+        worker.hosted.pop(culprit.key, None)
+        self._stop_worker(worker)
+        self._start_worker(worker)
+        self.worker_respawns += 1
+
+    def _launch(self, gene, life):
+        """ Hosts a creature on the least-loaded worker. """
+        worker = min(self._workers, key=lambda candidate: len(candidate.hosted))
+        creature = supervisor.Creature(worker.pid, None, gene, life)
+        creature.key = self._keys
+        creature.worker = worker
+        self._keys += 1
+        worker.hosted[creature.key] = creature
+        worker.send({'cmd': 'host', 'key': creature.key, 'source': gene.source})
+        return creature
+
+    def _end(self, creature):
+        """ Drops a creature from its worker. The worker lives on. """
+        if creature.worker.hosted.pop(creature.key, None) is not None:
+            creature.worker.send({'cmd': 'drop', 'key': creature.key})
+
+    def _memory(self):
+        """ A creature's memory is its worker's, shared with every other
+            creature the worker hosts. """
+        return None
+
+    def _usage(self, creature):
+        """ A creature's process is its worker's, so /proc has nothing to say
+            about the creature alone. """
+        return {}
+
+    def ask(self, creature):
+        """ Asks one creature for its decision, enforcing its budget.
+        :return: A decision dict, 'timeout' if it hung, or None if it crashed
+        """
+        return self._gather([creature])[creature]
+
+    def _send_batch(self, worker, creatures):
+        """ Sends one worker its tick requests. A worker that cannot be reached
+            is respawned and sent them again. What each creature senses goes
+            with it, since in a spatial world no two need see the same. """
+        message = {'cmd': 'tick',
+                   'asks': [[c.key, c.life.age, c.life.fuel, c.life.max_fuel,
+                             *self._senses(c)] for c in creatures]}
+        if not worker.send(message):
+            self._stop_worker(worker)
+            self._start_worker(worker)
+            self.worker_respawns += 1
+            worker.send(message)
+
+    def _gather(self, creatures):
+        """ Sends every worker its batch, then collects each creature's answer.
+
+            A worker answers its creatures strictly in the order asked, so when
+            one exits or goes silent the first unanswered creature is the one
+            that did it. That creature is recorded, the worker is respawned, and
+            the rest of its batch is asked again.
+        :param creatures: The creatures to ask
+        :return: dict mapping each creature to its decision, 'timeout' or None
+        """
+        replies = {}
+        pending = collections.defaultdict(collections.deque)
+        for creature in creatures:
+            pending[creature.worker].append(creature)
+        for worker, batch in pending.items():
+            self._send_batch(worker, batch)
+
+        progress = dict.fromkeys(pending, time.monotonic())
+        patience = self.timeout + WATCHDOG_GRACE
+        while pending:
+            now = time.monotonic()
+            for worker in [w for w in pending if now - progress[w] > patience]:
+                self._fail(worker, pending, replies, 'timeout')
+                progress[worker] = time.monotonic()
+            if not pending:
+                break
+            wait = min(progress[w] for w in pending) + patience - time.monotonic()
+            for fd, _ in self._worker_poller.poll(max(wait, 0.001)):
+                worker = self._by_worker_fd.get(fd)
+                if worker not in pending:
+                    continue
+                try:
+                    raw = worker.channel.recv(65536)
+                except OSError:
+                    raw = b''
+                if not raw:
+                    self._fail(worker, pending, replies, None)
+                    progress[worker] = time.monotonic()
+                    continue
+                progress[worker] = time.monotonic()
+                worker.buffer += raw
+                *lines, worker.buffer = worker.buffer.split(b'\n')
+                for line in lines:
+                    if not self._settle_reply(worker, pending, replies, line):
+                        break
+        return replies
+
+    def _settle_reply(self, worker, pending, replies, line):
+        """ Matches one reply line to the creature it answers. A worker that
+            answers for any other creature, or sends a line that is not a
+            reply at all, has lost track of its batch, and is handled as one
+            that exited.
+        :return: False if the worker was respawned instead, so that nothing
+            else it sent can be trusted
+        """
+        batch = pending[worker]
+        try:
+            reply = json.loads(line)
+        except ValueError:
+            reply = None
+        if not isinstance(reply, dict) or reply.get('key') != batch[0].key:
+            self._fail(worker, pending, replies, None)
+            return False
+        creature = batch.popleft()
+        if 'timeout' in reply:
+            replies[creature] = 'timeout'
+        elif 'decision' in reply:
+            replies[creature] = reply['decision']
+        else:
+            replies[creature] = None
+        if not batch:
+            del pending[worker]
+        return True
+
+    def _fail(self, worker, pending, replies, outcome):
+        """ Handles a worker that exited or went silent mid-batch.
+        :param outcome: What the creature it was stuck on died of: 'timeout'
+            for silence, None (crashed) for an exit
+        """
+        batch = pending[worker]
+        culprit = batch.popleft()
+        replies[culprit] = outcome
+        self._respawn(worker, culprit)
+        if batch:
+            self._send_batch(worker, batch)
+        else:
+            del pending[worker]
+
+    def shutdown(self):
+        """ Stops every worker. Safe to call twice.
+        :return: None
+        """
+        for worker in self._workers:
+            if worker.channel is not None:
+                self._stop_worker(worker)
+            worker.hosted = {}
+        self.living = []
+        self._worker_poller.close()
+        super().shutdown()
+
+    def summary(self):
+        """ :return: The Supervisor summary plus the pool's own counters """
+        summary = super().summary()
+        summary.update(workers=len(self._workers), worker_respawns=self.worker_respawns)
+        return summary
@@ -1,24 +1,35 @@
 """ run.py - runs a creature population and records what happened.
 
     python -m creatures.run --seed 1 --ticks 100
+    python -m creatures.run --seed 1 --backend pool --founders 5000
+    python -m creatures.run --seed 1 --backend inprocess
+    python -m creatures.run --seed 1 --resume
     python -m creatures.run --replay results/creatures/seed-1
 
 Each run gets a directory under results/creatures/, keyed by seed, holding a
 manifest and an append-only event log.
 
+Every few ticks a run also writes checkpoint.json: the living population's
+genomes and lifecycles, the world, the tallies, and how far the event log and
+lineage file had got. A run that crashes, or a machine that reboots, can then be
+carried on from there with --resume rather than started again from tick zero.
+
 Rerunning a seed does not reproduce the run. Genetics are reproducible, but OS
 scheduling decides which creature reaches the food pool first, so a rerun is
 statistically similar rather than identical. That is why the log exists: to
-replay a run, read its log rather than running it again.
+replay a run, read its log rather than running it again. The one exception is
+the inprocess backend, which gives up process isolation to make a seed's run
+exactly repeatable.
 """
 
 import argparse
+import contextlib
 import os
 import shutil
 import sys
 import time
 
-from creatures import events, supervisor
+from creatures import events, inprocess, lineage, pool, spatial, supervisor
 
 DEFAULT_RESULTS_ROOT = os.path.join(
     os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'results', 'creatures')
@@ -29,40 +40,147 @@ def run_directory(results_root, seed):
     return os.path.join(results_root, f'seed-{seed}')
 
 
-# Seven independent run parameters, all of which an experiment varies.
+# How creatures can be hosted. Each takes the same world parameters; the
+# remaining options are specific to the backend and are recorded as given.
+BACKENDS = {
+    'fork': supervisor.Supervisor,
+    'pool': pool.PoolSupervisor,
+    'inprocess': inprocess.InProcessSupervisor,
+}
+
+# When a run's event log is flushed unless told otherwise: at the end of every
+# tick, so a killed run loses at most the tick it was in without paying for a
+# write on every birth and death. See events.EventLog for the other policies.
+DEFAULT_LOG_POLICY = {'every': None, 'seconds': None, 'at_ticks': True, 'fsync': False}
+
+# What a run directory calls its latest checkpoint, beside manifest.json.
+CHECKPOINT_FILE = 'checkpoint.json'
+
+# Ticks between checkpoints. Each costs a write of the whole living population
+# and an fsync of the log, which is small next to this many ticks.
+DEFAULT_CHECKPOINT_EVERY = 25
+
+
+# Eight independent run parameters, all of which an experiment varies.
 def run(*, seed=1, ticks=100, founders=10,  # pylint: disable=too-many-arguments
         regrowth=400, max_processes=supervisor.DEFAULT_MAX_PROCESSES,
         timeout=supervisor.DEFAULT_TIMEOUT, results_root=DEFAULT_RESULTS_ROOT,
-        quiet=False):
+        backend='fork', quiet=False, log_policy=None, dotted=False,
+        checkpoint_every=DEFAULT_CHECKPOINT_EVERY, **options):
     """ Runs a population and records it.
+    :param backend: One of BACKENDS
+    :param log_policy: EventLog flush settings; None for DEFAULT_LOG_POLICY
+    :param dotted: Name creatures by dotted identity strings rather than by
+        integer ids with a lineage file beside the log
+    :param checkpoint_every: Ticks between checkpoints the run can be resumed
+        from; None or 0 for none
+    :param options: Backend-specific Supervisor options, such as broadcast,
+        zygote, transport, cpu_limit or workers, passed through and recorded in the manifest
     :return: The run directory
     """
     directory = run_directory(results_root, seed)
     if os.path.isdir(directory):
         shutil.rmtree(directory)
     os.makedirs(directory)
+    parameters = {'seed': seed, 'ticks': ticks, 'founders': founders,
+                  'regrowth': regrowth, 'max_processes': max_processes,
+                  'timeout': timeout, 'backend': backend,
+                  'log_policy': DEFAULT_LOG_POLICY if log_policy is None else log_policy,
+                  'dotted': dotted, 'checkpoint_every': checkpoint_every,
+                  'options': options}
+    return _record(directory, parameters, quiet=quiet)
+
+
+def resume(directory, *, quiet=False):
+    """ Carries a run on from its last checkpoint, with the settings it was
+        started with, as if it had never stopped.
 
+        Whatever the run logged after that checkpoint is cut off the event log
+        and the lineage file first, since the resumed run is about to live
+        those ticks again.
+    :param directory: A run directory holding checkpoint.json
+    :return: The run directory
+    :raises FileNotFoundError: If the run has no checkpoint
+    """
+    state = events.read_checkpoint(os.path.join(directory, CHECKPOINT_FILE))
+    log_path = os.path.join(directory, 'events.jsonl')
+    if os.path.getsize(log_path) < state['log_bytes']:
+        raise ValueError(f'{log_path} is shorter than its checkpoint says it was')
+    os.truncate(log_path, state['log_bytes'])
+    if state['lineage_rows'] is not None:
+        lineage.truncate(os.path.join(directory, lineage.LINEAGE_FILE),
+                         state['lineage_rows'])
+    return _record(directory, state['parameters'], quiet=quiet, state=state)
+
+
+def _record(directory, parameters, *, quiet, state=None):
+    """ Runs a population into a run directory, from the start or from a
+        checkpoint, and writes its manifest.
+    :param parameters: Everything run() was given, as a checkpoint keeps it
+    :param state: A checkpoint to resume from, or None to start afresh
+    :return: The run directory
+    """
     started = time.monotonic()
-    with events.EventLog(os.path.join(directory, 'events.jsonl')) as log:
-        with supervisor.Supervisor(regrowth=regrowth, max_processes=max_processes,
-                                   timeout=timeout, log=log) as sup:
-            sup.start(founders=founders, seed=seed)
-            for _ in range(ticks):
+    backend, dotted = parameters['backend'], parameters['dotted']
+    every = parameters['checkpoint_every']
+    table = None if dotted else lineage.LineageTable(
+        os.path.join(directory, lineage.LINEAGE_FILE))
+    with table or contextlib.nullcontext(), events.EventLog(
+            os.path.join(directory, 'events.jsonl'), **parameters['log_policy']) as log:
+        with BACKENDS[backend](regrowth=parameters['regrowth'],
+                               max_processes=parameters['max_processes'],
+                               timeout=parameters['timeout'], log=log, lineage=table,
+                               **parameters['options']) as sup:
+            if state is None:
+                sup.start(founders=parameters['founders'], seed=parameters['seed'])
+            else:
+                sup.resume(state)
+            while sup.ticks < parameters['ticks']:
                 sup.tick()
+                if every and sup.ticks % every == 0:
+                    _checkpoint(directory, sup, log, table, parameters)
                 if not sup.living:
                     break
             summary = sup.summary()
 
     summary['wall_seconds'] = round(time.monotonic() - started, 2)
+    summary['log'] = log.stats()
+    settings = {'backend': backend, 'log_policy': parameters['log_policy'],
+                'identities': 'dotted' if dotted else 'lineage',
+                'checkpoint_every': every, **parameters['options']}
+    if state is not None:
+        # wall_seconds and the log stats then cover this session only.
+        settings['resumed_from_tick'] = state['tick']
+    # A backend that can be rerun exactly says so, in place of the default
+    # warning that reruns only resemble each other.
+    if hasattr(BACKENDS[backend], 'REPRODUCIBILITY'):
+        settings['reproducibility'] = BACKENDS[backend].REPRODUCIBILITY
     events.write_manifest(os.path.join(directory, 'manifest.json'),
-                          seed=seed, ticks=ticks, founders=founders,
-                          regrowth=regrowth, max_processes=max_processes,
-                          timeout=timeout, summary=summary)
+                          seed=parameters['seed'], ticks=parameters['ticks'],
+                          founders=parameters['founders'],
+                          regrowth=parameters['regrowth'],
+                          max_processes=parameters['max_processes'],
+                          timeout=parameters['timeout'], summary=summary,
+                          settings=settings)
     if not quiet:
         _report(directory, summary)
     return directory
 
 
+def _checkpoint(directory, sup, log, table, parameters):
+    """ Saves what resume() needs to carry on from the end of this tick.
+
+        The log and the lineage file are fsynced before the checkpoint that
+        counts them is written, so a checkpoint never counts records the disk
+        does not have.
+    """
+    state = sup.checkpoint()
+    state['log_bytes'] = log.sync()
+    state['lineage_rows'] = None if table is None else table.sync()
+    state['parameters'] = parameters
+    events.write_checkpoint(os.path.join(directory, CHECKPOINT_FILE), state)
+
+
 def _report(directory, summary):
     """ Prints a short account of a completed run. """
     print(f'run written to {directory}')
@@ -81,8 +199,10 @@ def summarize(directory):
     :param directory: A run directory
     :return: 0 on success, 1 if there is nothing there
     """
-    log_path = os.path.join(directory, 'events.jsonl')
-    if not os.path.isfile(log_path):
+    # A log converted to the columnar format replays just the same.
+    candidates = [os.path.join(directory, name) for name in ('events.jsonl', 'events.col')]
+    log_path = next((path for path in candidates if os.path.isfile(path)), None)
+    if log_path is None:
         print(f'no event log in {directory}')
         return 1
 
@@ -99,6 +219,7 @@ def summarize(directory):
     print(f'  deepest generation {replay.deepest_generation}')
     causes = ', '.join(f'{c} {n}' for c, n in sorted(replay.deaths.items()))
     print(f'  deaths             {causes or "none"}')
+    _describe_lineages(replay)
 
     strategy = replay.strategy_over_time
     if strategy:
@@ -114,28 +235,138 @@ def summarize(directory):
     return 0
 
 
-def main(arguments):
-    """ Entry point for the command line. """
+def _describe_lineages(replay):
+    """ Prints which founder's lineage the run ended with, and how far back
+        its survivors last shared an ancestor. """
+    if not replay.ticks:
+        return
+    table = replay.lineage
+
+    def name(identity):
+        return table.dotted(identity) if table is not None else identity
+
+    last = replay.ticks[-1]
+    dominant = replay.ancestry.dominant_lineage(last)
+    if dominant is None:
+        return
+    founder, count = dominant
+    print(f'  dominant lineage   founder {name(founder)}, {count} of '
+          f'{sum(replay.ancestry.founder_counts(last).values())} alive at the end')
+    ancestor = replay.common_ancestor(tick=last)
+    print(f'  survivors\' MRCA    '
+          f'{"none; they descend from several founders" if ancestor is None else name(ancestor)}')
+
+
+def argument_parser():
+    """ :return: The command line's parser, which creatures.batch also uses to
+        read the arguments it hands each run """
     parser = argparse.ArgumentParser(
         description='Run a creature population, or replay a recorded run.')
     parser.add_argument('--replay', metavar='DIR',
                         help='Replay a recorded run instead of running one.')
+    parser.add_argument('--resume', action='store_true',
+                        help='Carry on the run for --seed under --results-root from its '
+                             'last checkpoint, with the settings it was started with.')
     parser.add_argument('--seed', type=int, default=1)
     parser.add_argument('--ticks', type=int, default=100)
     parser.add_argument('--founders', type=int, default=10)
     parser.add_argument('--regrowth', type=int, default=400)
     parser.add_argument('--max-processes', type=int,
-                        default=supervisor.DEFAULT_MAX_PROCESSES)
+                        help=f'Safety cap; default {supervisor.DEFAULT_MAX_PROCESSES} '
+                             f'processes, or {pool.DEFAULT_MAX_CREATURES} creatures '
+                             f'with the pool backend.')
     parser.add_argument('--timeout', type=float, default=supervisor.DEFAULT_TIMEOUT)
+    parser.add_argument('--world-size', metavar='WxH',
+                        help='Spread food over a grid of WxH cells, each creature seeing '
+                             'and eating only around its own, rather than one pool. '
+                             'Cannot be used with --transport shm.')
     parser.add_argument('--results-root', default=DEFAULT_RESULTS_ROOT)
+    parser.add_argument('--broadcast', action='store_true',
+                        help='Ask every creature at once each tick rather than in turn. '
+                             'Everyone then sees the pool as it was at the start of the tick.')
+    parser.add_argument('--zygote', action='store_true',
+                        help='Fork creatures from a small pre-initialised fork server '
+                             'rather than from the supervisor itself.')
+    parser.add_argument('--transport', choices=('json', 'shm'), default='json',
+                        help='json: a JSON line each way per tick, readable when '
+                             'debugging. shm: binary records in shared memory with '
+                             'eventfd doorbells. shm cannot be used with --zygote.')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='fork',
+                        help='fork: one process per creature. pool: a few worker '
+                             'processes each hosting many creatures, for populations '
+                             'past the process cap; --max-processes then caps creatures. '
+                             'inprocess: no processes at all, under a step budget, so a '
+                             'seed always gives the same run.')
+    parser.add_argument('--workers', type=int,
+                        help='Worker processes for the pool backend; default one per core.')
+    parser.add_argument('--steps', type=int, default=inprocess.DEFAULT_STEP_BUDGET,
+                        help='Lines of its own code a creature may run per decision '
+                             'with the inprocess backend before it is a timeout.')
+    parser.add_argument('--cpu-limit', type=float, default=supervisor.DEFAULT_CPU_LIMIT,
+                        help='CPU seconds a forked creature may spend on one decision '
+                             'before it ends itself as a timeout; 0 leaves only --timeout.')
+    parser.add_argument('--dotted-identities', action='store_true',
+                        help='Name creatures by their dotted ancestry, as before, rather '
+                             'than by integer ids with a lineage file beside the log.')
+    parser.add_argument('--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY,
+                        metavar='N', help='Write a checkpoint every N ticks; 0 for none.')
+    parser.add_argument('--log-flush-every', type=int, metavar='N',
+                        help='Also flush the event log every N records.')
+    parser.add_argument('--log-flush-seconds', type=float, metavar='T',
+                        help='Also flush the event log once a record has waited T seconds.')
+    parser.add_argument('--no-log-flush-at-ticks', action='store_true',
+                        help='Do not flush the event log at the end of every tick.')
+    parser.add_argument('--log-fsync', action='store_true',
+                        help='fsync the event log after every flush.')
+    parser.add_argument('--profile', action='store_true',
+                        help='Time each phase of every tick and each creature\'s answer, '
+                             'and record the totals and latency percentiles in the manifest.')
+    parser.add_argument('--quiet', action='store_true',
+                        help='Print nothing about the run once it is done.')
+    return parser
+
+
+def main(arguments):
+    """ Entry point for the command line. """
+    parser = argument_parser()
     args = parser.parse_args(arguments)
 
     if args.replay:
         return summarize(args.replay)
+    if args.resume:
+        directory = run_directory(args.results_root, args.seed)
+        if not os.path.isfile(os.path.join(directory, CHECKPOINT_FILE)):
+            print(f'no checkpoint in {directory}')
+            return 1
+        resume(directory, quiet=args.quiet)
+        return 0
+
+    if args.backend == 'pool':
+        options = {'workers': args.workers}
+        cap = args.max_processes or pool.DEFAULT_MAX_CREATURES
+    elif args.backend == 'inprocess':
+        options = {'broadcast': args.broadcast, 'steps': args.steps}
+        cap = args.max_processes or supervisor.DEFAULT_MAX_PROCESSES
+    else:
+        options = {'broadcast': args.broadcast, 'zygote': args.zygote,
+                   'transport': args.transport, 'cpu_limit': args.cpu_limit or None}
+        cap = args.max_processes or supervisor.DEFAULT_MAX_PROCESSES
 
+    if args.profile:
+        options['profile'] = True
+    if args.world_size:
+        try:
+            options['world_size'] = spatial.parse_size(args.world_size)
+        except ValueError as error:
+            parser.error(str(error))
     run(seed=args.seed, ticks=args.ticks, founders=args.founders,
-        regrowth=args.regrowth, max_processes=args.max_processes,
-        timeout=args.timeout, results_root=args.results_root)
+        regrowth=args.regrowth, max_processes=cap,
+        timeout=args.timeout, results_root=args.results_root,
+        backend=args.backend, quiet=args.quiet, dotted=args.dotted_identities,
+        checkpoint_every=args.checkpoint_every,
+        log_policy={'every': args.log_flush_every, 'seconds': args.log_flush_seconds,
+                    'at_ticks': not args.no_log_flush_at_ticks, 'fsync': args.log_fsync},
+        **options)
     return 0
 
 
@@ -0,0 +1,216 @@
+""" sharedmem.py - world state and decisions through shared memory, not JSON.
+
+The default channel between the supervisor and a creature is a socket carrying
+one JSON line each way per tick. Every creature's request repeats the same world
+state, and every request and reply is encoded, written, read and decoded.
+
+This transport replaces that with fixed binary records in memory the supervisor
+and every creature share. The world's state is written once per tick into one
+shared page. Each creature has a 64-byte slot in a shared array holding its own
+request and its reply, and a pair of eventfds as doorbells: one the supervisor
+rings to say a request is waiting, one the creature rings when its reply is in
+the slot. Nothing is serialised, and a tick costs each creature two eventfd
+operations rather than a JSON round trip.
+
+Shared memory only reaches a process that existed when the mapping was made,
+or was forked after it. Slots therefore come in chunks, each mapped before any
+creature that uses it is forked, and this transport cannot be combined with the
+zygote, which forks from a copy of the supervisor taken before the chunks exist.
+
+The socket stays. A creature still holds its end, so its death is still seen as
+end-of-file, which is how a crash is told apart from a timeout. It is also
+where a creature that ran out of CPU time says so, since by then it cannot be
+trusted to have left its slot in any particular state.
+"""
+
+import mmap
+import os
+import select
+import struct
+
+from creatures import budget, genome
+
+# The world as every creature sees it this tick: a request sequence number,
+# then food_available and population.
+WORLD = struct.Struct('<Qqq')
+
+# One creature's slot. The request half is written by the supervisor: sequence,
+# age, fuel, max_fuel. The reply half is written by the creature: the sequence it
+# answers, a status, reproduce, padding, eat and endowment.
+REQUEST = struct.Struct('<Qqqq')
+REPLY = struct.Struct('<QBBxxxxxxqq')
+SLOT_SIZE = 64
+REPLY_OFFSET = REQUEST.size
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# Slots per shared chunk. A chunk is mapped when the last one fills, so a run
+# pays for memory in steps of this many creatures.
+CHUNK_SLOTS = 256
+
+
+class _Slot:
+    """ A creature's own view of the shared memory: the world page, its slot,
+        and its two doorbells. Used only in the creature's process.
+    """
+
+    def __init__(self, world, chunk, offset, doorbell, answer):
+        """
+        :param world: The shared world page
+        :param chunk: The shared chunk holding the slot
+        :param offset: Where in the chunk the slot starts
+        :param doorbell: eventfd the supervisor rings when a request is waiting
+        :param answer: eventfd to ring once the reply is in the slot
+        """
+        self.world = world
+        self.chunk = chunk
+        self.offset = offset
+        self.doorbell = doorbell
+        self.answer = answer
+
+    def request(self):
+        """ Reads the waiting request, and the world it is asked in.
+        :return: (sequence, the senses genome.decide takes)
+        """
+        _, food_available, population = WORLD.unpack_from(self.world, 0)
+        sequence, age, fuel, max_fuel = REQUEST.unpack_from(self.chunk, self.offset)
+        return sequence, {'age': age, 'fuel': fuel, 'max_fuel': max_fuel,
+                          'food_available': food_available, 'population': population}
+
+    def reply(self, sequence, decision):
+        """ Writes the reply into the slot and rings back.
+        :param sequence: The request it answers
+        :param decision: A normalised decision, or None if the creature erred
+        :return: None
+        """
+        if decision is None:
+            REPLY.pack_into(self.chunk, self.offset + REPLY_OFFSET, sequence, STATUS_ERROR,
+                            0, 0, 0)
+        else:
+            REPLY.pack_into(self.chunk, self.offset + REPLY_OFFSET, sequence, STATUS_OK,
+                            decision['reproduce'], decision['eat'], decision['endowment'])
+        os.eventfd_write(self.answer, 1)
+
+
+def _shm_child_loop(channel, source, slot, cpu=None, lifetime=None):
+    """ Runs inside the forked process for the whole of a creature's life.
+
+        Waits for its doorbell, reads the world and its request from shared
+        memory, writes its decision into its slot and rings back. Exits when the
+        supervisor closes its socket.
+    :param channel: Socket to the supervisor
+    :param source: This creature's genome source
+    :param slot: The creature's _Slot
+    :param cpu: CPU seconds allowed per decision, or None for no limit
+    :param lifetime: CPU seconds allowed over the creature's whole life
+    :return: Never; always exits the process
+    """
+    if cpu is not None:
+        budget.limit_cpu(channel, lifetime)
+    acts = genome.ActCache(size=1)
+    poller = select.poll()
+    poller.register(slot.doorbell, select.POLLIN)
+    poller.register(channel, select.POLLIN)
+    try:
+        while True:
+            ready = {fd for fd, _ in poller.poll()}
+            if channel.fileno() in ready:
+                break
+            os.eventfd_read(slot.doorbell)
+            sequence, senses = slot.request()
+            try:
+                decision = budget.decide_on_cpu(source, cpu, cache=acts, **senses)
+            except genome.MisbehavingCreatureError:
+                decision = None
+            slot.reply(sequence, decision)
+    except (OSError, ValueError):
+        pass
+    finally:
+        os._exit(0)  # pylint: disable=protected-access
+
+
+class SharedMemoryTransport:
+    """ The supervisor's side of the shared world page and slot array. """
+
+    def __init__(self):
+        self.world = mmap.mmap(-1, mmap.PAGESIZE)
+        self.chunks = []
+        self._free = []
+        self._sequence = 0
+
+    def attach(self, creature):
+        """ Gives a creature a slot and its doorbells. Call before forking it.
+        :param creature: Anything with slot, doorbell and answer attributes
+            to set; a Creature, or a record that becomes one
+        :return: None
+        """
+        if not self._free:
+            base = len(self.chunks) * CHUNK_SLOTS
+            self.chunks.append(mmap.mmap(-1, CHUNK_SLOTS * SLOT_SIZE))
+            self._free = list(range(base + CHUNK_SLOTS - 1, base - 1, -1))
+        creature.slot = self._free.pop()
+        creature.doorbell = os.eventfd(0)
+        creature.answer = os.eventfd(0)
+
+    def locate(self, slot):
+        """ :return: (chunk, byte offset) of a slot """
+        chunk, index = divmod(slot, CHUNK_SLOTS)
+        return self.chunks[chunk], index * SLOT_SIZE
+
+    def child_loop(self, channel, source, creature, **limits):
+        """ Becomes the creature, in a freshly forked process. Never returns.
+        :param limits: The CPU limits _shm_child_loop takes, if any
+        """
+        chunk, offset = self.locate(creature.slot)
+        _shm_child_loop(channel, source,
+                        _Slot(self.world, chunk, offset, creature.doorbell, creature.answer),
+                        **limits)
+
+    def publish(self, food_available, population):
+        """ Writes the world's state for the next round of requests. """
+        self._sequence += 1
+        WORLD.pack_into(self.world, 0, self._sequence, food_available, population)
+
+    def send(self, creature):
+        """ Writes a creature's request into its slot and rings its doorbell.
+        :return: True if the doorbell rang
+        """
+        chunk, offset = self.locate(creature.slot)
+        REQUEST.pack_into(chunk, offset, self._sequence, creature.life.age,
+                          creature.life.fuel, creature.life.max_fuel)
+        try:
+            os.eventfd_write(creature.doorbell, 1)
+        except OSError:
+            return False
+        return True
+
+    def collect(self, creature):
+        """ Reads the reply a creature has rung to say is ready.
+        :return: A decision dict, or None if it errored or answered a stale
+            request
+        """
+        os.eventfd_read(creature.answer)
+        chunk, offset = self.locate(creature.slot)
+        sequence, status, reproduce, eat, endowment = REPLY.unpack_from(
+            chunk, offset + REPLY_OFFSET)
+        if status != STATUS_OK or sequence != self._sequence:
+            return None
+        return {'eat': eat, 'reproduce': bool(reproduce), 'endowment': endowment}
+
+    def detach(self, creature):
+        """ Frees a dead creature's slot and closes its doorbells. """
+        for fd in (creature.doorbell, creature.answer):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._free.append(creature.slot)
+
+    def close(self):
+        """ Unmaps everything. Safe to call twice. """
+        for region in [self.world] + self.chunks:
+            if not region.closed:
+                region.close()
+        self.chunks = []
+        self._free = []
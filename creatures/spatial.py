@@ -0,0 +1,169 @@
+""" spatial.py - a world of many small food patches on a grid, not one pool.
+
+lifecycle.World is one pool of food that every creature draws from and every
+creature can see. That makes the whole population one contest, decided by the
+order the supervisor happens to serve creatures in. It also means a population
+of any size is served by a single shared counter.
+
+SpatialWorld cuts the world into width x height cells on a torus, each with its
+own food and its own regrowth. Every creature lives in one cell. It sees only
+its neighbourhood, its own cell and the eight around it: the food there, and
+how many creatures share it. When it eats it draws from its own cell first and
+then from its neighbours, in a fixed order. Crowding is then local. A creature
+in a crowded corner can starve while one in an empty one thrives, and how far a
+lineage spreads starts to matter.
+
+The index is a spatial hash of the simplest kind: a cell's number is its row
+times the width plus its column, and every per-cell quantity is a flat list
+indexed by it. Each cell's neighbourhood is worked out once, when the world is
+made. So what a creature senses and what it eats each cost a fixed nine cells,
+whatever the population. Only regrowth visits every cell, once per tick.
+
+Creatures do not move; a genome has no way to say where it wants to go. Each
+child is born into its parent's neighbourhood, in a cell chosen by its own
+seed, so a lineage spreads a cell at a time and a run is as reproducible as
+the genomes in it. Founders are spread evenly over the grid.
+
+Food and regrowth are given for the whole world, as they are for
+lifecycle.World, and divided among the cells as evenly as whole numbers allow.
+The same parameters then feed the same total population in either world.
+"""
+
+
+def parse_size(text):
+    """ Reads a world size such as '32x24'.
+    :return: (width, height)
+    :raises ValueError: If it is not two positive whole numbers
+    """
+    width, separator, height = text.lower().partition('x')
+    if not separator:
+        raise ValueError(f'a world size is WIDTHxHEIGHT, such as 32x32; got {text!r}')
+    size = int(width), int(height)
+    if min(size) < 1:
+        raise ValueError(f'a world needs at least one cell each way; got {text!r}')
+    return size
+
+
+def _spread(total, cells):
+    """ Divides a whole number among cells as evenly as possible, the
+        remainder going to cells spaced out across the grid rather than to the
+        first few.
+    :return: List of each cell's share
+    """
+    return [total * (cell + 1) // cells - total * cell // cells for cell in range(cells)]
+
+
+class SpatialWorld:  # pylint: disable=too-many-instance-attributes
+    """ Food and creatures on a grid of cells that wraps at the edges.
+
+        Drop-in for lifecycle.World wherever the supervisor uses the world as a
+        whole: food is the total over every cell and tick() does the same job.
+        Creatures eat through request_near(), which is request() for one
+        cell's neighbourhood.
+    """
+
+    def __init__(self, width, height, food, regrowth, max_food=None):
+        """
+        :param width: Cells across
+        :param height: Cells down
+        :param food: Food in the whole world to begin with
+        :param regrowth: Food regrown over the whole world each tick
+        :param max_food: The most food any one cell can hold, or None
+        """
+        self.width = width
+        self.height = height
+        self.regrowth = regrowth
+        self.max_food = max_food
+        cells = width * height
+        self.cells = _spread(food, cells)
+        self.growth = _spread(regrowth, cells)
+        self.food = food
+        self.crowd = [0] * cells
+        self.neighbourhoods = [self._neighbourhood(cell) for cell in range(cells)]
+
+    def _neighbourhood(self, cell):
+        """ :return: A cell and the eight around it, itself first, each once
+            even on a grid too small for them all to differ """
+        row, column = divmod(cell, self.width)
+        near = [cell]
+        for down in (-1, 0, 1):
+            for across in (-1, 0, 1):
+                near.append((row + down) % self.height * self.width
+                            + (column + across) % self.width)
+        return tuple(dict.fromkeys(near))
+
+    def tick(self):
+        """ Regrows every cell, each up to the cap if one is set.
+        :return: None
+        """
+        cells, cap = self.cells, self.max_food
+        for cell, grown in enumerate(self.growth):
+            cells[cell] = cells[cell] + grown if cap is None else min(cells[cell] + grown, cap)
+        self.food = sum(cells)
+
+    def request_near(self, amount, cell):
+        """ Takes food for a creature in a cell: from the cell itself first,
+            then from its neighbours in order, until it has enough or the
+            neighbourhood is bare.
+        :param amount: Food wanted
+        :param cell: Where the creature lives
+        :return: Food actually given, between 0 and amount
+        """
+        wanted = max(0, amount)
+        cells = self.cells
+        for near in self.neighbourhoods[cell]:
+            if not wanted:
+                break
+            taken = min(wanted, cells[near])
+            cells[near] -= taken
+            wanted -= taken
+        given = max(0, amount) - wanted
+        self.food -= given
+        return given
+
+    def senses(self, cell):
+        """ What a creature in a cell can perceive.
+        :return: (food in its neighbourhood, creatures in its neighbourhood,
+            itself included)
+        """
+        near = self.neighbourhoods[cell]
+        return sum(self.cells[n] for n in near), sum(self.crowd[n] for n in near)
+
+    def place(self, cell):
+        """ Counts a creature into a cell. """
+        self.crowd[cell] += 1
+
+    def leave(self, cell):
+        """ Counts a creature out of a cell. """
+        self.crowd[cell] -= 1
+
+    def founder_cell(self, index, founders):
+        """ :return: Where founder number index of so many starts, spread evenly
+            over the grid """
+        return index * len(self.cells) // founders
+
+    def birthplace(self, cell, seed):
+        """ :return: Where a child with this seed is born to a parent in cell:
+            somewhere in the parent's neighbourhood, the same for the same seed """
+        near = self.neighbourhoods[cell]
+        return near[seed % len(near)]
+
+    def state(self):
+        """ :return: Everything needed to rebuild this world, for a checkpoint """
+        return {'width': self.width, 'height': self.height, 'food': self.food,
+                'regrowth': self.regrowth, 'max_food': self.max_food,
+                'cells': list(self.cells)}
+
+    def restore(self, state):
+        """ Takes on a world saved by state(). Creatures are placed afresh as
+            they are brought back, so the crowd is not part of it.
+        :return: None
+        """
+        if (state['width'], state['height']) != (self.width, self.height):
+            raise ValueError(f'checkpoint is of a {state["width"]}x{state["height"]} world, '
+                             f'not {self.width}x{self.height}')
+        self.regrowth = state['regrowth']
+        self.max_food = state['max_food']
+        self.growth = _spread(self.regrowth, len(self.cells))
+        self.cells = list(state['cells'])
+        self.food = state['food']
@@ -3,6 +3,15 @@
 Each creature is one forked process that lives its whole life, blocking briefly
 each tick to be asked for a decision. One fork per creature, not per tick.
 
+By default creatures are asked one at a time, each seeing the pool as the
+creatures before it left it. Broadcast mode instead sends every request first
+and gathers the replies together against one shared deadline, so a tick costs
+the slowest creature rather than the sum of all of them, and a handful of hung
+creatures no longer add their timeouts up serially. Every creature then sees the
+pool as it stood at the start of the tick. Food is still served in a fixed
+order, the order of the living list, which is birth order and is therefore
+already recorded by the event log.
+
 Reruns are deliberately not byte-identical: OS scheduling is nondeterministic
 and the order creatures reach the food pool varies. Genetics are reproducible
 (see genome.py), timing is not.
@@ -12,28 +21,79 @@ its own process and nothing else, and a creature that hangs can be killed. Both
 are inevitable once source is being mutated, and neither is recoverable if
 creatures run in the supervisor's own process.
 
+Creatures are forked from the supervisor by default. With zygote=True they are
+forked instead by a small fork server started with the supervisor (see
+zygote.py), so they stop inheriting a supervisor heap that grows as the run does.
+Either way a creature runs without a garbage collector and closes whatever
+descriptors it inherited, so it keeps sharing the heap it was forked with (see
+forking.py); the summary reports how much memory each one holds alone.
+
+Requests and replies travel as JSON lines over each creature's socket by
+default. With transport='shm' they are fixed binary records in shared memory
+instead, with eventfd doorbells (see sharedmem.py); JSON stays as the readable
+fallback for debugging.
+
+Creatures are named by dotted identity strings, which spell out their whole
+ancestry, unless the supervisor is given a LineageTable. Then each creature is
+a small integer, and the table records whose child it is (see lineage.py).
+
+With world_size=(width, height) the world is a grid of food patches rather
+than one pool, and each creature sees and eats only from its own neighbourhood
+(see spatial.py). Food then runs short in one place while there is plenty in
+another, and the order creatures are served in stops deciding who eats.
+
+A forked creature also polices its own CPU time. Each decision runs under a
+CPU timer, and a creature that spins past it reports a timeout and exits there
+and then (see budget.limit_cpu), so a tick no longer waits out the wall-clock
+timeout for it, and a creature that was merely slow to be scheduled is no
+longer confused with one that was spinning. The wall-clock timeout stays, for
+creatures stuck where the timer cannot reach. Every death event records the CPU
+and wall time the creature's process used over its life, read from /proc.
+
+A creature that dies is sent SIGKILL at once but not waited for there and then:
+a die-off tick can kill hundreds, and reaping each one in turn stalled the
+world. The dead are reaped together at the end of the tick without blocking,
+and any not yet gone are tried again next tick.
+
 The concurrency cap is a safety valve for the machine, not a rule of the world.
 Food is the limiter (see test_ecology.py). If the cap is ever hit in a real
 run, the food parameters were wrong and the results are contaminated by an
 artificial ceiling, so it is counted and reported rather than passed over.
 """
 
+import collections
+import functools
 import json
 import os
 import select
 import signal
 import socket
 import sys
+import time
 
-from creatures import genome, lifecycle
+from creatures import budget, forking, genome, lifecycle, spatial
+from creatures.sharedmem import SharedMemoryTransport
+from creatures.timers import NO_TIMERS, PhaseTimers
+from creatures.zygote import Zygote
 
 # How long a creature gets to answer before it is assumed hung. Generous by CPU
 # standards: deciding is a single function call, so anything slower is looping.
 DEFAULT_TIMEOUT = 0.5
 
+# CPU seconds a forked creature may spend on one decision before it ends itself.
+# Well under the timeout, so a spinner is caught long before the tick would have
+# given up on it, and still far more than deciding needs.
+DEFAULT_CPU_LIMIT = 0.1
+
+# Clock ticks per second, the unit /proc reports CPU time in.
+_CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
 # Safety valve only. Set well above the population the food supply can sustain.
 DEFAULT_MAX_PROCESSES = 500
 
+# A reply still being read off a socket; not yet a decision or a failure.
+_INCOMPLETE = object()
+
 # Chance that a given offspring is mutated at all. Mutating every offspring is
 # a rate of one mutation per genome per generation, which is far past the error
 # threshold for this substrate: see the sweep recorded in the PR for #26.
@@ -41,12 +101,19 @@ DEFAULT_MUTATION_PROBABILITY = 0.1
 
 CAUSES = ('starvation', 'old_age', 'crashed', 'timeout')
 
+# The Lifecycle attributes a checkpoint keeps. Whether it is alive, and of
+# what it died, need no keeping: only the living are checkpointed.
+_LIFE_STATE = ('fuel', 'max_fuel', 'max_age', 'fertile_from', 'fertile_until',
+               'reproduction_cost', 'age')
+
 
-class Creature:  # pylint: disable=too-few-public-methods
+class Creature:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
     """ One living creature: its process, its pipe, and its engine state.
 
         A record binding a pid to a genome and its engine state; the behaviour
-        lives on Supervisor, which owns every creature.
+        lives on Supervisor, which owns every creature. Each way of hosting a
+        creature keeps what it needs here, so the attributes are as many as
+        the ways.
     """
 
     def __init__(self, pid, channel, gene, life, birth_index=0):
@@ -55,16 +122,44 @@ class Creature:  # pylint: disable=too-few-public-methods
         self.gene = gene
         self.life = life
         self.births = birth_index
+        self.born = time.monotonic()
+        # Where it lives in a spatial world; None in a world of one pool.
+        self.cell = None
+        # Its own genome.ActCache, if it is hosted in the supervisor's process
+        # rather than forked, so that its act() and the module state that
+        # comes with it are its alone, as they are in a process of its own.
+        self.acts = None
+        # Its slot and doorbells, given by the shm transport; see sharedmem.py.
+        self.slot = None
+        self.doorbell = None
+        self.answer = None
 
     def close(self):
-        """ Closes this creature's end of the pipe. """
+        """ Closes this creature's end of the pipe, if it has one. """
+        if self.channel is None:
+            return
         try:
             self.channel.close()
         except OSError:
             pass
 
 
-def _child_loop(channel, source):
+def _cpu_seconds(pid):
+    """ CPU time a process has used, user and system, read from /proc. A zombie
+        still has its entry, so this works on a creature that already died.
+    :return: Seconds, or None if the process cannot be read
+    """
+    try:
+        with open(f'/proc/{pid}/stat', encoding='utf-8') as handle:
+            # The command name may hold spaces, so fields are counted from the
+            # ')' that closes it; utime and stime are the 12th and 13th after.
+            fields = handle.read().rsplit(')', 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    return (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+
+
+def _child_loop(channel, source, cpu=None, lifetime=None):
     """ Runs inside the forked process for the whole of a creature's life.
 
         Reads one request per tick, answers with a decision, and exits when the
@@ -73,26 +168,53 @@ def _child_loop(channel, source):
         cause of death instead of guessing from an exit code.
     :param channel: Socket to the supervisor
     :param source: This creature's genome source
+    :param cpu: CPU seconds allowed per decision, or None for no limit
+    :param lifetime: CPU seconds allowed over the creature's whole life
+    :return: Never; always exits the process
+    """
+    if cpu is not None:
+        budget.limit_cpu(channel, lifetime)
+    # Its own, rather than the ACT_CACHE it inherited, warm with whatever the
+    # parent's act() calls left in it.
+    acts = genome.ActCache(size=1)
+
+    def answer(request):
+        if request.get('cmd') == 'die':
+            return None
+        try:
+            return [budget.decide_on_cpu(source, cpu, cache=acts,
+                                         age=request['age'],
+                                         fuel=request['fuel'],
+                                         max_fuel=request['max_fuel'],
+                                         food_available=request['food_available'],
+                                         population=request['population'])]
+        except genome.MisbehavingCreatureError as error:
+            return [{'error': str(error)}]
+
+    serve(channel, answer)
+
+
+def serve(channel, answer):
+    """ Answers JSON lines on a socket for the rest of a forked process's life.
+
+        Each reply is written and flushed as soon as answer() produces it, so
+        a reader always knows how far the process got. Exits when the socket
+        is closed or fails.
+    :param channel: Socket to the supervisor
+    :param answer: Called with each request; returns the replies to it, in
+        order and possibly lazily, or None to stop
     :return: Never; always exits the process
     """
     reader = channel.makefile('r')
     writer = channel.makefile('w')
     try:
         for line in reader:
-            request = json.loads(line)
-            if request.get('cmd') == 'die':
+            replies = answer(json.loads(line))
+            if replies is None:
                 break
-            try:
-                reply = genome.decide(source,
-                                      age=request['age'],
-                                      fuel=request['fuel'],
-                                      max_fuel=request['max_fuel'],
-                                      food_available=request['food_available'],
-                                      population=request['population'])
-            except genome.MisbehavingCreatureError as error:
-                reply = {'error': str(error)}
-            writer.write(json.dumps(reply) + '\n')
-            writer.flush()
+            for reply in replies:
+                writer.write(json.dumps(reply) + '\n')
+                writer.flush()
     except (OSError, ValueError):
         pass
     finally:
@@ -106,18 +228,24 @@ class Supervisor:  # pylint: disable=too-many-instance-attributes
         world parameters, the population, and four separate tallies.
     """
 
-    # Nine world parameters, all of which an experiment legitimately varies.
+    # World parameters, all of which an experiment legitimately varies. How
+    # creatures' processes are run is a separate matter; see _host().
     def __init__(self, *, regrowth=200, food=None,  # pylint: disable=too-many-arguments
                  max_processes=DEFAULT_MAX_PROCESSES,
-                 timeout=DEFAULT_TIMEOUT, max_age=lifecycle.DEFAULT_MAX_AGE,
+                 max_age=lifecycle.DEFAULT_MAX_AGE,
                  max_fuel=lifecycle.DEFAULT_MAX_FUEL,
                  starting_fuel=lifecycle.DEFAULT_FUEL,
                  reproduction_cost=lifecycle.DEFAULT_REPRODUCTION_COST,
-                 mutation_probability=DEFAULT_MUTATION_PROBABILITY, log=None):
-        self.world = lifecycle.World(
-            food=regrowth * 5 if food is None else food, regrowth=regrowth)
+                 mutation_probability=DEFAULT_MUTATION_PROBABILITY, log=None,
+                 broadcast=False, lineage=None, profile=False, world_size=None,
+                 **hosting):
+        food = regrowth * 5 if food is None else food
+        if world_size is None:
+            self.world = lifecycle.World(food=food, regrowth=regrowth)
+        else:
+            self.world = spatial.SpatialWorld(*world_size, food=food, regrowth=regrowth)
+        self.spatial = world_size is not None
         self.max_processes = max_processes
-        self.timeout = timeout
         self.max_age = max_age
         self.max_fuel = max_fuel
         self.starting_fuel = starting_fuel
@@ -127,11 +255,31 @@ class Supervisor:  # pylint: disable=too-many-instance-attributes
         # Optional EventLog. Forked runs cannot be replayed by re-running, so
         # what happened is written down as it happens.
         self.log = log
+        # Optional LineageTable. With one, identities are integer ids and the
+        # table holds the ancestry a dotted identity would have spelled out.
+        self.lineage = lineage
+        # Where each tick's time goes, when asked for; see timers.py.
+        self.timers = PhaseTimers() if profile else NO_TIMERS
+        self.broadcast = broadcast
+        # One long-lived poll set for broadcast gathering, so a tick does not
+        # rebuild it. Creatures are registered when spawned and removed when
+        # killed; _by_fd maps a ready descriptor back to its creature.
+        self._poller = None
+        self._by_fd = {}
+        self._host(**hosting)
         self.living = []
+        # How many of the living carry each Genotype, kept up as creatures are
+        # born and die, so the per-tick strategy costs the number of distinct
+        # genomes alive rather than the population.
+        self.genotypes = collections.Counter()
         self.deaths = dict.fromkeys(CAUSES, 0)
         self.births = 0
         self.cap_hits = 0
         self.ticks = 0
+        # Creatures killed but not yet reaped, and what reaping has cost.
+        self._dying = []
+        self.reaped = 0
+        self.reap_seconds = 0.0
 
     def __enter__(self):
         return self
@@ -140,32 +288,127 @@ class Supervisor:  # pylint: disable=too-many-instance-attributes
         self.shutdown()
         return False
 
+    def _host(self, *, timeout=DEFAULT_TIMEOUT, cpu_limit=DEFAULT_CPU_LIMIT,
+              zygote=False, transport='json'):
+        """ Sets up how creatures' processes are run and talked to.
+        :param timeout: Wall-clock seconds a creature has to answer
+        :param cpu_limit: CPU seconds a forked creature may spend on one
+            decision; None lets it spin until the wall-clock timeout
+        :param zygote: Fork creatures from a zygote; see zygote.py
+        :param transport: 'json' lines over each creature's socket, or 'shm'
+            for shared memory; see sharedmem.py
+        :return: None
+        """
+        self.timeout = timeout
+        self.cpu_limit = cpu_limit
+        if transport not in ('json', 'shm'):
+            raise ValueError(f'unknown transport {transport!r}')
+        if transport == 'shm' and zygote:
+            raise ValueError('the shm transport cannot be combined with the zygote: '
+                             'shared memory mapped after the zygote forked never reaches it')
+        if transport == 'shm' and self.spatial:
+            raise ValueError('the shm transport shows every creature the same world page, '
+                             'so it cannot be combined with a spatial world')
+        self._shm = SharedMemoryTransport() if transport == 'shm' else None
+        self._zygote = None
+        if zygote:
+            # Started now, while this process's heap is as small as it will
+            # ever be, so every creature it forks later inherits that and
+            # nothing more.
+            self._zygote = Zygote(functools.partial(_child_loop, **self._cpu_limits())).start()
+
+    def _cpu_limits(self):
+        """ :return: The CPU limits a forked creature's loop is called with """
+        if self.cpu_limit is None:
+            return {}
+        # A whole life of decisions at the limit, and a second to start up in.
+        return {'cpu': self.cpu_limit, 'lifetime': self.cpu_limit * self.max_age + 1}
+
     def _new_life(self, starting_fuel=None):
         return lifecycle.Lifecycle(
             fuel=self.starting_fuel if starting_fuel is None else starting_fuel,
             max_fuel=self.max_fuel, max_age=self.max_age,
             reproduction_cost=self.reproduction_cost)
 
-    def spawn(self, gene, starting_fuel=None):
-        """ Forks a new creature process.
+    def spawn(self, gene, starting_fuel=None, cell=None):
+        """ Brings a new creature to life.
         :param gene: The Genome the creature will run
         :param starting_fuel: Fuel the creature begins with. None means the
             world default; a newborn instead starts with what its parent endowed
             it, which can be nothing.
+        :param cell: Where it lives, in a spatial world
         :return: The Creature, already added to the living population
         """
-        parent_end, child_end = socket.socketpair()
-        pid = os.fork()
-        if pid == 0:
-            parent_end.close()
-            _child_loop(child_end, gene.source)
-        child_end.close()
-        creature = Creature(pid, parent_end, gene, self._new_life(starting_fuel))
+        with self.timers.phase('launch'):
+            creature = self._launch(gene, self._new_life(starting_fuel))
+        self._settle(creature, cell)
         self.living.append(creature)
+        self.genotypes[gene.genotype] += 1
         if self.log is not None:
-            parent = gene.identity.rsplit('.', 1)[0] if '.' in gene.identity else None
-            self.log.birth(tick=self.ticks, identity=gene.identity,
-                           generation=gene.generation, parent=parent)
+            if self.lineage is not None:
+                parent = self.lineage.parent(gene.identity)
+            else:
+                parent = gene.identity.rsplit('.', 1)[0] if '.' in gene.identity else None
+            with self.timers.phase('log'):
+                self.log.birth(tick=self.ticks, identity=gene.identity,
+                               generation=gene.generation, parent=parent)
+        return creature
+
+    def _settle(self, creature, cell):
+        """ Puts a creature in its cell, if the world has cells. """
+        if cell is not None:
+            creature.cell = cell
+            self.world.place(cell)
+
+    def _senses(self, creature):
+        """ What a creature is shown of the world when it is asked: all the
+            food and everyone alive, or in a spatial world only what is in its
+            neighbourhood.
+        :return: (food_available, population)
+        """
+        if creature.cell is None:
+            return self.world.food, len(self.living)
+        return self.world.senses(creature.cell)
+
+    def _feed(self, creature, amount):
+        """ Takes the food a creature asked for from the whole pool, or in a
+            spatial world from its neighbourhood.
+        :return: Food actually given, between 0 and amount
+        """
+        if creature.cell is None:
+            return self.world.request(amount)
+        return self.world.request_near(amount, creature.cell)
+
+    def _launch(self, gene, life):
+        """ Forks the process a creature lives in.
+
+            The one place a creature's process is made, so that another way of
+            hosting creatures only has to replace this and _end().
+        :param gene: The Genome the creature will run
+        :param life: Its engine state
+        :return: The Creature, not yet among the living
+        """
+        parent_end, child_end = socket.socketpair()
+        creature = Creature(None, parent_end, gene, life)
+        if self._shm is not None:
+            self._shm.attach(creature)
+        if self._zygote is not None:
+            creature.pid = self._zygote.spawn(child_end, gene.source)
+        else:
+            keep = [child_end.fileno()]
+            if self._shm is not None:
+                keep += [creature.doorbell, creature.answer]
+            # The child closes everything else it inherited, parent_end and
+            # the other creatures' sockets among them; see forking.py.
+            creature.pid = forking.fork(*keep)
+            if creature.pid == 0:
+                if self._shm is not None:
+                    self._shm.child_loop(child_end, gene.source, creature,
+                                         **self._cpu_limits())
+                _child_loop(child_end, gene.source, **self._cpu_limits())
+        child_end.close()
+        if self.broadcast or self._shm is not None:
+            self._register(creature)
         return creature
 
     def start(self, founders, seed):
@@ -179,72 +422,330 @@ class Supervisor:  # pylint: disable=too-many-instance-attributes
         # differed in one founder out of twenty, so different runs produced
         # near-identical results.
         for index in range(founders):
+            identity = str(index) if self.lineage is None else self.lineage.founder(index)
             self.spawn(genome.Genome.founder(seed=genome.derive_seed(seed, index),
-                                             identity=str(index)))
+                                             identity=identity),
+                       cell=self.world.founder_cell(index, founders) if self.spatial else None)
+
+    def checkpoint(self):
+        """ Everything needed to carry the run on from the end of this tick in
+            a fresh supervisor, in a form json can write.
+
+            Each creature's birth count goes with it, since it seeds its next
+            child through derive_seed; without it a resumed run would breed
+            different children. Sources are stored once each, since most of a
+            population shares a handful.
+        :return: A dict for resume()
+        """
+        sources = {}
+        living = []
+        for creature in self.living:
+            gene = creature.gene
+            living.append({'source': sources.setdefault(gene.source, len(sources)),
+                           'seed': gene.seed, 'identity': gene.identity,
+                           'generation': gene.generation, 'births': creature.births,
+                           'life': {name: getattr(creature.life, name)
+                                    for name in _LIFE_STATE}})
+            if creature.cell is not None:
+                living[-1]['cell'] = creature.cell
+        return {'tick': self.ticks, 'world': self.world.state(),
+                'births': self.births, 'deaths': dict(self.deaths),
+                'cap_hits': self.cap_hits,
+                'sources': list(sources), 'living': living}
 
-    # Seven ways a creature can fail to answer usefully, each needing its own
-    # early exit. Collapsing them would only hide which one happened.
-    def ask(self, creature):  # pylint: disable=too-many-return-statements
-        """ Asks one creature for its decision, enforcing the timeout.
-        :param creature: The Creature to ask
-        :return: A decision dict, or None if it crashed, hung or went silent
+    def resume(self, state):
+        """ Brings a checkpointed population back to life, in place of start().
+
+            Nothing is logged: every creature's birth is already in the log.
+        :param state: A dict from checkpoint()
+        :return: None
+        """
+        self.ticks = state['tick']
+        self.world.restore(state['world'])
+        self.births = state['births']
+        self.deaths.update(state['deaths'])
+        self.cap_hits = state['cap_hits']
+        for record in state['living']:
+            gene = genome.Genome(state['sources'][record['source']], record['seed'],
+                                 record['identity'], record['generation'])
+            fields = dict(record['life'])
+            age = fields.pop('age')
+            life = lifecycle.Lifecycle(**fields)
+            life.age = age
+            creature = self._launch(gene, life)
+            creature.births = record['births']
+            self._settle(creature, record.get('cell'))
+            self.living.append(creature)
+            self.genotypes[gene.genotype] += 1
+
+    @staticmethod
+    def _request(creature, food_available, population):
+        """ :return: The encoded tick request for one creature """
+        return (json.dumps({'cmd': 'tick',
+                            'age': creature.life.age,
+                            'fuel': creature.life.fuel,
+                            'max_fuel': creature.life.max_fuel,
+                            'food_available': food_available,
+                            'population': population}) + '\n').encode('utf-8')
+
+    @staticmethod
+    def _decode(raw):
+        """ Turns a creature's reply into a decision.
+        :param raw: Bytes received, holding at least one full line
+        :return: A decision dict, 'timeout' if the creature ran out of CPU time,
+            or None if the reply was unusable or an error
         """
-        request = json.dumps({'cmd': 'tick',
-                              'age': creature.life.age,
-                              'fuel': creature.life.fuel,
-                              'max_fuel': creature.life.max_fuel,
-                              'food_available': self.world.food,
-                              'population': len(self.living)}) + '\n'
         try:
-            creature.channel.sendall(request.encode('utf-8'))
-        except OSError:
+            reply = json.loads(raw.decode('utf-8').splitlines()[0])
+        except (ValueError, IndexError):
+            return None
+        if not isinstance(reply, dict) or 'error' in reply:
             return None
+        if reply.get('timeout'):
+            return 'timeout'
+        return reply
+
+    def ask(self, creature):
+        """ Asks one creature for its decision, enforcing the timeout.
+        :param creature: The Creature to ask
+        :return: A decision dict, 'timeout' if it hung, or None if it crashed
+            or went silent
+        """
+        if self._shm is not None:
+            return self._gather([creature])[creature]
+        timers = self.timers
+        with timers.phase('encode'):
+            request = self._request(creature, *self._senses(creature))
+            sent = time.perf_counter()
+            try:
+                creature.channel.sendall(request)
+            except OSError:
+                return None
 
         # poll() rather than select(): select() is limited to FD_SETSIZE (1024)
         # file descriptors and raises "filedescriptor out of range" once the
         # population grows past it. Each living creature holds a socket, so that
         # ceiling is reachable in a normal run.
-        poller = select.poll()
-        poller.register(creature.channel, select.POLLIN)
-        if not poller.poll(self.timeout * 1000):
+        with timers.phase('wait'):
+            poller = select.poll()
+            poller.register(creature.channel, select.POLLIN)
+            ready = poller.poll(self.timeout * 1000)
+        if not ready:
             return 'timeout'
+        with timers.phase('decode'):
+            try:
+                raw = creature.channel.recv(65536)
+            except OSError:
+                return None
+            if not raw:
+                return None
+            decision = self._decode(raw)
+        timers.ask(time.perf_counter() - sent)
+        return decision
+
+    def _descriptors(self, creature):
+        """ :return: What to poll for a creature's reply: its socket, and with
+            the shm transport its answer doorbell """
+        if self._shm is None:
+            return [creature.channel.fileno()]
+        return [creature.channel.fileno(), creature.answer]
+
+    def _register(self, creature):
+        """ Adds a creature to the long-lived poll set. """
+        if self._poller is None:
+            self._poller = select.epoll() if hasattr(select, 'epoll') else select.poll()
+        for fd in self._descriptors(creature):
+            self._poller.register(fd, select.POLLIN)
+            self._by_fd[fd] = creature
+
+    def _unregister(self, creature):
+        """ Removes a creature from the poll set, if it is in it. """
+        for fd in self._descriptors(creature):
+            if self._by_fd.pop(fd, None) is not None:
+                try:
+                    self._poller.unregister(fd)
+                except (OSError, ValueError, KeyError):
+                    pass
+
+    def _wait(self, seconds):
+        """ :return: Descriptors ready within the given time """
+        # epoll takes seconds, poll milliseconds.
+        if hasattr(self._poller, 'close'):
+            return [fd for fd, _ in self._poller.poll(seconds)]
+        return [fd for fd, _ in self._poller.poll(seconds * 1000)]
+
+    def _gather(self, creatures):
+        """ Broadcasts a tick request to every creature, then gathers replies.
+
+            Every request is sent before any reply is read, and all of them
+            share one deadline, so the tick waits for the slowest creature
+            rather than for each in turn. Everyone is shown the world as it
+            stood at the start of the tick.
+        :param creatures: The creatures to ask
+        :return: dict mapping each creature to what ask() would have returned
+        """
+        replies = {}
+        buffers = {}
+        timers = self.timers
+        with timers.phase('encode'):
+            if self._shm is not None:
+                self._shm.publish(self.world.food, len(self.living))
+            for creature in creatures:
+                if self._send(creature):
+                    buffers[creature] = b''
+                else:
+                    replies[creature] = None
+        sent = time.perf_counter()
+
+        deadline = time.monotonic() + self.timeout
+        while buffers:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            with timers.phase('wait'):
+                ready = self._wait(remaining)
+            for fd in ready:
+                creature = self._by_fd.get(fd)
+                if creature not in buffers:
+                    continue
+                with timers.phase('decode'):
+                    reply = self._receive(creature, fd, buffers)
+                if reply is not _INCOMPLETE:
+                    replies[creature] = reply
+                    del buffers[creature]
+                    # From when the last request went out, so a creature asked
+                    # early is not charged for the sends after its own.
+                    timers.ask(time.perf_counter() - sent)
+
+        for creature in buffers:
+            replies[creature] = 'timeout'
+        return replies
+
+    def _send(self, creature):
+        """ Delivers one creature's tick request over the chosen transport.
+        :return: True if it was delivered
+        """
+        if self._shm is not None:
+            return self._shm.send(creature)
+        try:
+            creature.channel.sendall(self._request(creature, *self._senses(creature)))
+        except OSError:
+            return False
+        return True
+
+    def _receive(self, creature, fd, buffers):
+        """ Reads what a ready descriptor has for one creature.
+        :param fd: The descriptor that became ready
+        :param buffers: Partial replies read so far, by creature
+        :return: A decision dict, None if the creature crashed, or _INCOMPLETE
+            if more of the reply is still to come
+        """
+        if fd != creature.channel.fileno():
+            return self._shm.collect(creature)
         try:
             raw = creature.channel.recv(65536)
         except OSError:
-            return None
+            raw = b''
         if not raw:
             return None
-        try:
-            reply = json.loads(raw.decode('utf-8').splitlines()[0])
-        except (ValueError, IndexError):
-            return None
-        if 'error' in reply:
-            return None
-        return reply
+        # With the shm transport the only thing ever sent on the socket is a
+        # creature saying it ran out of CPU time, just before it exits.
+        if self._shm is not None:
+            return self._decode(raw)
+        buffers[creature] += raw
+        if b'\n' not in buffers[creature]:
+            return _INCOMPLETE
+        return self._decode(buffers[creature])
 
     def _kill(self, creature, cause):
-        """ Ends a creature: records the cause, kills the process, reaps it. """
+        """ Ends a creature: records the cause, then ends its process. """
         self.deaths[cause] += 1
+        if creature.cell is not None:
+            self.world.leave(creature.cell)
+        self.genotypes[creature.gene.genotype] -= 1
+        if not self.genotypes[creature.gene.genotype]:
+            del self.genotypes[creature.gene.genotype]
         if self.log is not None:
-            self.log.death(tick=self.ticks, identity=creature.gene.identity,
-                           cause=cause, age=creature.life.age,
-                           generation=creature.gene.generation)
+            with self.timers.phase('log'):
+                self.log.death(tick=self.ticks, identity=creature.gene.identity,
+                               cause=cause, age=creature.life.age,
+                               generation=creature.gene.generation,
+                               **self._usage(creature))
+        self._end(creature)
+
+    def _usage(self, creature):
+        """ What a creature's process cost over its life, read before it is
+            killed, or from the zombie it already is. Nothing reaps a creature
+            before _reap(), whoever forked it, so its pid is still its own.
+        :return: dict of cpu_seconds, or None if unreadable, and wall_seconds
+        """
+        return {'cpu_seconds': _cpu_seconds(creature.pid),
+                'wall_seconds': round(time.monotonic() - creature.born, 4)}
+
+    def _memory(self):
+        """ How much memory the living creatures' processes hold that they
+            share with no other process (see forking.uss_kb). One /proc read per
+            creature, so this is for a summary, not for every tick.
+        :return: dict of creatures measured and their mean and largest unique
+            set size in kilobytes, or None if none could be measured
+        """
+        sizes = [size for size in (forking.uss_kb(creature.pid) for creature in self.living)
+                 if size is not None]
+        if not sizes:
+            return None
+        return {'measured': len(sizes), 'mean_uss_kb': round(sum(sizes) / len(sizes), 1),
+                'max_uss_kb': max(sizes)}
+
+    def _end(self, creature):
+        """ Kills a creature's process. It is reaped later, by _reap(). """
+        if self._poller is not None:
+            self._unregister(creature)
         creature.close()
         try:
             os.kill(creature.pid, signal.SIGKILL)
         except ProcessLookupError:
             pass
-        try:
-            os.waitpid(creature.pid, 0)
-        except ChildProcessError:
-            pass
+        self._dying.append(creature)
+
+    def _reap(self, block=False):
+        """ Reaps every killed creature whose process has gone.
+
+            Waits on each dead creature's own pid rather than on any child, so
+            that the zygote and anything else this process has forked are left
+            alone. A creature the zygote forked is not ours to reap, so the
+            zygote is asked to reap it.
+        :param block: Wait for every one of them, rather than only taking those
+            already gone
+        :return: None
+        """
+        started = time.perf_counter()
+        if self._zygote is not None and self._dying:
+            gone = set(self._zygote.reap([creature.pid for creature in self._dying], block))
+        else:
+            gone = {creature.pid for creature in self._dying
+                    if forking.reap(creature.pid, block)}
+        remaining = []
+        for creature in self._dying:
+            if creature.pid not in gone:
+                remaining.append(creature)
+                continue
+            self.reaped += 1
+            # Only once the process is gone, so its slot cannot be written by a
+            # dying creature after being handed to a newborn.
+            if self._shm is not None:
+                self._shm.detach(creature)
+        self._dying = remaining
+        elapsed = time.perf_counter() - started
+        self.reap_seconds += elapsed
+        self.timers.add('reap', elapsed)
 
     def tick(self):
         """ Advances the world one tick.
 
-            Food regrows, then every creature is asked in turn what it wants.
-            Creatures are served in the order they are asked, so a creature can
-            go hungry because others reached the pool first.
+            Food regrows, then every creature is asked what it wants, in turn or
+            all at once in broadcast mode. Creatures are served in living-list
+            order either way, so a creature can go hungry because others reached
+            the pool first.
         :return: None
         """
         self.ticks += 1
@@ -252,8 +753,16 @@ class Supervisor:  # pylint: disable=too-many-instance-attributes
         newborns = []
         decisions = []
 
-        for creature in list(self.living):
-            decision = self.ask(creature)
+        creatures = list(self.living)
+        if self.broadcast:
+            replies = self._gather(creatures)
+            answers = ((creature, replies[creature]) for creature in creatures)
+        else:
+            # Lazily, so each creature is asked only after the one before it
+            # has eaten and sees the pool it left.
+            answers = ((creature, self.ask(creature)) for creature in creatures)
+
+        for creature, decision in answers:
             if decision == 'timeout':
                 self.living.remove(creature)
                 self._kill(creature, 'timeout')
@@ -264,25 +773,33 @@ class Supervisor:  # pylint: disable=too-many-instance-attributes
                 continue
 
             decisions.append(decision)
-            creature.life.eat(self.world.request(decision['eat']))
-            if decision['reproduce'] and creature.life.can_reproduce:
-                # Newborns are not spawned until the end of the tick, so they
-                # must be counted against the cap here or several births in one
-                # tick can each pass the check and collectively overshoot it.
-                newborns.append(self._breed(creature, decision['endowment'],
-                                            pending=len(newborns)))
-            creature.life.tick()
+            with self.timers.phase('world'):
+                creature.life.eat(self._feed(creature, decision['eat']))
+                if decision['reproduce'] and creature.life.can_reproduce:
+                    # Newborns are not spawned until the end of the tick, so
+                    # they must be counted against the cap here or several
+                    # births in one tick can each pass the check and
+                    # collectively overshoot it.
+                    newborns.append(self._breed(creature, decision['endowment'],
+                                                pending=len(newborns)))
+                creature.life.tick()
             if not creature.life.alive:
                 self.living.remove(creature)
                 self._kill(creature, creature.life.cause_of_death)
 
-        for gene, endowment in filter(None, newborns):
-            self.spawn(gene, starting_fuel=endowment)
+        # Before the newborns are forked, so the dead free their process slots
+        # for them.
+        self._reap()
+        for gene, endowment, cell in filter(None, newborns):
+            self.spawn(gene, starting_fuel=endowment, cell=cell)
 
         if self.log is not None:
-            self.log.snapshot(tick=self.ticks, population=len(self.living),
-                              food=self.world.food,
-                              strategy=self._strategy(decisions))
+            strategy = self._strategy(decisions)
+            with self.timers.phase('log'):
+                self.log.snapshot(tick=self.ticks, population=len(self.living),
+                                  food=self.world.food, strategy=strategy)
+        if self.lineage is not None:
+            self.lineage.flush()
 
     def _strategy(self, decisions):
         """ Summarises what the population wanted and what it is made of.
@@ -298,10 +815,11 @@ class Supervisor:  # pylint: disable=too-many-instance-attributes
         """
         if not decisions and not self.living:
             return None
+        ancestral = sum(count for genotype, count in self.genotypes.items()
+                        if genotype.is_ancestor)
         summary = {
             'genetic_divergence': (
-                sum(1 for c in self.living if c.gene.source != genome.ANCESTOR_SOURCE)
-                / len(self.living)) if self.living else 0.0,
+                (len(self.living) - ancestral) / len(self.living)) if self.living else 0.0,
         }
         if decisions:
             count = len(decisions)
@@ -322,8 +840,8 @@ class Supervisor:  # pylint: disable=too-many-instance-attributes
         :param creature: The parent
         :param endowment: Fuel the parent wants to give the child
         :param pending: Births already agreed this tick but not yet spawned
-        :return: (child Genome, fuel the child starts with), or None if the
-            birth failed or was capped
+        :return: (child Genome, fuel the child starts with, the cell it is born
+            in or None), or None if the birth failed or was capped
         """
         if len(self.living) + pending >= self.max_processes:
             self.cap_hits += 1
@@ -333,6 +851,10 @@ class Supervisor:  # pylint: disable=too-many-instance-attributes
             return None
         child = creature.gene.child(birth_index=creature.births,
                                     mutation_probability=self.mutation_probability)
+        # Ids are only handed to creatures that are born, so the table has no
+        # rows for failed births.
+        if child is not None and self.lineage is not None:
+            child.identity = self.lineage.child(creature.gene.identity, creature.births)
         creature.births += 1
         creature.life.pay_for_reproduction()
         if child is None:
@@ -344,7 +866,8 @@ class Supervisor:  # pylint: disable=too-many-instance-attributes
         affordable = max(0, min(endowment, creature.life.fuel))
         creature.life.fuel -= affordable
         self.births += 1
-        return child, affordable
+        cell = None if creature.cell is None else self.world.birthplace(creature.cell, child.seed)
+        return child, affordable, cell
 
     def shutdown(self):
         """ Kills and reaps every remaining creature. Safe to call twice.
@@ -356,18 +879,39 @@ class Supervisor:  # pylint: disable=too-many-instance-attributes
                 os.kill(creature.pid, signal.SIGKILL)
             except (ProcessLookupError, OSError):
                 pass
-        for creature in self.living:
-            try:
-                os.waitpid(creature.pid, 0)
-            except (ChildProcessError, OSError):
-                pass
+        # Every one has been sent SIGKILL before any is waited for, so they
+        # die together rather than one at a time.
+        self._dying.extend(self.living)
+        self._reap(block=True)
         self.living = []
+        self.genotypes.clear()
+        self._by_fd = {}
+        if self._poller is not None and hasattr(self._poller, 'close'):
+            self._poller.close()
+        self._poller = None
+        if self._zygote is not None:
+            self._zygote.close()
+        if self._shm is not None:
+            self._shm.close()
 
     def summary(self):
         """ :return: A dict describing how the run went """
-        return {'ticks': self.ticks, 'living': len(self.living),
-                'births': self.births, 'deaths': dict(self.deaths),
-                'cap_hits': self.cap_hits, 'food': self.world.food}
+        summary = {'ticks': self.ticks, 'living': len(self.living),
+                   'births': self.births, 'deaths': dict(self.deaths),
+                   'cap_hits': self.cap_hits, 'food': self.world.food,
+                   'genotypes': len(self.genotypes),
+                   'reaped': self.reaped, 'zombies': len(self._dying),
+                   'reap_seconds': round(self.reap_seconds, 4)}
+        if self._zygote is not None:
+            summary['spawn'] = self._zygote.metrics()
+        if self.timers:
+            summary['profile'] = self.timers.summary()
+        if self.spatial:
+            summary['occupied_cells'] = sum(1 for crowd in self.world.crowd if crowd)
+        memory = self._memory()
+        if memory is not None:
+            summary['memory'] = memory
+        return summary
 
 
 def main(arguments):
@@ -379,9 +923,17 @@ def main(arguments):
     parser.add_argument('--seed', type=int, default=1)
     parser.add_argument('--regrowth', type=int, default=400)
     parser.add_argument('--max-processes', type=int, default=DEFAULT_MAX_PROCESSES)
+    parser.add_argument('--broadcast', action='store_true',
+                        help='Ask every creature at once rather than in turn.')
+    parser.add_argument('--zygote', action='store_true',
+                        help='Fork creatures from a small fork server, not the supervisor.')
+    parser.add_argument('--transport', choices=('json', 'shm'), default='json',
+                        help='How requests and replies travel; json is the debug fallback.')
     args = parser.parse_args(arguments)
 
-    with Supervisor(regrowth=args.regrowth, max_processes=args.max_processes) as sup:
+    with Supervisor(regrowth=args.regrowth, max_processes=args.max_processes,
+                    broadcast=args.broadcast, zygote=args.zygote,
+                    transport=args.transport) as sup:
         sup.start(founders=args.founders, seed=args.seed)
         for tick in range(args.ticks):
             sup.tick()
@@ -0,0 +1,167 @@
+"""Tests for the ancestry index and the clade questions Replay answers with it.
+
+A small hand-drawn family tree pins down what each answer means. A recorded run
+then checks the index against the slow ways of getting the same answers: the
+lineage table's walks up the tree, and Replay.living_at().
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from creatures import ancestry, events, inprocess, lineage
+
+
+def birth(tick, identity, parent=None):
+    """A birth event, as the log records one."""
+    return {'kind': 'birth', 'tick': tick, 'identity': identity, 'parent': parent}
+
+
+def death(tick, identity):
+    """A death of old age, as the log records one."""
+    return {'kind': 'death', 'tick': tick, 'identity': identity, 'cause': 'old_age'}
+
+
+# Founders 0 and 1. 0 has children 0.0 and 0.1; 0.0 has 0.0.0. 1 has 1.0.
+FAMILY = [birth(0, '0'), birth(0, '1'),
+          birth(1, '0.0', '0'), birth(1, '1.0', '1'),
+          {'kind': 'snapshot', 'tick': 1, 'population': 4, 'food': 0},
+          birth(2, '0.1', '0'), death(2, '1'),
+          birth(3, '0.0.0', '0.0'), death(3, '1.0'), death(3, '0')]
+
+
+class TestFamilyTree(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ancestry.AncestryIndex(FAMILY)
+
+    def test_every_birth_is_indexed(self):
+        self.assertEqual(6, len(self.index))
+        self.assertIn('0.0.0', self.index)
+        self.assertEqual(['0', '1'], self.index.founders())
+
+    def test_parents_and_founders(self):
+        self.assertEqual('0.0', self.index.parent('0.0.0'))
+        self.assertIsNone(self.index.parent('1'))
+        self.assertEqual('0', self.index.founder_of('0.0.0'))
+        self.assertEqual('1', self.index.founder_of('1'))
+
+    def test_ancestry_is_answered_by_the_tour(self):
+        self.assertTrue(self.index.is_ancestor('0', '0.0.0'))
+        self.assertTrue(self.index.is_ancestor('0.0', '0.0.0'))
+        self.assertTrue(self.index.is_ancestor('0.1', '0.1'))
+        self.assertFalse(self.index.is_ancestor('0.1', '0.0.0'))
+        self.assertFalse(self.index.is_ancestor('0.0.0', '0'))
+        self.assertFalse(self.index.is_ancestor('1', '0.0'))
+
+    def test_clades_are_counted(self):
+        self.assertEqual(4, self.index.clade_size('0'))
+        self.assertEqual(2, self.index.clade_size('0.0'))
+        self.assertEqual(1, self.index.clade_size('1.0'))
+
+    def test_most_recent_common_ancestors(self):
+        self.assertEqual('0', self.index.common_ancestor(['0.0.0', '0.1']))
+        self.assertEqual('0.0', self.index.common_ancestor(['0.0.0', '0.0']))
+        self.assertEqual('0.1', self.index.common_ancestor(['0.1']))
+        self.assertIsNone(self.index.common_ancestor(['0.1', '1.0']))
+        self.assertIsNone(self.index.common_ancestor([]))
+
+    def test_lineage_sizes_over_time(self):
+        self.assertEqual({'0': 2, '1': 2}, self.index.founder_counts(1))
+        self.assertEqual({'0': 3, '1': 1}, self.index.founder_counts(2))
+        self.assertEqual({'0': 3}, self.index.founder_counts(3))
+        self.assertEqual(('0', 3), self.index.dominant_lineage(3))
+        self.assertIsNone(self.index.dominant_lineage(-1))
+
+    def test_a_tie_goes_to_the_founder_born_first(self):
+        self.assertEqual(('0', 2), self.index.dominant_lineage(1))
+
+    def test_births_over_time(self):
+        self.assertEqual([(0, 1), (1, 2), (2, 3), (3, 4)],
+                         self.index.births_over_time('0'))
+        self.assertEqual([(0, 1), (1, 2)], self.index.births_over_time('1'))
+        with self.assertRaises(KeyError):
+            self.index.births_over_time('0.0')
+
+    def test_a_creature_never_born_is_a_key_error(self):
+        with self.assertRaises(KeyError):
+            self.index.is_ancestor('7', '0')
+
+    def test_an_orphan_is_taken_as_a_founder(self):
+        index = ancestry.AncestryIndex([birth(5, '3.2', '3'), birth(6, '3.2.0', '3.2')])
+        self.assertEqual(['3.2'], index.founders())
+        self.assertTrue(index.is_ancestor('3.2', '3.2.0'))
+
+
+class TestRecordedRun(unittest.TestCase):
+    """Everything the index says about a real run, said the slow way too."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.root = tempfile.mkdtemp(prefix='mutate-ancestry-')
+        path = os.path.join(cls.root, 'events.jsonl')
+        with lineage.LineageTable(os.path.join(cls.root, lineage.LINEAGE_FILE)) as table, \
+                events.EventLog(path) as log, inprocess.InProcessSupervisor(
+                    regrowth=400, max_processes=120, log=log, lineage=table) as sup:
+            sup.start(founders=6, seed=11)
+            for _ in range(40):
+                sup.tick()
+        cls.replay = events.Replay(path)
+        cls.table = cls.replay.lineage
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.root, ignore_errors=True)
+
+    def test_ancestry_agrees_with_the_lineage_table(self):
+        index = self.replay.ancestry
+        self.assertEqual(len(self.table), len(index))
+        identities = index.identities[::7]
+        for identity in identities:
+            self.assertEqual(self.table.founder_of(identity), index.founder_of(identity))
+            for other in identities[::5]:
+                self.assertEqual(self.table.is_ancestor(other, identity),
+                                 index.is_ancestor(other, identity))
+                self.assertEqual(self.table.common_ancestor(other, identity),
+                                 index.common_ancestor([other, identity]))
+
+    def test_lineage_sizes_agree_with_the_living(self):
+        for tick in self.replay.ticks:
+            living = self.replay.living_at(tick)
+            expected = {}
+            for identity in living:
+                founder = self.table.founder_of(identity)
+                expected[founder] = expected.get(founder, 0) + 1
+            self.assertEqual(expected, self.replay.ancestry.founder_counts(tick))
+
+    def test_the_survivors_common_ancestor(self):
+        survivors = self.replay.living_at(self.replay.ticks[-1])
+        self.assertTrue(survivors)
+        expected = None
+        founders = {self.table.founder_of(identity) for identity in survivors}
+        if len(founders) == 1:
+            expected = next(iter(survivors))
+            for identity in survivors:
+                expected = self.table.common_ancestor(expected, identity)
+        self.assertEqual(expected, self.replay.common_ancestor())
+
+    def test_the_dominant_lineages_common_ancestor(self):
+        last = self.replay.ticks[-1]
+        founder, count = self.replay.ancestry.dominant_lineage(last)
+        clade = [identity for identity in self.replay.living_at(last)
+                 if self.table.founder_of(identity) == founder]
+        self.assertEqual(count, len(clade))
+        expected = clade[0]
+        for identity in clade:
+            expected = self.table.common_ancestor(expected, identity)
+        self.assertEqual(expected, self.replay.common_ancestor(clade))
+
+    def test_lineage_births_add_up_to_every_birth(self):
+        self.assertEqual(self.replay.births, sum(
+            self.replay.ancestry.births_over_time(founder)[-1][1]
+            for founder in self.replay.ancestry.founders()))
+
+
+if __name__ == '__main__':
+    unittest.main()
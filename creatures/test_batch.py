@@ -0,0 +1,142 @@
+"""Tests for the batch runner.
+
+What matters is that a batch never holds more processes than its budget, that
+every run still lands in its own directory, and that the table tells the runs
+apart.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from creatures import batch, supervisor
+
+
+class FakeProcess:  # pylint: disable=too-few-public-methods
+    """Stands in for a Popen that finishes after being polled a few times."""
+
+    def __init__(self, polls, status=0):
+        self.polls = polls
+        self.status = status
+
+    def poll(self):
+        """Counts down, and finishes with the status once the count is spent."""
+        self.polls -= 1
+        return self.status if self.polls < 0 else None
+
+
+class TestParsing(unittest.TestCase):
+
+    def test_seed_lists_and_ranges(self):
+        self.assertEqual([1, 2, 3, 7, 10, 11], batch.parse_seeds('1-3,7,10-11'))
+
+    def test_a_grid_names_run_options(self):
+        self.assertEqual([('regrowth', ['200', '400']), ('max-processes', ['50'])],
+                         batch.parse_grid(['regrowth=200,400', 'max_processes=50']))
+        with self.assertRaises(ValueError):
+            batch.parse_grid(['regrowth'])
+
+    def test_every_seed_runs_under_every_combination(self):
+        jobs = batch.plan([1, 2], batch.parse_grid(['regrowth=200,400', 'founders=5,9']),
+                          results_root='/results')
+        self.assertEqual(8, len(jobs))
+        self.assertEqual(8, len({job.directory for job in jobs}))
+        self.assertEqual('/results/regrowth-200_founders-9/seed-2', jobs[3].directory)
+
+    def test_runs_are_charged_what_they_can_hold(self):
+        self.assertEqual(supervisor.DEFAULT_MAX_PROCESSES + 1,
+                         batch.processes_needed([]))
+        self.assertEqual(52, batch.processes_needed(['--max-processes', '50', '--zygote']))
+        self.assertEqual(1, batch.processes_needed(['--backend', 'inprocess']))
+        self.assertEqual(4, batch.processes_needed(['--backend', 'pool', '--workers', '3']))
+
+    def test_a_command_line_run_py_would_refuse_is_an_error(self):
+        for arguments in (['--no-such-option', '3'], ['--regrowth', 'lots'],
+                          ['--backend', 'nowhere']):
+            with self.subTest(arguments=arguments), self.assertRaises(ValueError):
+                batch.processes_needed(arguments)
+
+
+class TestScheduling(unittest.TestCase):
+
+    @staticmethod
+    def jobs(*sizes):
+        """:return: Jobs charged the given process counts, seeded 0, 1, ..."""
+        return [batch.Job(seed, [], [], size) for seed, size in enumerate(sizes)]
+
+    def test_the_budget_is_never_exceeded(self):
+        jobs = self.jobs(30, 30, 30, 30, 30, 10)
+        charged = []
+
+        def launch(job):
+            charged.append(job)
+            return FakeProcess(polls=3)
+
+        statuses, peak = batch.run_batch(jobs, budget=70, cores=8, launch=launch)
+        self.assertEqual(dict.fromkeys(jobs, 0), statuses)
+        self.assertLessEqual(peak, 70)
+        # The small job did not wait behind the big ones that could not fit.
+        self.assertLess(charged.index(jobs[5]), charged.index(jobs[2]))
+
+    def test_runs_per_core_bounds_how_many_run(self):
+        running = []
+        most = []
+
+        class Tracked(FakeProcess):  # pylint: disable=too-few-public-methods
+            """A FakeProcess that notes how many are running each time it is polled."""
+
+            def poll(self):
+                most.append(len(running))
+                status = super().poll()
+                if status is not None and self in running:
+                    running.remove(self)
+                return status
+
+        def launch(_):
+            process = Tracked(polls=2)
+            running.append(process)
+            return process
+
+        batch.run_batch(self.jobs(*[1] * 9), budget=100, cores=1, launch=launch)
+        self.assertEqual(batch.RUNS_PER_CORE, max(most))
+
+    def test_a_job_bigger_than_the_budget_is_refused(self):
+        with self.assertRaises(ValueError):
+            batch.run_batch(self.jobs(10, 200), budget=100, launch=None)
+
+    def test_failures_are_reported(self):
+        statuses, _ = batch.run_batch(self.jobs(1, 1), budget=10,
+                                      launch=lambda job: FakeProcess(1, job.seed))
+        self.assertEqual([0, 1], sorted(statuses.values()))
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='mutate-batch-')
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def test_a_batch_writes_every_run_and_one_table(self):
+        with redirect_stdout(io.StringIO()):
+            status = batch.main(['--seeds', '1-2', '--ticks', '3', '--grid', 'regrowth=200,400',
+                                 '--results-root', self.root, '--',
+                                 '--backend', 'inprocess', '--founders', '3'])
+        self.assertEqual(0, status)
+        for name in ('regrowth-200', 'regrowth-400'):
+            for seed in (1, 2):
+                with self.subTest(name=name, seed=seed):
+                    directory = os.path.join(self.root, name, f'seed-{seed}')
+                    self.assertTrue(os.path.isfile(os.path.join(directory, 'manifest.json')))
+                    self.assertFalse(os.path.exists(directory + '.log'))
+        with open(os.path.join(self.root, 'batch.tsv'), encoding='utf-8') as handle:
+            lines = handle.read().splitlines()
+        self.assertEqual(list(batch.COLUMNS), lines[0].split('\t'))
+        self.assertEqual(4, len(lines) - 1)
+        self.assertTrue(all('\tok\t3\t' in line for line in lines[1:]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""Tests for the columnar event-log format.
+
+The format exists to make logs smaller and faster to read. What it must never
+do is change them: a log converted to columnar and back has to be the log it
+started as, and Replay has to tell the same story from either.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from creatures import columnar, events
+
+
+class ColumnarTestCase(unittest.TestCase):
+    """Every test writes into a throwaway directory."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='mutate-columnar-')
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.jsonl = os.path.join(self.root, 'events.jsonl')
+        self.binary = os.path.join(self.root, 'events.col')
+
+    def write_run(self, ticks=30):
+        """Writes a run using every kind of event EventLog has."""
+        with events.EventLog(self.jsonl) as log:
+            log.birth(tick=0, identity='0', generation=1, parent=None)
+            for tick in range(1, ticks):
+                log.birth(tick=tick, identity=f'0.{tick}', generation=2, parent='0')
+                log.birth_failed(tick=tick, parent='0', reason='unparseable')
+                if tick > 2:
+                    log.death(tick=tick, identity=f'0.{tick - 2}', cause='starvation',
+                              age=2, generation=2)
+                log.snapshot(tick=tick, population=3, food=100 - tick,
+                             strategy={'mean_eat': tick / 7, 'breed_rate': 0.5,
+                                       'genetic_divergence': 0.0} if tick % 4 else None)
+
+    def contents(self, path):
+        """:return: The bytes of a file."""
+        with open(path, 'rb') as handle:
+            return handle.read()
+
+
+class TestRoundTrip(ColumnarTestCase):
+
+    def test_converting_there_and_back_is_byte_identical(self):
+        self.write_run()
+        back = os.path.join(self.root, 'back.jsonl')
+        for codec in sorted(columnar.CODECS):
+            with self.subTest(codec=codec):
+                columnar.convert(self.jsonl, self.binary, codec=codec, block_records=7)
+                self.assertTrue(columnar.is_columnar(self.binary))
+                columnar.convert(self.binary, back)
+                self.assertEqual(self.contents(self.jsonl), self.contents(back))
+
+    def test_records_that_do_not_fit_their_columns_are_kept_whole(self):
+        odd = [{'kind': 'birth', 'tick': 1, 'identity': '0', 'generation': 1,
+                'parent': None, 'note': 'an extra field'},
+               {'kind': 'snapshot', 'tick': True, 'population': 1, 'food': 1,
+                'strategy': None},
+               {'kind': 'death', 'tick': 2, 'identity': '0', 'cause': 'crashed',
+                'age': 1 << 70, 'generation': 1},
+               {'kind': 'death', 'tick': 2, 'identity': '1', 'cause': 'crashed',
+                'age': 1, 'generation': 1, 'wall_seconds': 2},
+               {'kind': 'comet', 'tick': 3},
+               {'kind': 'birth_failed', 'tick': 3, 'parent': '\ud800', 'reason': 'capped'}]
+        with columnar.ColumnarWriter(self.binary) as writer:
+            for record in odd:
+                writer.write(record)
+        self.assertEqual(odd, events.read(self.binary))
+
+    def test_integer_identities_fit_their_columns(self):
+        numbered = [{'kind': 'birth', 'tick': 0, 'identity': 7, 'generation': 1,
+                     'parent': None},
+                    {'kind': 'birth', 'tick': 1, 'identity': 8, 'generation': 2,
+                     'parent': 7},
+                    {'kind': 'death', 'tick': 2, 'identity': 8, 'cause': 'crashed',
+                     'age': 1, 'generation': 2},
+                    {'kind': 'birth_failed', 'tick': 2, 'parent': 7, 'reason': 'capped'}]
+        payload = columnar.encode_block(numbered)
+        self.assertNotIn(b'identity', payload)
+        self.assertEqual(numbered, columnar.decode_block(payload))
+
+    def test_timed_deaths_fit_their_columns(self):
+        with events.EventLog(self.jsonl) as log:
+            log.death(tick=3, identity=4, cause='old_age', age=3, generation=2,
+                      cpu_seconds=0.0123, wall_seconds=1.5)
+            log.death(tick=4, identity=5, cause='crashed', age=1, generation=2,
+                      wall_seconds=0.25)
+            log.death(tick=4, identity=6, cause='starvation', age=2, generation=2)
+        timed = events.read(self.jsonl)
+        payload = columnar.encode_block(timed)
+        self.assertNotIn(b'seconds', payload)
+        self.assertEqual(timed, columnar.decode_block(payload))
+        back = os.path.join(self.root, 'back.jsonl')
+        columnar.convert(self.jsonl, self.binary)
+        columnar.convert(self.binary, back)
+        self.assertEqual(self.contents(self.jsonl), self.contents(back))
+
+    def test_the_binary_form_is_much_smaller(self):
+        self.write_run(ticks=300)
+        columnar.convert(self.jsonl, self.binary)
+        self.assertLess(os.path.getsize(self.binary), os.path.getsize(self.jsonl) / 5)
+
+    def test_an_unknown_codec_is_rejected(self):
+        with self.assertRaises(ValueError):
+            columnar.ColumnarWriter(self.binary, codec='zip')
+
+
+class TestReplayingColumnarLogs(ColumnarTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write_run()
+        columnar.convert(self.jsonl, self.binary, block_records=5)
+
+    def test_replay_tells_the_same_story_from_either_format(self):
+        text = events.Replay(self.jsonl, checkpoint_every=4)
+        binary = events.Replay(self.binary, checkpoint_every=4)
+        self.assertIsInstance(binary.source, columnar.ColumnarSource)
+        for name in ('population_over_time', 'food_over_time', 'strategy_over_time',
+                     'births', 'failed_births', 'deaths', 'deepest_generation',
+                     'events'):
+            with self.subTest(name=name):
+                self.assertEqual(getattr(text, name), getattr(binary, name))
+        for tick in range(31):
+            with self.subTest(tick=tick):
+                self.assertEqual(text.living_at(tick), binary.living_at(tick))
+                self.assertEqual(text.events_at(tick), binary.events_at(tick))
+        self.assertEqual(list(text.frames(5, 25)), list(binary.frames(5, 25)))
+
+    def test_a_sidecar_index_works_for_a_columnar_log(self):
+        first = events.Replay(self.binary, sidecar=True)
+        second = events.Replay(self.binary, sidecar=True)
+        self.assertEqual(first.living_at(17), second.living_at(17))
+
+    def test_a_truncated_last_block_is_ignored(self):
+        whole = events.read(self.binary)
+        with open(self.binary, 'r+b') as handle:
+            handle.truncate(os.path.getsize(self.binary) - 3)
+        partial = events.read(self.binary)
+        self.assertLess(len(partial), len(whole))
+        self.assertEqual(whole[:len(partial)], partial)
+
+    def test_a_missing_log_reads_as_empty(self):
+        self.assertEqual([], list(columnar.ColumnarSource(
+            os.path.join(self.root, 'nope.col')).scan()))
+
+
+if __name__ == '__main__':
+    unittest.main()
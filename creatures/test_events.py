@@ -15,6 +15,7 @@ import json
 import os
 import shutil
 import tempfile
+import time
 import unittest
 
 from creatures import events
@@ -95,6 +96,69 @@ class TestWriting(EventTestCase):
         self.assertIsNone(events.read(self.path)[0].get('strategy'))
 
 
+class TestFlushPolicies(EventTestCase):
+    """The log buffers, and a policy decides when what it holds reaches disk."""
+
+    def on_disk(self):
+        """:return: How many records are in the file right now."""
+        return len(events.read(self.path))
+
+    def test_by_default_every_record_is_flushed_at_once(self):
+        with events.EventLog(self.path) as log:
+            log.birth(tick=1, identity='0', generation=1, parent=None)
+            self.assertEqual(1, self.on_disk())
+
+    def test_every_n_records(self):
+        with events.EventLog(self.path, every=3) as log:
+            for tick in range(2):
+                log.snapshot(tick=tick, population=1, food=1)
+            self.assertEqual(0, self.on_disk())
+            log.snapshot(tick=2, population=1, food=1)
+            self.assertEqual(3, self.on_disk())
+
+    def test_at_tick_boundaries(self):
+        with events.EventLog(self.path, every=None, at_ticks=True) as log:
+            log.birth(tick=1, identity='0', generation=1, parent=None)
+            log.death(tick=1, identity='0', cause='crashed', age=1, generation=1)
+            self.assertEqual(0, self.on_disk())
+            log.snapshot(tick=1, population=0, food=1)
+            self.assertEqual(3, self.on_disk())
+
+    def test_every_t_seconds(self):
+        with events.EventLog(self.path, every=None, seconds=0.05) as log:
+            log.birth(tick=1, identity='0', generation=1, parent=None)
+            self.assertEqual(0, self.on_disk())
+            time.sleep(0.1)
+            log.birth(tick=1, identity='1', generation=1, parent=None)
+            self.assertEqual(2, self.on_disk())
+
+    def test_closing_flushes_whatever_is_buffered(self):
+        with events.EventLog(self.path, every=None, fsync=True) as log:
+            for tick in range(4):
+                log.snapshot(tick=tick, population=1, food=1)
+        self.assertEqual(4, self.on_disk())
+
+    def test_buffering_does_not_change_what_is_written(self):
+        paths = [self.path, os.path.join(self.root, 'buffered.jsonl')]
+        for path, policy in zip(paths, ({}, {'every': 10, 'at_ticks': True})):
+            with events.EventLog(path, **policy) as log:
+                log.birth(tick=0, identity='0', generation=1, parent=None)
+                log.snapshot(tick=0, population=1, food=5,
+                             strategy={'mean_eat': 1.0, 'breed_rate': 0.0})
+        with open(paths[0], 'rb') as first, open(paths[1], 'rb') as second:
+            self.assertEqual(first.read(), second.read())
+
+    def test_stats_report_bytes_and_flush_latency(self):
+        with events.EventLog(self.path, every=2) as log:
+            for tick in range(5):
+                log.snapshot(tick=tick, population=1, food=1)
+        stats = log.stats()
+        self.assertEqual(5, stats['records'])
+        self.assertEqual(3, stats['flushes'])
+        self.assertEqual(os.path.getsize(self.path), stats['bytes_written'])
+        self.assertGreaterEqual(stats['max_flush_ms'], stats['mean_flush_ms'])
+
+
 class TestReplay(EventTestCase):
     """Reconstructing a run from its log, with no processes involved."""
 
@@ -178,6 +242,96 @@ class TestReplay(EventTestCase):
         self.assertAlmostEqual(0.0, drift['breed_rate'])
 
 
+class TestIndexedReplay(EventTestCase):
+    """Replay indexes the log in one pass, so nothing has to be rescanned and
+    a large log never has to fit in memory."""
+
+    def write_long_run(self, ticks=50):
+        """Writes a run in which two creatures are born and one dies each tick."""
+        with events.EventLog(self.path, every=None) as log:
+            for tick in range(ticks):
+                for offset in (0, 1):
+                    log.birth(tick=tick, identity=f'{tick}.{offset}', generation=1,
+                              parent=None)
+                if tick % 3 == 0:
+                    log.death(tick=tick, identity=f'{tick // 2}.1', cause='crashed',
+                              age=1, generation=1)
+                log.snapshot(tick=tick, population=tick, food=100 - tick)
+
+    def naive_living_at(self, tick):
+        """The unindexed answer, replaying from the start."""
+        living = set()
+        for event in events.read(self.path):
+            if event['tick'] > tick:
+                break
+            if event['kind'] == 'birth':
+                living.add(event['identity'])
+            elif event['kind'] == 'death':
+                living.discard(event['identity'])
+        return living
+
+    def test_living_at_agrees_with_a_full_replay_at_every_tick(self):
+        self.write_long_run()
+        replay = events.Replay(self.path, checkpoint_every=7)
+        for tick in range(-1, 52):
+            with self.subTest(tick=tick):
+                self.assertEqual(self.naive_living_at(tick), replay.living_at(tick))
+
+    def test_frames_are_every_ticks_living_set_in_order(self):
+        self.write_long_run()
+        replay = events.Replay(self.path, checkpoint_every=7)
+        frames = list(replay.frames(10, 20))
+        self.assertEqual(list(range(10, 21)), [tick for tick, _ in frames])
+        for tick, living in frames:
+            self.assertEqual(self.naive_living_at(tick), living)
+
+    def test_frames_default_to_the_whole_log(self):
+        self.write_long_run(ticks=5)
+        self.assertEqual(5, len(list(events.Replay(self.path).frames())))
+
+    def test_a_tick_can_be_looked_up_directly(self):
+        self.write_long_run()
+        replay = events.Replay(self.path)
+        self.assertEqual({'population': 30, 'food': 70, 'strategy': None},
+                         replay.snapshot_at(30))
+        self.assertIsNone(replay.snapshot_at(500))
+        self.assertEqual(['birth', 'birth', 'death', 'snapshot'],
+                         [e['kind'] for e in replay.events_at(30)])
+        self.assertEqual([], replay.events_at(500))
+
+    def test_events_are_only_loaded_when_asked_for(self):
+        self.write_long_run(ticks=3)
+        replay = events.Replay(self.path)
+        self.assertNotIn('events', vars(replay))
+        self.assertEqual(events.read(self.path), replay.events)
+
+    def test_the_sidecar_index_is_reused_while_the_log_is_unchanged(self):
+        self.write_long_run()
+        events.Replay(self.path, sidecar=True)
+        self.assertTrue(os.path.isfile(self.path + events.INDEX_SUFFIX))
+
+        class Unreadable(events.JsonLinesSource):
+            """A source that fails the test if it is read in full."""
+            def scan(self, position=0):
+                if position == 0:
+                    raise AssertionError('the log was rescanned')
+                return super().scan(position)
+
+        replay = events.Replay(self.path, sidecar=True,
+                               source=Unreadable(self.path))
+        self.assertEqual(list(range(50)), replay.population_over_time)
+
+    def test_a_stale_sidecar_is_rebuilt(self):
+        self.write_long_run(ticks=3)
+        events.Replay(self.path, sidecar=True)
+        with events.EventLog(self.path) as log:
+            log.snapshot(tick=3, population=9, food=1)
+        replay = events.Replay(self.path, sidecar=True)
+        self.assertEqual([0, 1, 2, 9], replay.population_over_time)
+        self.assertEqual([0, 1, 2, 9], events.Replay(self.path, sidecar=True)
+                         .population_over_time)
+
+
 class TestManifest(EventTestCase):
 
     def test_records_everything_needed_to_rerun(self):
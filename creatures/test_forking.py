@@ -0,0 +1,94 @@
+"""Tests for forking creatures so they keep sharing their parent's memory."""
+
+import gc
+import json
+import os
+import tempfile
+import unittest
+
+from creatures import forking, inprocess, supervisor
+
+
+class TestFork(unittest.TestCase):
+
+    def fork_and_report(self, *extra_keep):
+        """Forks a child that reports its open descriptors and collector state.
+        :return: What the child reported, as a dict
+        """
+        reader, writer = os.pipe()
+        pid = forking.fork(writer, *extra_keep)
+        if pid == 0:
+            report = {'fds': sorted(int(fd) for fd in os.listdir('/proc/self/fd')),
+                      'gc': gc.isenabled()}
+            os.write(writer, json.dumps(report).encode('utf-8'))
+            os._exit(0)  # pylint: disable=protected-access
+        os.close(writer)
+        with os.fdopen(reader, 'rb') as handle:
+            report = json.loads(handle.read())
+        os.waitpid(pid, 0)
+        report['writer'] = writer
+        return report
+
+    def test_the_child_keeps_only_what_it_was_told_to(self):
+        with tempfile.TemporaryFile() as kept, tempfile.TemporaryFile() as dropped:
+            report = self.fork_and_report(kept.fileno())
+            self.assertIn(kept.fileno(), report['fds'])
+            self.assertNotIn(dropped.fileno(), report['fds'])
+        self.assertIn(report['writer'], report['fds'])
+        # The last is the descriptor listdir itself opened on /proc/self/fd.
+        self.assertEqual(5, len(report['fds']) - 1)
+
+    def test_the_child_runs_without_a_collector(self):
+        self.assertFalse(self.fork_and_report()['gc'])
+        self.assertTrue(gc.isenabled())
+
+    def test_the_parent_is_thawed_after_forking(self):
+        self.fork_and_report()
+        self.assertEqual(0, gc.get_freeze_count())
+
+
+class TestUss(unittest.TestCase):
+
+    def test_a_live_process_holds_some_memory_of_its_own(self):
+        self.assertGreater(forking.uss_kb(os.getpid()), 0)
+
+    def test_a_missing_process_has_none(self):
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0)  # pylint: disable=protected-access
+        os.waitpid(pid, 0)
+        self.assertIsNone(forking.uss_kb(pid))
+
+
+class TestCreatures(unittest.TestCase):
+
+    def test_a_creature_holds_none_of_its_siblings_sockets(self):
+        with supervisor.Supervisor(regrowth=400) as sup:
+            sup.start(founders=4, seed=1)
+            creature = sup.living[-1]
+            # Once it has answered a tick it is past closing what it inherited.
+            sup.tick()
+            self.assertIn(creature, sup.living)
+            fds = {int(fd) for fd in os.listdir(f'/proc/{creature.pid}/fd')}
+            # Standard input, output and error, and its own socket.
+            self.assertEqual({0, 1, 2}, {fd for fd in fds if fd < 3})
+            self.assertEqual(4, len(fds))
+
+    def test_the_summary_measures_every_creature(self):
+        for zygote in (False, True):
+            with self.subTest(zygote=zygote):
+                with supervisor.Supervisor(regrowth=400, zygote=zygote) as sup:
+                    sup.start(founders=4, seed=1)
+                    sup.tick()
+                    memory = sup.summary()['memory']
+                    self.assertEqual(len(sup.living), memory['measured'])
+                    self.assertGreaterEqual(memory['max_uss_kb'], memory['mean_uss_kb'])
+
+    def test_one_process_has_nothing_to_measure(self):
+        with inprocess.InProcessSupervisor(regrowth=400) as sup:
+            sup.start(founders=4, seed=1)
+            self.assertNotIn('memory', sup.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
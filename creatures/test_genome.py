@@ -18,6 +18,7 @@ reproducible.
 """
 
 import ast
+import gc
 import unittest
 
 from creatures import genome
@@ -134,6 +135,99 @@ class TestDecisionNormalising(unittest.TestCase):
             genome.decide('x = 1\n', **self.ARGS)
 
 
+class TestActCache(unittest.TestCase):
+    """decide() is the innermost call of every tick, so a genome is loaded once
+    per process rather than once per decision."""
+
+    SIG = 'def act(age, fuel, max_fuel, food_available, population):'
+
+    def test_a_genome_is_loaded_once(self):
+        cache = genome.ActCache()
+        first = cache.load(genome.ANCESTOR_SOURCE)
+        second = cache.load(genome.ANCESTOR_SOURCE)
+        self.assertIs(first, second)
+        self.assertEqual({'hits': 1, 'misses': 1, 'evictions': 0, 'entries': 1},
+                         cache.stats())
+
+    def test_identical_text_shares_an_entry(self):
+        """Keyed by content, not by which string object carried it."""
+        cache = genome.ActCache()
+        cache.load(genome.ANCESTOR_SOURCE)
+        cache.load(''.join(list(genome.ANCESTOR_SOURCE)))
+        self.assertEqual(1, cache.hits)
+
+    def test_the_cache_is_bounded(self):
+        cache = genome.ActCache(size=2)
+        for value in range(3):
+            cache.load(f'{self.SIG}\n    return {{"eat": {value}}}\n')
+        self.assertEqual(1, cache.evictions)
+        self.assertEqual(2, cache.stats()['entries'])
+
+    def test_the_least_recently_used_genome_is_evicted(self):
+        cache = genome.ActCache(size=2)
+        sources = [f'{self.SIG}\n    return {{"eat": {value}}}\n' for value in range(3)]
+        cache.load(sources[0])
+        cache.load(sources[1])
+        cache.load(sources[0])
+        cache.load(sources[2])
+        cache.load(sources[0])
+        self.assertEqual(2, cache.hits)
+
+    def test_a_broken_genome_is_remembered_as_broken(self):
+        cache = genome.ActCache()
+        for _ in range(2):
+            with self.assertRaises(genome.MisbehavingCreatureError):
+                cache.load('x = 1\n')
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(1, cache.hits)
+
+    def test_decide_goes_through_the_process_cache(self):
+        before = genome.ACT_CACHE.stats()
+        for _ in range(3):
+            genome.decide(genome.ANCESTOR_SOURCE, age=1, fuel=5, max_fuel=20,
+                          food_available=100, population=10)
+        after = genome.ACT_CACHE.stats()
+        self.assertGreaterEqual(after['hits'] - before['hits'], 2)
+
+
+class TestGenomeStore(unittest.TestCase):
+    """Each distinct source is held once, however many creatures carry it."""
+
+    def test_the_same_text_is_one_genotype(self):
+        store = genome.GenomeStore()
+        first = store.intern(genome.ANCESTOR_SOURCE)
+        again = store.intern(''.join(list(genome.ANCESTOR_SOURCE)))
+        self.assertIs(first, again)
+        self.assertEqual(1, len(store))
+
+    def test_distinct_texts_get_distinct_ids(self):
+        store = genome.GenomeStore()
+        held = [store.intern(genome.mutate_source(genome.ANCESTOR_SOURCE, seed))
+                for seed in range(20)]
+        self.assertEqual(len(store), len({genotype.id for genotype in held}))
+
+    def test_only_the_ancestor_is_flagged_as_it(self):
+        store = genome.GenomeStore()
+        self.assertTrue(store.intern(genome.ANCESTOR_SOURCE).is_ancestor)
+        self.assertFalse(store.intern(genome.ANCESTOR_SOURCE + '\n').is_ancestor)
+
+    def test_a_genotype_nobody_carries_is_forgotten(self):
+        store = genome.GenomeStore()
+        store.intern('def act(): pass\n')
+        gc.collect()
+        self.assertEqual(0, len(store))
+
+    def test_genomes_share_their_source(self):
+        parent = genome.Genome.founder(seed=1)
+        children = [parent.child(birth_index=index, mutation_probability=0.0)
+                    for index in range(5)]
+        mutant = genome.Genome(''.join(list(genome.ANCESTOR_SOURCE)), seed=2,
+                               identity='1', generation=1)
+        for gene in children + [mutant]:
+            self.assertIs(parent.genotype, gene.genotype)
+            self.assertIs(parent.source, gene.source)
+
+
 class TestSyntaxGate(unittest.TestCase):
     """Invalid mutants must be rejected before anything is spawned."""
 
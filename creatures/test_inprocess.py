@@ -0,0 +1,152 @@
+"""Tests for the in-process deterministic backend.
+
+Creatures run inside the supervisor under a step budget instead of in forked
+processes under a clock, so a seed always gives the same run, and the forked
+backend can be checked against it event for event.
+"""
+
+import functools
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from creatures import events, genome, inprocess, pool, run, supervisor
+
+SIG = 'def act(age, fuel, max_fuel, food_available, population):\n'
+
+
+def creature(body, seed=1, identity='x'):
+    """A one-off genome with the given act() body."""
+    return genome.Genome(SIG + body, seed=seed, identity=identity, generation=1)
+
+
+class InProcessTestCase(unittest.TestCase):
+    """Every test writes into a throwaway directory and shuts down its supervisors."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='mutate-inprocess-')
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def make(self, **kwargs):
+        """Builds an InProcessSupervisor that is torn down after the test."""
+        kwargs.setdefault('regrowth', 400)
+        kwargs.setdefault('max_processes', 50)
+        sup = inprocess.InProcessSupervisor(**kwargs)
+        self.addCleanup(sup.shutdown)
+        return sup
+
+    def record(self, name, backend, ticks=12, seed=4, **kwargs):
+        """Runs a population with the given backend and returns its log's bytes."""
+        path = os.path.join(self.root, name)
+        with events.EventLog(path) as log, backend(
+                regrowth=400, max_processes=60, log=log, **kwargs) as sup:
+            sup.start(founders=6, seed=seed)
+            for _ in range(ticks):
+                sup.tick()
+        with open(path, 'rb') as handle:
+            return handle.read()
+
+
+class TestDeterminism(InProcessTestCase):
+
+    def test_a_seed_always_writes_the_same_log(self):
+        first = self.record('a.jsonl', inprocess.InProcessSupervisor)
+        second = self.record('b.jsonl', inprocess.InProcessSupervisor)
+        self.assertTrue(first)
+        self.assertEqual(first, second)
+
+    def test_different_seeds_write_different_logs(self):
+        self.assertNotEqual(self.record('a.jsonl', inprocess.InProcessSupervisor, seed=4),
+                            self.record('b.jsonl', inprocess.InProcessSupervisor, seed=5))
+
+    def test_the_forked_serial_backend_writes_the_same_log(self):
+        """The oracle: with nobody near their timeout, forking changes nothing
+        but the process timings a forked death records."""
+        forked = self.record('forked.jsonl', supervisor.Supervisor, timeout=5.0)
+        timed = [json.loads(line) for line in forked.splitlines()]
+        deaths = [event for event in timed if event['kind'] == 'death']
+        self.assertTrue(deaths)
+        for event in deaths:
+            self.assertGreater(event.pop('wall_seconds'), 0)
+            self.assertGreaterEqual(event.pop('cpu_seconds'), 0)
+        oracle = self.record('inprocess.jsonl', inprocess.InProcessSupervisor)
+        self.assertEqual([json.loads(line) for line in oracle.splitlines()], timed)
+
+    def test_each_creature_keeps_its_own_module_state(self):
+        """Two creatures with one genome are two processes when forked, so
+        in-process, or in one pool worker, they must not share a loaded act()
+        either."""
+        counting = genome.Genome(
+            'def act(age, fuel, max_fuel, food_available, population, calls=[]):\n'
+            '    calls.append(age)\n'
+            '    return {"eat": len(calls)}\n', seed=1, identity='x', generation=1)
+        for backend in (self.make, supervisor.Supervisor,
+                        functools.partial(pool.PoolSupervisor, workers=1)):
+            with self.subTest(backend=backend):
+                sup = backend(regrowth=400, max_processes=50)
+                self.addCleanup(sup.shutdown)
+                first, second = sup.spawn(counting), sup.spawn(counting)
+                eaten = [sup.ask(first)['eat'], sup.ask(first)['eat'],
+                         sup.ask(second)['eat']]
+                self.assertEqual([1, 2, 1], eaten)
+
+    def test_broadcast_mode_is_deterministic_too(self):
+        self.assertEqual(
+            self.record('a.jsonl', inprocess.InProcessSupervisor, broadcast=True),
+            self.record('b.jsonl', inprocess.InProcessSupervisor, broadcast=True))
+
+
+class TestMisbehavingCreatures(InProcessTestCase):
+
+    def test_a_creature_that_loops_runs_out_of_steps(self):
+        sup = self.make(steps=1000)
+        sup.spawn(creature('    while True:\n        pass\n'))
+        started = time.monotonic()
+        sup.tick()
+        self.assertEqual(1, sup.deaths['timeout'])
+        self.assertLess(time.monotonic() - started, 1.0, 'the wall backstop decided it')
+
+    def test_a_creature_that_raises_is_crashed(self):
+        sup = self.make()
+        sup.spawn(creature('    raise ValueError("x")\n'))
+        sup.tick()
+        self.assertEqual(1, sup.deaths['crashed'])
+        self.assertEqual(0, sup.deaths['timeout'])
+
+    def test_a_creature_that_swallows_its_budget_still_times_out(self):
+        sup = self.make(steps=100, wall_backstop=0.25)
+        sup.spawn(creature('    try:\n        while True:\n            pass\n'
+                           '    except BaseException:\n        pass\n'
+                           '    while True:\n        pass\n'))
+        sup.tick()
+        self.assertEqual(1, sup.deaths['timeout'])
+
+    def test_healthy_creatures_survive_a_bad_one(self):
+        sup = self.make()
+        sup.start(founders=3, seed=1)
+        sup.spawn(creature('    while True:\n        pass\n', identity='bad'))
+        sup.tick()
+        self.assertEqual(3, len(sup.living))
+
+
+class TestConfiguration(InProcessTestCase):
+
+    def test_forking_options_are_rejected(self):
+        for option in ({'zygote': True}, {'transport': 'shm'}):
+            with self.subTest(option=option), self.assertRaises(ValueError):
+                inprocess.InProcessSupervisor(**option)
+
+    def test_the_manifest_records_that_the_run_is_reproducible(self):
+        directory = run.run(seed=2, ticks=3, founders=3, results_root=self.root,
+                            backend='inprocess', quiet=True)
+        manifest = events.read_manifest(os.path.join(directory, 'manifest.json'))
+        self.assertEqual('inprocess', manifest['backend'])
+        self.assertEqual(inprocess.InProcessSupervisor.REPRODUCIBILITY,
+                         manifest['reproducibility'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+"""Tests for integer creature ids and the lineage table.
+
+A dotted identity grows by a segment every generation. An integer id does not,
+so the ancestry it used to spell out lives in a table instead, and everything
+the dotted name could tell us must still be recoverable from it.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from creatures import events, inprocess, lineage
+
+
+class LineageTestCase(unittest.TestCase):
+    """Every test writes into a throwaway directory."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='mutate-lineage-')
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.path = os.path.join(self.root, lineage.LINEAGE_FILE)
+
+    @staticmethod
+    def family(table):
+        """Builds two founders and a few generations under the first.
+
+        :return: dict of dotted name to id
+        """
+        ids = {'0': table.founder(0), '1': table.founder(1)}
+        for name, parent, index in (('0.0', '0', 0), ('0.1', '0', 1),
+                                    ('0.1.0', '0.1', 0), ('0.1.0.4', '0.1.0', 4),
+                                    ('0.0.2', '0.0', 2), ('1.0', '1', 0)):
+            ids[name] = table.child(ids[parent], index)
+        return ids
+
+
+class TestTable(LineageTestCase):
+
+    def test_ids_are_small_consecutive_integers(self):
+        ids = self.family(lineage.LineageTable())
+        self.assertEqual(list(range(len(ids))), sorted(ids.values()))
+
+    def test_the_dotted_name_is_rebuilt_on_demand(self):
+        table = lineage.LineageTable()
+        for name, identity in self.family(table).items():
+            with self.subTest(name=name):
+                self.assertEqual(name, table.dotted(identity))
+
+    def test_parent_and_depth(self):
+        table = lineage.LineageTable()
+        ids = self.family(table)
+        self.assertIsNone(table.parent(ids['0']))
+        self.assertEqual(ids['0.1.0'], table.parent(ids['0.1.0.4']))
+        self.assertEqual(0, table.depth(ids['1']))
+        self.assertEqual(3, table.depth(ids['0.1.0.4']))
+        self.assertEqual(ids['0'], table.founder_of(ids['0.1.0.4']))
+        self.assertEqual(ids['1'], table.founder_of(ids['1']))
+
+    def test_common_ancestor(self):
+        table = lineage.LineageTable()
+        ids = self.family(table)
+        self.assertEqual(ids['0'], table.common_ancestor(ids['0.1.0.4'], ids['0.0.2']))
+        self.assertEqual(ids['0.1'], table.common_ancestor(ids['0.1.0.4'], ids['0.1']))
+        self.assertEqual(ids['0.0'], table.common_ancestor(ids['0.0'], ids['0.0']))
+        self.assertIsNone(table.common_ancestor(ids['0.1.0'], ids['1.0']))
+
+    def test_is_ancestor(self):
+        table = lineage.LineageTable()
+        ids = self.family(table)
+        self.assertTrue(table.is_ancestor(ids['0'], ids['0.1.0.4']))
+        self.assertTrue(table.is_ancestor(ids['0.1'], ids['0.1']))
+        self.assertFalse(table.is_ancestor(ids['0.0'], ids['0.1.0.4']))
+        self.assertFalse(table.is_ancestor(ids['0.1.0.4'], ids['0']))
+
+    def test_an_unknown_parent_is_refused(self):
+        with self.assertRaises(KeyError):
+            lineage.LineageTable().child(5, 0)
+
+
+class TestPersistence(LineageTestCase):
+
+    def test_a_saved_table_loads_back(self):
+        with lineage.LineageTable(self.path) as table:
+            ids = self.family(table)
+        loaded = lineage.LineageTable.load(self.path)
+        self.assertEqual(len(ids), len(loaded))
+        for name, identity in ids.items():
+            self.assertEqual(name, loaded.dotted(identity))
+
+    def test_reopening_appends(self):
+        with lineage.LineageTable(self.path) as table:
+            first = table.founder(0)
+        with lineage.LineageTable(self.path) as table:
+            second = table.child(first, 3)
+        self.assertEqual('0.3', lineage.LineageTable.load(self.path).dotted(second))
+
+    def test_a_partial_last_record_is_ignored(self):
+        with lineage.LineageTable(self.path) as table:
+            self.family(table)
+        with open(self.path, 'ab') as handle:
+            handle.write(b'\x01\x02\x03')
+        self.assertEqual(8, len(lineage.LineageTable.load(self.path)))
+
+    def test_a_file_that_is_not_a_lineage_file_is_refused(self):
+        with open(self.path, 'wb') as handle:
+            handle.write(b'{"kind": "birth"}\n')
+        with self.assertRaises(ValueError):
+            lineage.LineageTable.load(self.path)
+
+
+class TestSupervisorIds(LineageTestCase):
+
+    def record(self, table):
+        """Runs a deterministic population and returns its events."""
+        log_path = os.path.join(self.root, 'events.jsonl')
+        if os.path.exists(log_path):
+            os.remove(log_path)
+        with events.EventLog(log_path) as log, inprocess.InProcessSupervisor(
+                regrowth=400, max_processes=60, log=log, lineage=table) as sup:
+            sup.start(founders=4, seed=2)
+            for _ in range(10):
+                sup.tick()
+        return events.read(log_path)
+
+    def test_integer_ids_name_the_same_creatures_as_dotted_ones(self):
+        dotted = self.record(None)
+        with lineage.LineageTable(self.path) as table:
+            numbered = self.record(table)
+        loaded = lineage.LineageTable.load(self.path)
+        self.assertEqual(len(dotted), len(numbered))
+
+        def translated(event):
+            event = dict(event)
+            for field in ('identity', 'parent'):
+                if isinstance(event.get(field), int):
+                    event[field] = loaded.dotted(event[field])
+            return event
+
+        self.assertEqual(dotted, [translated(event) for event in numbered])
+
+    def test_replay_finds_the_lineage_beside_the_log(self):
+        with lineage.LineageTable(self.path) as table:
+            self.record(table)
+        replay = events.Replay(os.path.join(self.root, 'events.jsonl'))
+        self.assertIsNotNone(replay.lineage)
+        self.assertEqual('0', replay.lineage.dotted(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
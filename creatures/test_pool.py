@@ -0,0 +1,176 @@
+"""Tests for the worker-pool backend.
+
+A fixed pool of workers hosts many creatures each, so a population is no longer
+capped by how many processes the machine will give us. What must not change is
+the record: a creature that raises is crashed, one that hangs is a timeout, and
+one creature's failure costs nobody else anything.
+"""
+
+import collections
+import json
+import os
+import time
+import unittest
+
+from creatures import genome, pool
+
+SIG = 'def act(age, fuel, max_fuel, food_available, population):\n'
+
+
+def creature(body, seed=1, identity='x'):
+    """A one-off genome with the given act() body."""
+    return genome.Genome(SIG + body, seed=seed, identity=identity, generation=1)
+
+
+class PoolTestCase(unittest.TestCase):
+    """Every test stops its workers, so a failure cannot leak processes."""
+
+    def make(self, **kwargs):
+        """Builds a PoolSupervisor that is torn down after the test."""
+        kwargs.setdefault('regrowth', 400)
+        kwargs.setdefault('workers', 2)
+        kwargs.setdefault('timeout', 0.25)
+        sup = pool.PoolSupervisor(**kwargs)
+        self.addCleanup(sup.shutdown)
+        return sup
+
+
+class TestHosting(PoolTestCase):
+
+    def test_creatures_share_the_workers(self):
+        sup = self.make(workers=2)
+        sup.start(founders=10, seed=1)
+        self.assertEqual(2, len({c.pid for c in sup.living}))
+
+    def test_a_worker_holds_only_its_own_socket(self):
+        sup = self.make(workers=2)
+        sup.start(founders=4, seed=1)
+        # Once it has answered a tick it is past closing what it inherited.
+        sup.tick()
+        for pid in {member.pid for member in sup.living}:
+            fds = {int(fd) for fd in os.listdir(f'/proc/{pid}/fd')}
+            # Standard input, output and error, and its own socket.
+            self.assertEqual({0, 1, 2}, {fd for fd in fds if fd < 3})
+            self.assertEqual(4, len(fds))
+
+    def test_a_hosted_creature_answers_a_tick(self):
+        sup = self.make()
+        decision = sup.ask(sup.spawn(genome.Genome.founder(seed=1)))
+        self.assertIn('eat', decision)
+
+    def test_a_population_lives_and_breeds(self):
+        sup = self.make()
+        sup.start(founders=5, seed=1)
+        for _ in range(6):
+            sup.tick()
+        self.assertGreater(sup.births, 0)
+        for member in sup.living:
+            self.assertGreaterEqual(member.life.age, 0)
+
+    def test_more_creatures_than_the_fork_cap(self):
+        sup = self.make(max_processes=5000, regrowth=100000, food=100000)
+        sup.start(founders=1000, seed=1)
+        sup.tick()
+        self.assertGreaterEqual(len(sup.living), 1000)
+
+    def test_the_creature_cap_still_holds(self):
+        sup = self.make(max_processes=8)
+        sup.start(founders=5, seed=1)
+        for _ in range(10):
+            sup.tick()
+            self.assertLessEqual(len(sup.living), 8)
+        self.assertGreater(sup.cap_hits, 0)
+
+
+class TestCausesOfDeath(PoolTestCase):
+    """Hosting many creatures in one process must not blur why one died."""
+
+    def test_a_crash_is_recorded_as_crashed(self):
+        sup = self.make()
+        sup.spawn(creature('    raise ValueError("x")\n'))
+        sup.tick()
+        self.assertEqual(1, sup.deaths['crashed'])
+
+    def test_a_python_hang_is_a_timeout_and_harms_nobody(self):
+        sup = self.make()
+        sup.start(founders=4, seed=1)
+        sup.spawn(creature('    while True:\n        pass\n'))
+        started = time.monotonic()
+        sup.tick()
+        self.assertLess(time.monotonic() - started, 2.0)
+        self.assertEqual(1, sup.deaths['timeout'])
+        self.assertEqual(4, len(sup.living))
+        self.assertEqual(0, sup.worker_respawns, 'a Python-level hang needs no respawn')
+
+    def test_a_creature_cannot_exit_its_worker(self):
+        sup = self.make()
+        sup.start(founders=2, seed=1)
+        sup.spawn(creature('    exit()\n'))
+        sup.tick()
+        self.assertEqual(1, sup.deaths['crashed'])
+        self.assertEqual(2, len(sup.living))
+
+    def test_a_creature_that_kills_its_worker_is_crashed_and_alone(self):
+        sup = self.make(workers=1)
+        sup.start(founders=3, seed=1)
+        sup.spawn(creature('    __import__("os")._exit(3)\n'))
+        sup.start(founders=0, seed=1)
+        sup.tick()
+        self.assertEqual(1, sup.deaths['crashed'])
+        self.assertEqual(3, len(sup.living))
+        self.assertEqual(1, sup.worker_respawns)
+        sup.tick()
+        self.assertEqual(3, len(sup.living), 'the respawned worker lost its creatures')
+
+    def test_a_reply_it_cannot_match_fails_its_worker(self):
+        """A worker answers strictly in order, so one that answers for another
+        creature, or sends something that is not a reply, has lost track of
+        its batch and is treated as if it had exited."""
+        for case in ('another creature', 'truncated', 'not an object'):
+            with self.subTest(case=case):
+                sup = self.make(workers=1)
+                asked = sup.spawn(creature('    return {}\n'))
+                pending = {asked.worker: collections.deque([asked])}
+                replies = {}
+                reply = {'key': asked.key, 'decision': {}}
+                line = {'another creature': json.dumps({**reply, 'key': asked.key + 1}),
+                        'truncated': json.dumps(reply)[:-5],
+                        'not an object': json.dumps([reply])}[case]
+                self.assertFalse(sup._settle_reply(  # pylint: disable=protected-access
+                    asked.worker, pending, replies, line))
+                self.assertEqual({asked: None}, replies)
+                self.assertEqual({}, pending)
+                self.assertEqual(1, sup.worker_respawns)
+
+    def test_a_hang_no_signal_can_reach_is_a_timeout(self):
+        """A worker that stops dead cannot run its timers, the same as one stuck
+        inside a single C call, so it is found silent from outside and
+        replaced."""
+        sup = self.make(workers=1)
+        sup.start(founders=2, seed=1)
+        sup.spawn(creature('    os = __import__("os")\n'
+                           '    os.kill(os.getpid(), __import__("signal").SIGSTOP)\n'))
+        sup.tick()
+        self.assertEqual(1, sup.deaths['timeout'])
+        self.assertEqual(2, len(sup.living))
+        self.assertEqual(1, sup.worker_respawns)
+
+
+class TestShutdown(PoolTestCase):
+
+    def test_shutdown_is_idempotent(self):
+        sup = self.make()
+        sup.start(founders=3, seed=1)
+        sup.shutdown()
+        sup.shutdown()
+        self.assertEqual([], sup.living)
+
+    def test_summary_reports_the_pool(self):
+        sup = self.make(workers=3)
+        summary = sup.summary()
+        self.assertEqual(3, summary['workers'])
+        self.assertEqual(0, summary['worker_respawns'])
+
+
+if __name__ == '__main__':
+    unittest.main()
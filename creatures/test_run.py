@@ -0,0 +1,125 @@
+"""Tests for checkpointing a run and resuming it.
+
+A resumed run has to be the run that would have happened had it never stopped.
+The inprocess backend makes that checkable exactly: a run cut short and resumed
+must write the very bytes an uninterrupted run writes.
+"""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from creatures import events, inprocess, lineage, run, supervisor
+
+
+class RunTestCase(unittest.TestCase):
+    """Every test writes into a throwaway results root."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='mutate-run-')
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def record(self, seed=3, **kwargs):
+        """Runs a small deterministic population.
+        :return: The run directory
+        """
+        kwargs.setdefault('ticks', 12)
+        kwargs.setdefault('backend', 'inprocess')
+        return run.run(seed=seed, founders=5, regrowth=400, max_processes=60,
+                       results_root=os.path.join(self.root, kwargs.pop('name', 'a')),
+                       quiet=True, checkpoint_every=5, **kwargs)
+
+    @staticmethod
+    def contents(directory, name):
+        """:return: The bytes of a file in a run directory."""
+        with open(os.path.join(directory, name), 'rb') as handle:
+            return handle.read()
+
+
+class TestCheckpoint(RunTestCase):
+
+    def test_a_checkpoint_is_written_every_few_ticks(self):
+        directory = self.record(ticks=12)
+        state = events.read_checkpoint(os.path.join(directory, run.CHECKPOINT_FILE))
+        self.assertEqual(10, state['tick'])
+        self.assertEqual(12, state['parameters']['ticks'])
+        self.assertFalse(os.path.exists(
+            os.path.join(directory, run.CHECKPOINT_FILE + '.tmp')))
+
+    def test_a_supervisor_restored_from_a_checkpoint_checkpoints_the_same(self):
+        with inprocess.InProcessSupervisor(regrowth=400, max_processes=60) as first:
+            first.start(founders=5, seed=3)
+            for _ in range(6):
+                first.tick()
+            state = json.loads(json.dumps(first.checkpoint()))
+        with inprocess.InProcessSupervisor(regrowth=400, max_processes=60) as second:
+            second.resume(state)
+            self.assertEqual(state, second.checkpoint())
+
+    def test_no_checkpoints_when_turned_off(self):
+        directory = run.run(seed=3, ticks=6, founders=3, results_root=self.root,
+                            quiet=True, backend='inprocess', checkpoint_every=0)
+        self.assertFalse(os.path.exists(os.path.join(directory, run.CHECKPOINT_FILE)))
+
+
+class TestResume(RunTestCase):
+
+    def test_resuming_rewrites_exactly_what_was_cut_off(self):
+        whole = self.record(name='whole')
+        resumed = run.resume(self.record(name='cut'), quiet=True)
+        for name in ('events.jsonl', lineage.LINEAGE_FILE):
+            with self.subTest(name=name):
+                self.assertEqual(self.contents(whole, name), self.contents(resumed, name))
+        manifest = events.read_manifest(os.path.join(resumed, 'manifest.json'))
+        self.assertEqual(10, manifest['resumed_from_tick'])
+        self.assertEqual(
+            events.read_manifest(os.path.join(whole, 'manifest.json'))['summary']['births'],
+            manifest['summary']['births'])
+
+    def test_a_crashed_run_resumes_as_if_it_had_not(self):
+        whole = self.record(name='whole', ticks=14)
+        real_tick = supervisor.Supervisor.tick
+
+        def crash_at_eight(sup):
+            real_tick(sup)
+            if sup.ticks == 8:
+                raise KeyboardInterrupt
+
+        with mock.patch.object(supervisor.Supervisor, 'tick', crash_at_eight):
+            with self.assertRaises(KeyboardInterrupt):
+                self.record(name='crashed', ticks=14)
+        crashed = run.run_directory(os.path.join(self.root, 'crashed'), 3)
+        run.resume(crashed, quiet=True)
+        self.assertEqual(self.contents(whole, 'events.jsonl'),
+                         self.contents(crashed, 'events.jsonl'))
+
+    def test_dotted_runs_resume_too(self):
+        whole = self.record(name='whole', dotted=True)
+        resumed = run.resume(self.record(name='cut', dotted=True), quiet=True)
+        self.assertEqual(self.contents(whole, 'events.jsonl'),
+                         self.contents(resumed, 'events.jsonl'))
+
+    def test_a_forked_run_resumes_with_live_processes(self):
+        directory = self.record(backend='fork', ticks=7, timeout=5.0)
+        run.resume(directory, quiet=True)
+        manifest = events.read_manifest(os.path.join(directory, 'manifest.json'))
+        self.assertEqual(7, manifest['summary']['ticks'])
+        snapshots = [event['tick'] for event in events.read(
+            os.path.join(directory, 'events.jsonl')) if event['kind'] == 'snapshot']
+        self.assertEqual(list(range(1, 8)), snapshots)
+
+    def test_resuming_without_a_checkpoint_says_so(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            status = run.main(['--resume', '--seed', '9', '--results-root', self.root])
+        self.assertEqual(1, status)
+        self.assertIn('no checkpoint', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
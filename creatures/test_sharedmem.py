@@ -0,0 +1,121 @@
+"""Tests for the shared-memory transport.
+
+With transport='shm' the world's state is written once per tick into shared
+memory and each creature answers in its own slot, rung by eventfd doorbells,
+instead of a JSON line each way. What must not change is the record: the same
+decisions, crashes still told apart from timeouts, and nothing left behind.
+"""
+
+import os
+import time
+import unittest
+
+from creatures import genome, sharedmem, supervisor
+
+SIG = 'def act(age, fuel, max_fuel, food_available, population):\n'
+
+
+def creature(body, seed=1, identity='x'):
+    """A one-off genome with the given act() body."""
+    return genome.Genome(SIG + body, seed=seed, identity=identity, generation=1)
+
+
+@unittest.skipUnless(hasattr(os, 'eventfd'), 'needs eventfd')
+class SharedMemoryTestCase(unittest.TestCase):
+    """Every test shuts its supervisor down, so a failure cannot leak children."""
+
+    def make(self, **kwargs):
+        """Builds a shm Supervisor that is torn down after the test."""
+        kwargs.setdefault('regrowth', 400)
+        kwargs.setdefault('max_processes', 50)
+        kwargs.setdefault('transport', 'shm')
+        sup = supervisor.Supervisor(**kwargs)
+        self.addCleanup(sup.shutdown)
+        return sup
+
+
+class TestTransport(SharedMemoryTestCase):
+
+    def test_a_creature_answers_through_its_slot(self):
+        sup = self.make()
+        founder = sup.spawn(genome.Genome.founder(seed=1))
+        decision = sup.ask(founder)
+        self.assertEqual({'eat', 'reproduce', 'endowment'}, set(decision))
+
+    def test_the_creature_sees_the_world_as_published(self):
+        sup = self.make(regrowth=0, food=7)
+        sup.spawn(genome.Genome.founder(seed=1))
+        echo = sup.spawn(creature('    return {"eat": food_available + population}\n'))
+        self.assertEqual(7 + 2, sup.ask(echo)['eat'])
+
+    def test_a_population_lives_and_breeds(self):
+        for broadcast in (False, True):
+            with self.subTest(broadcast=broadcast):
+                sup = self.make(broadcast=broadcast)
+                sup.start(founders=5, seed=1)
+                for _ in range(6):
+                    sup.tick()
+                self.assertGreater(sup.births, 0)
+
+    def test_crashes_are_still_told_apart_from_timeouts(self):
+        sup = self.make(timeout=0.25)
+        sup.spawn(creature('    raise ValueError("x")\n', identity='0'))
+        sup.spawn(creature('    while True:\n        pass\n', identity='1'))
+        sup.tick()
+        self.assertEqual(1, sup.deaths['crashed'])
+        self.assertEqual(1, sup.deaths['timeout'])
+
+    def test_a_creature_that_exits_is_recorded_as_crashed(self):
+        sup = self.make(timeout=5.0)
+        sup.spawn(creature('    import os\n    os._exit(3)\n'))
+        started = time.monotonic()
+        sup.tick()
+        self.assertEqual(1, sup.deaths['crashed'])
+        self.assertLess(time.monotonic() - started, 2.0, 'a dead creature was waited out')
+
+    def test_shm_matches_json_when_food_is_plentiful(self):
+        outcomes = []
+        for transport in ('json', 'shm'):
+            sup = self.make(transport=transport, broadcast=True, regrowth=5000)
+            sup.start(founders=5, seed=3)
+            for _ in range(5):
+                sup.tick()
+            outcomes.append((sup.births, sorted(c.gene.identity for c in sup.living)))
+        self.assertEqual(outcomes[0], outcomes[1])
+
+    def test_slots_are_reused_after_death(self):
+        sup = self.make()
+        doomed = sup.spawn(creature('    raise ValueError("x")\n'))
+        slot = doomed.slot
+        sup.tick()
+        # A slot is only handed on once its old owner is reaped, which a tick
+        # does without waiting, so wait for it here.
+        sup._reap(block=True)  # pylint: disable=protected-access
+        self.assertEqual(slot, sup.spawn(genome.Genome.founder(seed=1)).slot)
+        self.assertEqual(2, len(sup._by_fd))  # pylint: disable=protected-access
+
+    def test_chunks_grow_past_one(self):
+        transport = sharedmem.SharedMemoryTransport()
+        self.addCleanup(transport.close)
+        records = [type('Record', (), {})() for _ in range(sharedmem.CHUNK_SLOTS + 1)]
+        for record in records:
+            transport.attach(record)
+        self.assertEqual(2, len(transport.chunks))
+        self.assertEqual(len(records), len({record.slot for record in records}))
+        for record in records:
+            transport.detach(record)
+
+
+class TestConfiguration(unittest.TestCase):
+
+    def test_shm_cannot_be_combined_with_the_zygote(self):
+        with self.assertRaises(ValueError):
+            supervisor.Supervisor(transport='shm', zygote=True)
+
+    def test_an_unknown_transport_is_rejected(self):
+        with self.assertRaises(ValueError):
+            supervisor.Supervisor(transport='carrier-pigeon')
+
+
+if __name__ == '__main__':
+    unittest.main()
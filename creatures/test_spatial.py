@@ -0,0 +1,171 @@
+"""Tests for the spatial world.
+
+What matters is that crowding is local: a creature sees and eats only around
+its own cell. And that the world stays as reproducible as the single pool it
+can stand in for.
+"""
+
+import collections
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from creatures import events, genome, inprocess, pool, run, spatial, supervisor
+
+
+class TestGrid(unittest.TestCase):
+
+    def test_food_and_regrowth_are_shared_out_evenly(self):
+        world = spatial.SpatialWorld(4, 5, food=1003, regrowth=47)
+        self.assertEqual(1003, sum(world.cells))
+        self.assertEqual(1003, world.food)
+        self.assertEqual(47, sum(world.growth))
+        self.assertLessEqual(max(world.growth) - min(world.growth), 1)
+
+    def test_a_neighbourhood_is_nine_cells_wrapping_at_the_edges(self):
+        world = spatial.SpatialWorld(5, 4, food=0, regrowth=0)
+        self.assertEqual(
+            (0, 19, 15, 16, 4, 1, 9, 5, 6), world.neighbourhoods[0])
+        self.assertTrue(all(len(near) == 9 for near in world.neighbourhoods))
+
+    def test_a_small_grid_counts_each_cell_once(self):
+        self.assertEqual((0,), spatial.SpatialWorld(1, 1, 0, 0).neighbourhoods[0])
+        self.assertEqual(4, len(spatial.SpatialWorld(2, 2, 0, 0).neighbourhoods[3]))
+
+    def test_sizes_are_read_from_the_command_line(self):
+        self.assertEqual((32, 24), spatial.parse_size('32x24'))
+        for bad in ('32', '0x4', 'ax3'):
+            with self.subTest(bad=bad), self.assertRaises(ValueError):
+                spatial.parse_size(bad)
+
+
+class TestFood(unittest.TestCase):
+
+    def setUp(self):
+        self.world = spatial.SpatialWorld(5, 5, food=0, regrowth=0)
+
+    def test_a_creature_eats_from_its_own_cell_first(self):
+        self.world.cells[12] = 10
+        self.world.cells[13] = 10
+        self.world.food = 20
+        self.assertEqual(4, self.world.request_near(4, 12))
+        self.assertEqual([6, 10], self.world.cells[12:14])
+        self.assertEqual(16, self.world.food)
+
+    def test_then_from_its_neighbours(self):
+        self.world.cells[12] = 3
+        self.world.cells[6] = 10
+        self.world.food = 13
+        self.assertEqual(8, self.world.request_near(8, 12))
+        self.assertEqual([0, 5], [self.world.cells[12], self.world.cells[6]])
+
+    def test_food_out_of_reach_is_not_given(self):
+        self.world.cells[0] = 100
+        self.world.food = 100
+        self.assertEqual(0, self.world.request_near(5, 12))
+        self.assertEqual(100, self.world.food)
+
+    def test_regrowth_is_per_cell_and_capped(self):
+        world = spatial.SpatialWorld(2, 2, food=0, regrowth=8, max_food=5)
+        for _ in range(3):
+            world.tick()
+        self.assertEqual([5, 5, 5, 5], world.cells)
+        self.assertEqual(20, world.food)
+
+    def test_a_creature_senses_only_its_neighbourhood(self):
+        self.world.cells[12] = 7
+        self.world.cells[0] = 100
+        self.world.place(12)
+        self.world.place(18)
+        self.world.place(0)
+        self.assertEqual((7, 2), self.world.senses(12))
+        self.world.leave(18)
+        self.assertEqual((7, 1), self.world.senses(12))
+
+    def test_children_are_born_nearby_and_reproducibly(self):
+        places = {self.world.birthplace(12, seed) for seed in range(50)}
+        self.assertEqual(set(self.world.neighbourhoods[12]), places)
+        self.assertEqual(self.world.birthplace(12, 7), self.world.birthplace(12, 7))
+
+    def test_a_saved_world_comes_back_the_same(self):
+        world = spatial.SpatialWorld(3, 3, food=50, regrowth=9)
+        world.request_near(4, 4)
+        copy = spatial.SpatialWorld(3, 3, food=0, regrowth=0)
+        copy.restore(json.loads(json.dumps(world.state())))
+        self.assertEqual(world.state(), copy.state())
+        with self.assertRaises(ValueError):
+            spatial.SpatialWorld(2, 2, 0, 0).restore(world.state())
+
+
+class TestSpatialSupervisor(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='mutate-spatial-')
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def record(self, name, backend, **kwargs):
+        """Runs a small spatial population and returns its log's bytes."""
+        path = os.path.join(self.root, name)
+        with events.EventLog(path) as log, backend(
+                regrowth=400, max_processes=80, log=log, world_size=(6, 6),
+                **kwargs) as sup:
+            sup.start(founders=8, seed=4)
+            for _ in range(15):
+                sup.tick()
+            self.check_crowds(sup)
+        with open(path, 'rb') as handle:
+            return handle.read()
+
+    def check_crowds(self, sup):
+        """The world's head count in every cell is the living's."""
+        counted = collections.Counter(creature.cell for creature in sup.living)
+        self.assertEqual([counted[cell] for cell in range(36)], sup.world.crowd)
+
+    def test_creatures_are_shown_their_neighbourhood(self):
+        with inprocess.InProcessSupervisor(regrowth=400, world_size=(6, 6)) as sup:
+            sup.start(founders=4, seed=1)
+            self.assertEqual([0, 9, 18, 27], [c.cell for c in sup.living])
+            food, _ = sup.world.senses(0)
+            echo = genome.Genome(
+                'def act(age, fuel, max_fuel, food_available, population):\n'
+                f'    return {{"eat": population, "reproduce": food_available == {food}}}\n',
+                seed=0, identity='echo', generation=1)
+            decision = sup.ask(sup.spawn(echo, cell=0))
+            self.assertEqual(2, decision['eat'])
+            self.assertTrue(decision['reproduce'])
+
+    def test_the_forked_backend_writes_what_the_inprocess_one_does(self):
+        oracle = self.record('inprocess.jsonl', inprocess.InProcessSupervisor)
+        forked = [json.loads(line) for line in self.record(
+            'forked.jsonl', supervisor.Supervisor, timeout=5.0).splitlines()]
+        for event in forked:
+            event.pop('wall_seconds', None)
+            event.pop('cpu_seconds', None)
+        self.assertEqual([json.loads(line) for line in oracle.splitlines()], forked)
+
+    def test_the_pool_backend_runs_a_spatial_world(self):
+        self.assertTrue(self.record('pool.jsonl', pool.PoolSupervisor, workers=2))
+
+    def test_shared_memory_cannot_show_creatures_different_worlds(self):
+        with self.assertRaises(ValueError):
+            supervisor.Supervisor(transport='shm', world_size=(4, 4))
+
+    def test_a_spatial_run_resumes_exactly(self):
+        def record(name):
+            return run.run(seed=3, ticks=12, founders=5, regrowth=400, max_processes=60,
+                           results_root=os.path.join(self.root, name), quiet=True,
+                           backend='inprocess', checkpoint_every=5, world_size=(5, 5))
+
+        whole = record('whole')
+        resumed = run.resume(record('cut'), quiet=True)
+        logs = []
+        for directory in (whole, resumed):
+            with open(os.path.join(directory, 'events.jsonl'), 'rb') as handle:
+                logs.append(handle.read())
+        self.assertEqual(logs[0], logs[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,12 +13,15 @@ concurrency cap, orphaned processes, and creatures that never answer. A mutant
 containing `while True` is not hypothetical, it is inevitable.
 """
 
+import collections
 import os
+import shutil
 import signal
+import tempfile
 import time
 import unittest
 
-from creatures import genome, lifecycle, supervisor
+from creatures import events, genome, lifecycle, supervisor
 
 
 def alive(pid):
@@ -191,6 +194,120 @@ class TestMisbehavingCreatures(SupervisorTestCase):
         self.assertEqual(3, len(sup.living))
 
 
+HUNG = ('def act(age, fuel, max_fuel, food_available, population):\n'
+        '    while True:\n        pass\n')
+
+
+class TestCpuLimit(SupervisorTestCase):
+    """A forked creature that spins ends itself on its own CPU timer, well
+    before the wall-clock timeout would have caught it."""
+
+    def spinner(self, body='    while True:\n        pass\n'):
+        """A genome whose act() runs the given body, by default forever."""
+        return genome.Genome('def act(age, fuel, max_fuel, food_available, population):\n'
+                             + body, seed=1, identity='0', generation=1)
+
+    def test_a_spinner_times_out_on_cpu_not_on_the_clock(self):
+        for transport in ('json', 'shm'):
+            with self.subTest(transport=transport):
+                sup = self.make(timeout=10.0, cpu_limit=0.1, transport=transport)
+                sup.spawn(self.spinner())
+                started = time.monotonic()
+                sup.tick()
+                self.assertEqual(1, sup.deaths['timeout'])
+                self.assertLess(time.monotonic() - started, 5.0,
+                                'the tick waited for the wall-clock timeout')
+
+    def test_catching_everything_does_not_save_a_spinner(self):
+        sup = self.make(timeout=10.0, cpu_limit=0.1)
+        sup.spawn(self.spinner('    while True:\n        try:\n            pass\n'
+                               '        except BaseException:\n            pass\n'))
+        started = time.monotonic()
+        sup.tick()
+        self.assertEqual(1, sup.deaths['timeout'])
+        self.assertLess(time.monotonic() - started, 5.0)
+
+    def test_a_slow_creature_is_still_caught_by_the_clock(self):
+        sup = self.make(timeout=0.25, cpu_limit=0.1)
+        sup.spawn(self.spinner('    import time\n    time.sleep(60)\n'))
+        sup.tick()
+        self.assertEqual(1, sup.deaths['timeout'])
+
+    def test_deaths_record_what_the_process_used(self):
+        path = os.path.join(tempfile.mkdtemp(prefix='mutate-cpu-'), 'events.jsonl')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path), ignore_errors=True)
+        with events.EventLog(path) as log:
+            sup = self.make(timeout=10.0, cpu_limit=0.2, log=log)
+            sup.spawn(self.spinner())
+            sup.tick()
+        death, = [event for event in events.read(path) if event['kind'] == 'death']
+        self.assertEqual('timeout', death['cause'])
+        self.assertGreaterEqual(death['cpu_seconds'], 0.15)
+        self.assertGreaterEqual(death['wall_seconds'], death['cpu_seconds'] - 0.05)
+
+
+class TestBroadcast(SupervisorTestCase):
+    """Broadcast mode sends every request before gathering any reply, so a tick
+    costs the slowest creature rather than the sum of them."""
+
+    def test_hung_creatures_share_one_deadline(self):
+        sup = self.make(timeout=0.5, broadcast=True)
+        for index in range(4):
+            sup.spawn(genome.Genome(HUNG, seed=index, identity=str(index), generation=1))
+        started = time.monotonic()
+        sup.tick()
+        elapsed = time.monotonic() - started
+        self.assertEqual(4, sup.deaths['timeout'])
+        self.assertLess(elapsed, 1.5, 'hung creatures were waited for one at a time')
+
+    def test_healthy_creatures_survive_alongside_hung_ones(self):
+        sup = self.make(timeout=0.25, broadcast=True)
+        sup.start(founders=3, seed=1)
+        sup.spawn(genome.Genome(HUNG, seed=99, identity='x', generation=1))
+        sup.tick()
+        self.assertEqual(3, len(sup.living))
+        self.assertEqual(1, sup.deaths['timeout'])
+
+    def test_crashes_are_still_told_apart_from_timeouts(self):
+        sup = self.make(timeout=0.25, broadcast=True)
+        sup.spawn(genome.Genome(
+            'def act(age, fuel, max_fuel, food_available, population):\n'
+            '    raise ValueError("x")\n', seed=1, identity='0', generation=1))
+        sup.tick()
+        self.assertEqual(1, sup.deaths['crashed'])
+        self.assertEqual(0, sup.deaths['timeout'])
+
+    def test_food_is_served_in_living_order(self):
+        """Replies arrive in whatever order the scheduler allows, but the pool
+        is always drawn down in birth order."""
+        sup = self.make(broadcast=True, regrowth=0, food=6)
+        sup.start(founders=3, seed=1)
+        first, *rest = sup.living
+        sup.tick()
+        self.assertEqual(lifecycle.DEFAULT_FUEL - 1 + 6, first.life.fuel)
+        for creature in rest:
+            self.assertEqual(lifecycle.DEFAULT_FUEL - 1, creature.life.fuel)
+
+    def test_a_broadcast_run_matches_a_serial_one_when_food_is_plentiful(self):
+        """With food to spare nobody's decision depends on who ate first, so
+        the two modes must agree exactly."""
+        outcomes = []
+        for broadcast in (False, True):
+            sup = self.make(broadcast=broadcast, regrowth=5000)
+            sup.start(founders=5, seed=3)
+            for _ in range(5):
+                sup.tick()
+            outcomes.append((sup.births, sorted(c.gene.identity for c in sup.living)))
+        self.assertEqual(outcomes[0], outcomes[1])
+
+    def test_reaped_creatures_leave_the_poll_set(self):
+        sup = self.make(broadcast=True, max_age=2)
+        sup.start(founders=3, seed=1)
+        for _ in range(3):
+            sup.tick()
+        self.assertEqual({}, sup._by_fd)  # pylint: disable=protected-access
+
+
 class TestConcurrencyCap(SupervisorTestCase):
     """The cap is a safety valve for the machine, not an ecological rule.
     Food is the limiter (see test_ecology.py)."""
@@ -258,6 +375,82 @@ class TestCleanShutdown(SupervisorTestCase):
         self.assertEqual(0, len(sup.living))
 
 
+def state(pid):
+    """:return: A process's state letter from /proc, without reaping it, or
+    None once it is gone."""
+    try:
+        with open(f'/proc/{pid}/stat', encoding='utf-8') as handle:
+            return handle.read().rsplit(')', 1)[1].split()[0]
+    except OSError:
+        return None
+
+
+@unittest.skipUnless(os.path.isdir('/proc/self'), 'needs /proc')
+class TestReaping(SupervisorTestCase):
+    """The dead are killed at once and reaped together, without blocking."""
+
+    def test_a_die_off_leaves_no_zombies_behind(self):
+        sup = self.make(max_age=1)
+        sup.start(founders=12, seed=1)
+        pids = [c.pid for c in sup.living]
+        sup.tick()
+        self.assertEqual(12, sup.deaths['old_age'])
+        time.sleep(0.2)
+        sup.tick()
+        for pid in pids:
+            with self.subTest(pid=pid):
+                self.assertIsNone(state(pid))
+        summary = sup.summary()
+        self.assertEqual(12, summary['reaped'])
+        self.assertEqual(0, summary['zombies'])
+        self.assertGreater(summary['reap_seconds'], 0)
+
+    def test_the_dead_are_killed_before_they_are_reaped(self):
+        sup = self.make(max_age=1)
+        sup.start(founders=3, seed=1)
+        pids = [c.pid for c in sup.living]
+        for creature in list(sup.living):
+            sup.living.remove(creature)
+            sup._kill(creature, 'old_age')  # pylint: disable=protected-access
+        time.sleep(0.2)
+        for pid in pids:
+            with self.subTest(pid=pid):
+                self.assertEqual('Z', state(pid))
+        self.assertEqual(3, sup.summary()['zombies'])
+
+    def test_shutdown_reaps_everything(self):
+        sup = self.make()
+        sup.start(founders=5, seed=1)
+        pids = [c.pid for c in sup.living]
+        sup.shutdown()
+        for pid in pids:
+            with self.subTest(pid=pid):
+                self.assertIsNone(state(pid))
+        self.assertEqual(0, sup.summary()['zombies'])
+
+
+class TestGenotypeCounts(SupervisorTestCase):
+    """The living's genotype counts are kept up as they go, not recounted."""
+
+    def test_counts_match_a_recount_after_births_and_deaths(self):
+        sup = self.make(mutation_probability=0.5, max_age=4)
+        sup.start(founders=6, seed=2)
+        for _ in range(8):
+            sup.tick()
+            recount = collections.Counter(c.gene.genotype for c in sup.living)
+            self.assertEqual(recount, sup.genotypes)
+        self.assertEqual(len(recount), sup.summary()['genotypes'])
+
+    def test_divergence_comes_from_the_counts(self):
+        sup = self.make(mutation_probability=1.0)
+        sup.start(founders=4, seed=2)
+        sup.tick()
+        sup.tick()
+        strategy = sup._strategy([])  # pylint: disable=protected-access
+        mutants = sum(1 for c in sup.living if c.gene.source != genome.ANCESTOR_SOURCE)
+        self.assertAlmostEqual(mutants / len(sup.living), strategy['genetic_divergence'])
+
+
 class TestWorldWiring(SupervisorTestCase):
 
     def test_world_regrows_each_tick(self):
@@ -0,0 +1,97 @@
+"""Tests for the supervisor's phase timers and the benchmark built on them."""
+
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from creatures import benchmark, supervisor, timers
+
+
+class TestPhaseTimers(unittest.TestCase):
+
+    def test_a_phase_adds_up_its_entries(self):
+        clock = timers.PhaseTimers()
+        for _ in range(3):
+            with clock.phase('wait'):
+                time.sleep(0.01)
+        self.assertEqual(3, clock.entries['wait'])
+        self.assertGreaterEqual(clock.seconds['wait'], 0.03)
+        self.assertEqual(0, clock.entries['encode'])
+
+    def test_percentiles_are_within_two_percent(self):
+        clock = timers.PhaseTimers()
+        latencies = [index / 10000 for index in range(1, 1001)]
+        for latency in latencies:
+            clock.ask(latency)
+        for fraction in (0.5, 0.99, 1.0):
+            with self.subTest(fraction=fraction):
+                exact = latencies[round(fraction * len(latencies)) - 1]
+                self.assertAlmostEqual(exact, clock.percentile(fraction), delta=exact * 0.02)
+
+    def test_nothing_asked_has_no_percentiles(self):
+        summary = timers.PhaseTimers().summary()
+        self.assertEqual(0, summary['asks'])
+        self.assertIsNone(summary['ask_latency_ms']['p99'])
+
+    def test_no_timers_does_nothing(self):
+        self.assertFalse(timers.NO_TIMERS)
+        with timers.NO_TIMERS.phase('wait'):
+            timers.NO_TIMERS.ask(1.0)
+            timers.NO_TIMERS.add('reap', 1.0)
+
+
+class TestProfiledSupervisor(unittest.TestCase):
+
+    def run_population(self, **kwargs):
+        """:return: The summary of a few ticks of a small population."""
+        with supervisor.Supervisor(regrowth=2000, max_processes=5, **kwargs) as sup:
+            sup.start(founders=5, seed=1)
+            for _ in range(3):
+                sup.tick()
+            return sup.summary()
+
+    def test_every_answer_is_timed(self):
+        for broadcast in (False, True):
+            with self.subTest(broadcast=broadcast):
+                profile = self.run_population(profile=True, broadcast=broadcast)['profile']
+                self.assertEqual(15, profile['asks'])
+                self.assertGreater(profile['ask_latency_ms']['p50'], 0)
+                self.assertGreaterEqual(profile['ask_latency_ms']['p99'],
+                                        profile['ask_latency_ms']['p50'])
+                self.assertEqual(5, profile['phases']['launch']['entries'])
+                self.assertGreater(profile['phases']['wait']['ms'], 0)
+
+    def test_profiling_is_off_unless_asked_for(self):
+        self.assertNotIn('profile', self.run_population())
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_a_small_sweep_is_written_down(self):
+        root = tempfile.mkdtemp(prefix='mutate-benchmark-')
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        output = os.path.join(root, 'raw.txt')
+        with redirect_stdout(io.StringIO()):
+            benchmark.main(['--populations', '2,4', '--ticks', '2', '--output', output])
+        with open(output, encoding='utf-8') as handle:
+            text = handle.read()
+        self.assertIn('== serial ==', text)
+        self.assertIn('== broadcast ==', text)
+        self.assertEqual(4, text.count('ticks/s='))
+        self.assertIn('pop=    4 living=    4', text)
+
+    def test_memory_that_cannot_be_read_is_not_available(self):
+        # pylint: disable=protected-access
+        with mock.patch.object(supervisor.Supervisor, '_memory', return_value=None):
+            result = benchmark.measure(2, 2)
+        self.assertIsNone(result['uss_kb'])
+        self.assertIn('uss=n/a', benchmark._line('serial', result))
+
+
+if __name__ == '__main__':
+    unittest.main()
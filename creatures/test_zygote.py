@@ -0,0 +1,110 @@
+"""Tests for the zygote fork server.
+
+Forking every creature from the supervisor makes each one inherit the
+supervisor's whole heap, which grows with the run. The zygote is forked once,
+while that heap is small, and forks creatures from its own.
+
+A creature forked by the zygote is not the supervisor's child, so these tests
+check liveness through /proc rather than waitpid.  The zygote reaps one only
+when the supervisor asks it to.
+"""
+
+import os
+import time
+import unittest
+
+from creatures import genome, supervisor
+
+
+def running(pid):
+    """:return: True if the process exists and is not a zombie."""
+    try:
+        with open(f'/proc/{pid}/stat', encoding='utf-8') as handle:
+            return handle.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except OSError:
+        return False
+
+
+def parent_of(pid):
+    """:return: The parent pid of a process."""
+    with open(f'/proc/{pid}/stat', encoding='utf-8') as handle:
+        return int(handle.read().rsplit(')', 1)[1].split()[1])
+
+
+@unittest.skipUnless(os.path.isdir('/proc/self'), 'needs /proc')
+class TestZygote(unittest.TestCase):
+
+    def setUp(self):
+        self.sup = supervisor.Supervisor(regrowth=400, max_processes=50, zygote=True)
+        self.addCleanup(self.sup.shutdown)
+
+    def test_creatures_are_forked_by_the_zygote(self):
+        creature = self.sup.spawn(genome.Genome.founder(seed=1))
+        self.assertTrue(running(creature.pid))
+        self.assertEqual(self.sup._zygote.pid,  # pylint: disable=protected-access
+                         parent_of(creature.pid))
+
+    def test_a_zygote_creature_answers_a_tick(self):
+        creature = self.sup.spawn(genome.Genome.founder(seed=1))
+        decision = self.sup.ask(creature)
+        self.assertIn('eat', decision)
+
+    def test_a_population_lives_and_breeds(self):
+        self.sup.start(founders=5, seed=1)
+        for _ in range(6):
+            self.sup.tick()
+        self.assertGreater(self.sup.births, 0)
+
+    def test_dead_creatures_do_not_linger_as_zombies(self):
+        """The supervisor cannot reap a grandchild, so the zygote must."""
+        sup = supervisor.Supervisor(regrowth=400, max_processes=50, max_age=2,
+                                    zygote=True)
+        self.addCleanup(sup.shutdown)
+        sup.start(founders=3, seed=1)
+        pids = [c.pid for c in sup.living]
+        for _ in range(3):
+            sup.tick()
+        time.sleep(0.2)
+        for pid in pids:
+            with self.subTest(pid=pid):
+                self.assertFalse(running(pid))
+
+    def test_a_dead_creature_keeps_its_pid_until_it_is_reaped(self):
+        """Were the zygote to reap on its own, the pid could be handed to an
+        unrelated process before the supervisor killed or measured it."""
+        creature = self.sup.spawn(genome.Genome.founder(seed=1))
+        self.sup.living.remove(creature)
+        self.sup._end(creature)  # pylint: disable=protected-access
+        time.sleep(0.2)
+        self.assertTrue(os.path.exists(f'/proc/{creature.pid}'))
+        self.assertEqual(self.sup._zygote.pid,  # pylint: disable=protected-access
+                         parent_of(creature.pid))
+        self.sup._reap(block=True)  # pylint: disable=protected-access
+        self.assertFalse(os.path.exists(f'/proc/{creature.pid}'))
+        self.assertEqual(1, self.sup.reaped)
+
+    def test_shutdown_stops_the_zygote_and_its_creatures(self):
+        self.sup.start(founders=3, seed=1)
+        pids = [c.pid for c in self.sup.living]
+        zygote = self.sup._zygote.pid  # pylint: disable=protected-access
+        self.sup.shutdown()
+        self.sup.shutdown()
+        time.sleep(0.2)
+        for pid in pids + [zygote]:
+            with self.subTest(pid=pid):
+                self.assertFalse(running(pid))
+
+    def test_spawn_latency_is_reported(self):
+        self.sup.start(founders=3, seed=1)
+        spawn = self.sup.summary()['spawn']
+        self.assertEqual(3, spawn['spawns'])
+        self.assertGreater(spawn['mean_spawn_ms'], 0)
+        self.assertGreaterEqual(spawn['max_fork_ms'], spawn['mean_fork_ms'])
+
+    def test_without_a_zygote_nothing_is_reported(self):
+        with supervisor.Supervisor(regrowth=400) as sup:
+            self.assertNotIn('spawn', sup.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+""" zygote.py - a small pre-initialised process that forks creatures on request.
+
+Forking from the supervisor means every creature inherits the supervisor's whole
+heap as it stands at that moment: the living list, the event log's buffers, the
+population history. All of that grows over a run, so later creatures cost more
+to fork and carry more memory than early ones, for no benefit, since a creature
+only ever needs its genome and its socket.
+
+The zygote is forked once, when the supervisor starts and its heap is still
+small, with creatures.genome already imported. From then on the supervisor hands
+it a genome and one end of a socketpair, and it forks the creature from its own
+small, unchanging heap. Spawn cost and per-child memory then stay flat however
+long the run goes. Both the zygote and the creatures it forks are forked with
+forking.fork(), so neither holds on to descriptors it was never meant to have.
+
+A creature forked this way is the zygote's child, not the supervisor's. The
+supervisor signals it and reads its /proc entry by pid, but cannot wait for it,
+so it asks the zygote to. Until then a dead creature stays a zombie, which
+holds on to its pid: the kernel cannot hand that pid to another process, so a
+SIGKILL or a /proc read meant for a creature can never reach some unrelated
+process that happened to be given its number. That is also why the zygote
+does not simply ignore SIGCHLD and let the kernel reap its children at once.
+"""
+
+import json
+import os
+import socket
+import time
+
+from creatures import forking
+
+# Largest spawn request accepted. Genomes are a few hundred bytes, but
+# duplication can grow one, so this is generous rather than tight.
+MAX_REQUEST_BYTES = 1 << 20
+
+
+class ZygoteError(Exception):
+    """ Raised when the zygote cannot be reached or fails to fork. """
+
+
+def _zygote_loop(control, child_loop):
+    """ Runs inside the zygote for the whole of a supervisor's life.
+
+        Reads one request at a time. A spawn request forks a creature running
+        child_loop on the socket it was handed, and is answered with the new
+        pid and how long the fork took. A reap request is answered with those
+        of the pids it names that have been reaped. Exits when the supervisor
+        closes the control socket.
+    :param control: SOCK_SEQPACKET socket to the supervisor
+    :param child_loop: The creature's main loop, called as child_loop(channel,
+        source); it must never return
+    :return: Never; always exits the process
+    """
+    try:
+        while True:
+            message, fds, _, _ = socket.recv_fds(control, MAX_REQUEST_BYTES, 1)
+            if not message:
+                break
+            request = json.loads(message)
+            if 'reap' in request:
+                reply = {'reaped': [pid for pid in request['reap']
+                                    if forking.reap(pid, request['block'])]}
+            else:
+                reply = _spawn(socket.socket(fileno=fds[0]), request['source'], child_loop)
+            control.send(json.dumps(reply).encode('utf-8'))
+    except (OSError, ValueError):
+        pass
+    finally:
+        os._exit(0)  # pylint: disable=protected-access
+
+
+def _spawn(channel, source, child_loop):
+    """ Forks one creature, in the zygote.
+    :return: The reply: its pid and how long the fork took
+    """
+    started = time.perf_counter()
+    pid = forking.fork(channel.fileno())
+    if pid == 0:
+        child_loop(channel, source)
+    forked = time.perf_counter() - started
+    channel.close()
+    return {'pid': pid, 'fork_seconds': forked}
+
+
+class Zygote:
+    """ The supervisor's handle on its fork server. """
+
+    def __init__(self, child_loop):
+        self.child_loop = child_loop
+        self.pid = None
+        self._control = None
+        self.spawns = 0
+        self.fork_seconds = 0.0
+        self.max_fork_seconds = 0.0
+        self.round_trip_seconds = 0.0
+
+    def start(self):
+        """ Forks the zygote. Call while the caller's heap is still small.
+        :return: self
+        """
+        # SEQPACKET keeps each request a single message, so the descriptor
+        # passed alongside it can never be attached to the wrong genome.
+        ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        pid = forking.fork(theirs.fileno())
+        if pid == 0:
+            _zygote_loop(theirs, self.child_loop)
+        theirs.close()
+        self.pid = pid
+        self._control = ours
+        return self
+
+    def _request(self, request, channel=None):
+        """ Sends the zygote one request and waits for its reply.
+        :param channel: A socket to hand over with it, if any
+        :return: The reply
+        """
+        if self._control is None:
+            raise ZygoteError('zygote is not running')
+        try:
+            socket.send_fds(self._control, [json.dumps(request).encode('utf-8')],
+                            [] if channel is None else [channel.fileno()])
+            reply = self._control.recv(MAX_REQUEST_BYTES)
+        except OSError as error:
+            raise ZygoteError(f'zygote did not answer: {error}') from error
+        if not reply:
+            raise ZygoteError('zygote exited')
+        return json.loads(reply)
+
+    def spawn(self, channel, source):
+        """ Has the zygote fork one creature.
+        :param channel: The creature's end of its socketpair; the caller still
+            owns it and should close its copy afterwards
+        :param source: The creature's genome source
+        :return: The creature's pid
+        """
+        started = time.perf_counter()
+        answer = self._request({'source': source}, channel)
+        self.spawns += 1
+        self.fork_seconds += answer['fork_seconds']
+        self.max_fork_seconds = max(self.max_fork_seconds, answer['fork_seconds'])
+        self.round_trip_seconds += time.perf_counter() - started
+        return answer['pid']
+
+    def reap(self, pids, block=False):
+        """ Has the zygote reap creatures it forked that have been killed.
+            Until then each stays a zombie, and its pid stays its own.
+        :param pids: The creatures' pids
+        :param block: Wait for every one of them, rather than only taking those
+            already gone
+        :return: The pids that have been reaped
+        """
+        return self._request({'reap': pids, 'block': block})['reaped']
+
+    def metrics(self):
+        """ :return: dict of spawn count and latencies, in milliseconds """
+        count = self.spawns or 1
+        return {'spawns': self.spawns,
+                'mean_fork_ms': round(self.fork_seconds / count * 1000, 3),
+                'max_fork_ms': round(self.max_fork_seconds * 1000, 3),
+                'mean_spawn_ms': round(self.round_trip_seconds / count * 1000, 3)}
+
+    def close(self):
+        """ Stops the zygote. Safe to call more than once. Creatures it forked
+            are not touched; they belong to the supervisor. Any it had not been
+            asked to reap are reaped by init once the zygote has gone.
+        :return: None
+        """
+        if self._control is None:
+            return
+        self._control.close()
+        self._control = None
+        try:
+            os.waitpid(self.pid, 0)
+        except ChildProcessError:
+            pass
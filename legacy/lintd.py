@@ -0,0 +1,204 @@
+""" lintd.py - a pylint that stays loaded between mutants.
+
+hello_world_tested and english use pylint as part of their selector, and their
+test files used to run `python -m pylint` on every mutant. Each of those runs
+starts an interpreter and imports pylint and astroid from scratch, which costs
+far more than linting a few lines. Pylint was the slowest part of both
+selectors.
+
+run.py now starts one daemon per run of those experiments:
+
+    python legacy/lintd.py --socket /tmp/.../lintd.sock
+
+It imports pylint once, lints a one-line module so that astroid has already
+built its trees of the builtins and of whatever pylint itself needs, and
+listens on a Unix socket. For every request it forks, and the child runs
+pylint as `python -m pylint <path>` would: in the client's working directory,
+with the client's PYTHONPATH, as __main__, its output thrown away. The client
+gets back the exit status that command would have given. The fork means no
+request sees what an earlier one did to pylint's or astroid's caches, so a
+mutant rewritten under the same name is linted afresh every time.
+
+The selectors call lint(), which finds the daemon through the LINTD_SOCKET
+environment variable that run.py sets. Without a daemon, or if it cannot be
+reached, lint() runs `python -m pylint` itself, exactly as the test files did
+before. A test file run by hand therefore behaves as it always has.
+"""
+
+import argparse
+import contextlib
+import functools
+import importlib
+import json
+import os
+import runpy
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import time
+
+import mutate
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# The environment variable a selector finds the daemon's socket through.
+LINTD_SOCKET = 'LINTD_SOCKET'
+
+# How long to wait for a new daemon to import its linter and start listening.
+STARTUP_SECONDS = 60
+
+
+def lint(path):
+    """ Lints a file as `python -m pylint path` would, by asking the daemon
+        if one is running and by running pylint otherwise.
+    :param path: The file, relative to the working directory or absolute
+    :return: pylint's exit status
+    """
+    socket_path = os.environ.get(LINTD_SOCKET)
+    if socket_path:
+        reply = _ask(socket_path, {'path': path, 'cwd': os.getcwd(),
+                                   'pythonpath': os.environ.get('PYTHONPATH', '')})
+        if reply is not None:
+            return reply['status']
+    return subprocess.call([sys.executable, '-m', 'pylint', path])
+
+
+def _ask(socket_path, request):
+    """ Sends the daemon one request.
+    :return: Its reply, or None if it could not be reached or made no sense
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(socket_path)
+            with connection.makefile('rwb') as stream:
+                stream.write(json.dumps(request).encode('utf-8') + b'\n')
+                stream.flush()
+                return json.loads(stream.readline())
+    except (OSError, ValueError):
+        return None
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """ Answers one request, in a child forked for it. """
+
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        if 'path' in request:
+            reply = {'status': self._lint(request)}
+        else:
+            reply = {'version': self.server.version}
+        self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+
+    def _lint(self, request):
+        """ Runs the linter as the client's `python -m` would have.
+        :return: Its exit status
+        """
+        module = self.server.module
+        return mutate.run_as_main(
+            request['cwd'], [module, request['path']],
+            functools.partial(runpy.run_module, module, run_name='__main__', alter_sys=True),
+            [request['cwd']] + [entry for entry in request['pythonpath'].split(os.pathsep)
+                                if entry])
+
+
+def _prime_pylint():
+    """ Lints a module of one line here, once, so that every fork starts with
+        what any lint would otherwise build afresh: pylint.lint imported and
+        astroid's trees of the builtins. A fork linting a mutant then costs
+        about 40 ms rather than 300.
+    """
+    lint_module = importlib.import_module('pylint.lint')
+    with tempfile.TemporaryDirectory(prefix='lintd-') as directory:
+        path = os.path.join(directory, 'lintd_prime.py')
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write('""" Nothing to see. """\n')
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, \
+                contextlib.redirect_stdout(devnull):
+            lint_module.Run([path], exit=False)
+
+
+# What the daemon does before it serves anyone, for each linter it knows more
+# about than how to import it.
+_PRIMERS = {'pylint': _prime_pylint}
+
+
+class LintServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """ The daemon: a linter imported once, and a fork of it per request. """
+
+    def __init__(self, socket_path, module='pylint'):
+        """
+        :param socket_path: Where to listen
+        :param module: The linter, run as `python -m module`
+        """
+        importlib.import_module(module)
+        if module in _PRIMERS:
+            _PRIMERS[module]()
+        self.module = module
+        self.version = getattr(sys.modules[module], '__version__', None)
+        super().__init__(socket_path, _Handler)
+
+
+class LintDaemon:
+    """ Runs a lint daemon for as long as it is open, with LINTD_SOCKET set so
+        that every selector started meanwhile uses it.
+    """
+
+    def __init__(self, module='pylint'):
+        """
+        :param module: The linter the daemon runs
+        """
+        self.module = module
+        self.version = None
+        self._directory = None
+        self._process = None
+        self._previous = None
+
+    def __enter__(self):
+        self._directory = tempfile.mkdtemp(prefix='lintd-')
+        socket_path = os.path.join(self._directory, 'lintd.sock')
+        self._process = subprocess.Popen(  # pylint: disable=consider-using-with
+            [sys.executable, os.path.join(HERE, 'lintd.py'),
+             '--socket', socket_path, '--module', self.module])
+        deadline = time.monotonic() + STARTUP_SECONDS
+        reply = _ask(socket_path, {})
+        while reply is None:
+            if self._process.poll() is not None or time.monotonic() > deadline:
+                self.__exit__(None, None, None)
+                raise RuntimeError(f'the lint daemon for {self.module} did not start')
+            time.sleep(0.05)
+            reply = _ask(socket_path, {})
+        self.version = reply['version']
+        self._previous = os.environ.get(LINTD_SOCKET)
+        os.environ[LINTD_SOCKET] = socket_path
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._previous is None:
+            os.environ.pop(LINTD_SOCKET, None)
+        else:
+            os.environ[LINTD_SOCKET] = self._previous
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait()
+        if self._directory is not None:
+            for entry in os.listdir(self._directory):
+                os.unlink(os.path.join(self._directory, entry))
+            os.rmdir(self._directory)
+
+
+def main(arguments):
+    """ Entry point for command line: serves until killed. """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--socket', required=True, help='Unix socket to listen on.')
+    parser.add_argument('--module', default='pylint',
+                        help='Linter to run, as python -m would.')
+    args = parser.parse_args(arguments)
+    with LintServer(args.socket, args.module) as server:
+        server.serve_forever()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,13 +1,22 @@
 """ mutate.py - a mutation algorithm. """
 
 import argparse
+import collections.abc
+import dataclasses
+import functools
 import importlib.util
 import os
+import pickle
 import random
+import runpy
+import shutil
+import signal
 import string
 import subprocess
 import sys
+import tempfile
 import time
+import warnings
 import zipfile
 
 HERE = os.path.dirname(os.path.abspath(__file__))
@@ -32,6 +41,49 @@ LEGACY_MUTATION_WEIGHTS = {name: (25 if name in GROWTH_OPERATORS else 0)
 # large-scale duplication reachable.
 DEFAULT_SPAN_PROBABILITY = 0.3
 
+# How a selector is run. 'subprocess' starts a fresh interpreter for every
+# mutant, as the original did. 'fork' forks this process instead, which already
+# has everything a selector imports, so a mutant costs a fork rather than an
+# interpreter start-up. See _run_forked.
+SELECTORS = ('subprocess', 'fork')
+
+# What the selectors import that is worth importing once, before forking, rather
+# than once per mutant. Every test file imports unittest; test_english imports
+# mutate for its dictionary; the two that lint import lintd.
+_SELECTOR_IMPORTS = ('unittest', 'mutate', 'lintd')
+
+
+@dataclasses.dataclass
+class MutationStats:
+    """ Why one mutate() rejected what it rejected, and how many times it
+        started the selector. A mutant that is not Python at all is
+        syntax-rejected; one that is Python but fails its selector is
+        test-rejected, whichever selector that is. Speculative discards were
+        drawn and judged, then thrown away unjudged by the count.
+    """
+    syntax_rejected: int = 0
+    test_rejected: int = 0
+    selector_runs: int = 0
+    speculative_discards: int = 0
+
+
+@dataclasses.dataclass(frozen=True)
+class _Climb:
+    """ What the hill-climbing loops take from mutate(): its locals, passed
+        down together rather than turned into attributes that would outlive
+        the call.
+
+        draw          draws the next mutant of the creature it is given
+        launch        starts judging a saved mutant, given its text and
+                      optionally the directory it is saved in
+        compile_gate  reject mutants that do not compile unlaunched
+        trace         prints the per-generation trace, or does nothing
+    """
+    draw: collections.abc.Callable
+    launch: collections.abc.Callable
+    compile_gate: bool
+    trace: collections.abc.Callable
+
 
 class Creature:
     """ This is a creature that can duplicate itself with errors. """
@@ -48,6 +100,9 @@ class Creature:
         with open(self.in_work_dir(self.path_to_creature), encoding='utf-8') as creature_file:
             self.creature_content = creature_file.read()
 
+        # How the last mutate() went.
+        self.stats = MutationStats()
+
     def in_work_dir(self, name):
         """ Resolves a bare filename against this run's working directory.
         :param name: Bare filename
@@ -184,77 +239,202 @@ class Creature:
 
         return Creature._apply_splice_operator(source, defect, use_keywords)
 
-    def save_mutant(self, creature_content):
+    def save_mutant(self, creature_content, directory=None):
         """ save_mutant: Saves new mutant content to file.
         :param creature_content: Text of file to be saved.
+        :param directory: Where to save it; this run's working directory if None
         :return: None
         """
-        with open(self.in_work_dir(self.mutant_path), 'w', encoding='utf-8') as mutant_path_handle:
+        mutant_file = os.path.join(directory or self.work_dir, self.mutant_path)
+        with open(mutant_file, 'w', encoding='utf-8') as mutant_path_handle:
             mutant_path_handle.write(creature_content)
         # Stale bytecode would otherwise be reused, so the mutant that runs would
         # not be the mutant just written. The original hardcoded a Windows path
         # for Python 3.5, which silently did nothing on any other platform.
-        pyc_file = importlib.util.cache_from_source(self.in_work_dir(self.mutant_path))
+        pyc_file = importlib.util.cache_from_source(mutant_file)
         if os.path.exists(pyc_file):
             os.unlink(pyc_file)
 
-    def _selector_passes(self, cmd):
-        """ Runs the selector and reports whether the mutant survived.
+    def _launch_selector(self, cmd, selector='subprocess', directory=None):
+        """ Starts the selector on the mutant saved in a directory.
 
-            The mutant is executed in this run's working directory, with the
-            legacy directory on PYTHONPATH so test files can import mutate for
-            the spell-check dictionary.
+            A 'subprocess' selector is a new interpreter, with the legacy
+            directory on PYTHONPATH so test files can import mutate for the
+            spell-check dictionary. A 'fork' selector is a fork of this one.
         :param cmd: Bare filename of the test file, or of the mutant itself
-        :return: True if the mutant survives selection
+        :param selector: One of SELECTORS
+        :param directory: Where to run it; this run's working directory if None
+        :return: The running selector, which has subprocess.Popen's wait() and
+            kill(); it exits 0 if the mutant survives
         """
+        directory = directory or self.work_dir
+        self.stats.selector_runs += 1
+        if selector == 'fork':
+            return _ForkedSelector(directory, cmd)
         env = os.environ.copy()
         env['PYTHONPATH'] = os.pathsep.join(
             filter(None, [HERE, env.get('PYTHONPATH', '')]))
-        return subprocess.call([sys.executable, cmd], cwd=self.work_dir, env=env,
-                               stdout=subprocess.DEVNULL,
-                               stderr=subprocess.DEVNULL) == 0
+        # Callers wait for it, or kill it and then wait.
+        return subprocess.Popen([sys.executable, cmd],  # pylint: disable=consider-using-with
+                                cwd=directory, env=env,
+                                stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL)
+
+    def _selector_passes(self, cmd):
+        """ Runs the selector in a new interpreter and reports whether the
+            mutant survived.
+        :param cmd: Bare filename of the test file, or of the mutant itself
+        :return: True if the mutant survives selection
+        """
+        return self._launch_selector(cmd).wait() == 0
 
-    # Six independent knobs, all of which a caller legitimately needs to set per
+    def _forked_selector_passes(self, cmd):
+        """ _selector_passes, run in a fork of this process rather than a new
+            interpreter.
+        :param cmd: Bare filename of the test file, or of the mutant itself
+        :return: True if the mutant survives selection
+        """
+        return self._launch_selector(cmd, 'fork').wait() == 0
+
+    def _compiles(self, content):
+        """ Reports whether a mutant is Python at all, in microseconds and
+            without leaving this process.
+        :param content: The mutant's text
+        :return: True if it compiles
+        """
+        try:
+            # A mutant that compiles can still draw a SyntaxWarning, such as
+            # `is` with a literal. The selector will see it if it matters.
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                compile(content, self.mutant_path, 'exec')
+        except (SyntaxError, ValueError):
+            # ValueError is what compile() raises for a null byte, which the
+            # overwrite operator can splice in.
+            return False
+        return True
+
+    # Ten independent knobs, all of which a caller legitimately needs to set per
     # run. Bundling them into a config object would add indirection without
     # removing a decision, so the limit is waived rather than worked around.
     def mutate(self, mutations, no_environment, use_keywords, *,  # pylint: disable=too-many-arguments
                mutation_weights=None, span_probability=DEFAULT_SPAN_PROBABILITY,
-               quiet=False):
+               quiet=False, compile_gate=False, selector='subprocess', speculation=1,
+               selector_cache=None):
         """ mutate - mutates something mutations times
+
+            Most random splices are not valid Python, and every mutant used to
+            cost a Python subprocess to find that out. With compile_gate, a
+            mutant that does not compile is rejected in-process before anything
+            is written or launched. A mutant that cannot compile cannot pass any
+            selector, so the gate changes no outcome and consumes no random
+            numbers: a seed gives the same creature either way, only faster.
+            It is still off by default, so historical runs repeat exactly as
+            they were made. Either way each rejection is tallied as
+            syntax_rejected or test_rejected in the creature's stats.
         :param mutations: times to mutate
         :param no_environment: Skip unit tests even if present
         :param use_keywords: Use python keywords as mutations or not
         :param mutation_weights: Operator weights; None means all six equally
         :param span_probability: Geometric parameter for delete/duplicate spans
         :param quiet: Suppress the per-generation trace
+        :param compile_gate: Reject mutants that do not compile without
+            running the selector
+        :param selector: One of SELECTORS. Either one passes and fails the
+            same mutants.
+        :param speculation: How many mutants to judge at once; see
+            _mutate_speculatively. 1 is the plain hill-climb, one at a time.
+        :param selector_cache: A selector_cache.SelectorCache to take known
+            verdicts from and add new ones to, or None to run every selector
         :return: (successful_mutations, failed_mutations)
         """
-        successful_mutations = 0
-        failed_mutations = 0
+        if speculation < 1:
+            raise ValueError(f'speculation must be at least 1, not {speculation}')
+        self.stats = MutationStats()
 
         def trace(*args):
             if not quiet:
                 print(*args)
 
+        climb = _Climb(
+            draw=functools.partial(self._flawed_copy, mutation_weights=mutation_weights,
+                                   use_keywords=use_keywords,
+                                   span_probability=span_probability),
+            launch=self._selector_launcher(no_environment, selector, selector_cache),
+            compile_gate=compile_gate, trace=trace)
+
+        self.save_mutant(self.creature_content)
+
+        if speculation > 1:
+            successful_mutations, failed_mutations = self._mutate_speculatively(
+                mutations, speculation, climb)
+        else:
+            successful_mutations, failed_mutations = self._mutate_serially(mutations, climb)
+
+        self.save_mutant(self.creature_content)
+
+        trace(f'Successful mutations: {successful_mutations}')
+        trace(f'Failed mutations: {failed_mutations} ({self.stats.syntax_rejected} did not '
+              f'compile, {self.stats.test_rejected} failed the selector)')
+        return successful_mutations, failed_mutations
+
+    def _selector_launcher(self, no_environment, selector, selector_cache):
+        """ Gets a selector ready to judge this creature's mutants.
+        :param no_environment: Skip unit tests even if present
+        :param selector: One of SELECTORS
+        :param selector_cache: A selector_cache.SelectorCache, or None
+        :return: A function that starts judging a saved mutant, given its text
+            and optionally the directory it is saved in, unless its verdict is
+            already known
+        """
+        if selector not in SELECTORS:
+            raise ValueError(f'selector must be one of {SELECTORS}, not {selector!r}')
+        if selector == 'fork':
+            if not hasattr(os, 'fork'):
+                raise ValueError('the fork selector needs os.fork(), which this '
+                                 'platform does not have')
+            _warm_selector_imports()
+
         if not os.path.exists(self.in_work_dir(self.test_path)):
             no_environment = True
 
         cmd = self.mutant_path if no_environment else self.test_path
 
-        self.save_mutant(self.creature_content)
+        def launch(content, directory=None):
+            start = functools.partial(self._launch_selector, cmd, selector, directory)
+            if selector_cache is None:
+                return start()
+            return _CachedSelector(selector_cache, content, start)
 
+        return launch
+
+    def _mutate_serially(self, mutations, climb):
+        """ The hill-climb: one mutant at a time, kept if it survives.
+        :param mutations: times to mutate
+        :param climb: The _Climb to draw, judge and trace mutants with
+        :return: (successful_mutations, failed_mutations)
+        """
+        trace = climb.trace
+        successful_mutations = 0
+        failed_mutations = 0
         for i in range(mutations):
             trace(f'Iteration: {i}')
-            mutated_content = self._flawed_copy(self.creature_content,
-                                                mutation_weights=mutation_weights,
-                                                use_keywords=use_keywords,
-                                                span_probability=span_probability)
+            mutated_content = climb.draw(self.creature_content)
             trace('===== new mutant =====')
             trace(mutated_content)
             trace('===== new =====')
+            if climb.compile_gate and not self._compiles(mutated_content):
+                # The file on disk is still the current creature, so there is
+                # nothing to revert.
+                failed_mutations += 1
+                self.stats.syntax_rejected += 1
+                trace('===== failed to compile - keeping this =====')
+                trace(self.creature_content)
+                trace('===== failed =====')
+                continue
             self.save_mutant(mutated_content)
 
-            if self._selector_passes(cmd):
+            if climb.launch(mutated_content).wait() == 0:
                 successful_mutations += 1
                 self.creature_content = mutated_content
                 trace('===== succeeded - new creature =====')
@@ -262,46 +442,225 @@ class Creature:
                 trace('===== succeeded =====')
             else:
                 failed_mutations += 1
+                # Without the gate the selector has already paid for finding
+                # out; compiling now only says which kind of failure it was.
+                if not climb.compile_gate and not self._compiles(mutated_content):
+                    self.stats.syntax_rejected += 1
+                else:
+                    self.stats.test_rejected += 1
                 trace('===== failed - reverting to this =====')
                 trace(self.creature_content)
                 trace('===== failed =====')
                 self.save_mutant(self.creature_content)
+        return successful_mutations, failed_mutations
 
-        self.save_mutant(self.creature_content)
-
-        trace(f'Successful mutations: {successful_mutations}')
-        trace(f'Failed mutations: {failed_mutations}')
+    def _mutate_speculatively(self, mutations, speculation, climb):
+        """ The same hill-climb, judging several mutants at once.
+
+            While the creature stays the same, the mutants a serial run would
+            try next are just the next draws from the random stream. So up to
+            speculation of them are drawn together and judged concurrently,
+            each in a private copy of the working directory. The first of them,
+            in the order drawn, to survive is the one the serial run would have
+            kept, and every one before it would have failed there too. Those
+            drawn after it came from a creature the serial run would no longer
+            have. They are thrown away, and the random state is wound back to
+            just after the survivor was drawn. The creature, the counts and the
+            random stream all come out exactly as a serial run's, and so does
+            the trace; only stats.selector_runs also counts the selectors
+            started for discards.
+
+            Most mutants fail, so a batch usually costs one selector's time
+            rather than speculation of them, given the cores to run them.
+        :param mutations: times to mutate
+        :param speculation: Most mutants to draw and judge at once
+        :param climb: The _Climb to draw, judge and trace mutants with
+        :return: (successful_mutations, failed_mutations)
+        """
+        successful_mutations = 0
+        failed_mutations = 0
+        root = tempfile.mkdtemp(prefix='mutate-speculate-')
+        try:
+            slots = [self._copy_work_dir(os.path.join(root, str(slot)))
+                     for slot in range(min(speculation, mutations))]
+            generation = 0
+            while generation < mutations:
+                candidates = []
+                states = []
+                for _ in range(min(speculation, mutations - generation)):
+                    candidates.append(climb.draw(self.creature_content))
+                    states.append(random.getstate())
+                kept = self._first_survivor(candidates, slots, climb)
+                judged = len(candidates) if kept is None else kept + 1
+                self._settle_batch(candidates[:judged], kept, generation, climb)
+                failed_mutations += judged if kept is None else kept
+                if kept is not None:
+                    successful_mutations += 1
+                    random.setstate(states[kept])
+                    self.stats.speculative_discards += len(candidates) - judged
+                generation += judged
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
         return successful_mutations, failed_mutations
 
+    def _settle_batch(self, judged, kept, generation, climb):
+        """ Tallies and traces the judged part of a batch as _mutate_serially
+            would have, one mutant at a time, and keeps the survivor if any.
+        :param judged: The candidates a serial run would have tried
+        :param kept: Index of the survivor among them, or None
+        :param generation: The first one's generation
+        :param climb: The _Climb the batch was judged with
+        """
+        for offset, mutated_content in enumerate(judged):
+            climb.trace(f'Iteration: {generation + offset}')
+            climb.trace('===== new mutant =====')
+            climb.trace(mutated_content)
+            climb.trace('===== new =====')
+            if offset == kept:
+                self.creature_content = mutated_content
+                climb.trace('===== succeeded - new creature =====')
+                climb.trace(self.creature_content)
+                climb.trace('===== succeeded =====')
+                continue
+            if self._compiles(mutated_content):
+                self.stats.test_rejected += 1
+                climb.trace('===== failed - reverting to this =====')
+            else:
+                self.stats.syntax_rejected += 1
+                climb.trace('===== failed to compile - keeping this =====' if climb.compile_gate
+                            else '===== failed - reverting to this =====')
+            climb.trace(self.creature_content)
+            climb.trace('===== failed =====')
+
+    def _copy_work_dir(self, directory):
+        """ Makes a private copy of this run's working directory, to judge a
+            mutant in without touching the run's own.
+        :return: The copy's path
+        """
+        os.makedirs(directory)
+        for entry in os.listdir(self.work_dir):
+            if os.path.isfile(self.in_work_dir(entry)):
+                shutil.copy(self.in_work_dir(entry), directory)
+        return directory
+
+    def _first_survivor(self, candidates, slots, climb):
+        """ Judges candidates concurrently, each in its own slot, and stops
+            the rest as soon as the first in order survives.
+        :return: Index of the first candidate to survive, or None
+        """
+        running = []
+        for content, slot in zip(candidates, slots):
+            if climb.compile_gate and not self._compiles(content):
+                running.append(None)
+                continue
+            self.save_mutant(content, slot)
+            running.append(climb.launch(content, slot))
+        survivor = None
+        for index, selector in enumerate(running):
+            if selector is None:
+                continue
+            if survivor is not None:
+                selector.kill()
+                selector.wait()
+            elif selector.wait() == 0:
+                survivor = index
+        return survivor
+
+
+# The spelling list. It is read from wordsEn.txt if that has been extracted,
+# and otherwise straight out of the zip, which is no longer extracted at all.
+# Note the capitalisation: the archive contains 'wordsEn.txt', and the original
+# code looked for 'wordsEN.txt', which only worked because Windows filenames are
+# case-insensitive. On Linux it extracted the zip and then failed to find what
+# it had just extracted, on every single run.
+#
+# Whichever it came from, the list is then pickled as a frozenset into
+# wordsEn.pickle, which loads faster than either can be parsed. The index is
+# rebuilt whenever the list it came from is newer than it.
+_WORD_LIST = os.path.join(HERE, 'wordsEn.txt')
+_WORD_ZIP = os.path.join(HERE, 'wordsEn.zip')
+_WORD_INDEX = os.path.join(HERE, 'wordsEn.pickle')
+
+
+def word_source():
+    """ :return: The file the spelling list is read from, which need not exist """
+    return _WORD_LIST if os.path.exists(_WORD_LIST) else _WORD_ZIP
+
+
+@functools.lru_cache(maxsize=None)
+def _words():
+    """ Every word in the spelling list, loaded once per process.
+    :return: frozenset of words
+    """
+    source = word_source()
+    if not os.path.exists(source):
+        print(f'For spell checking, we need {_WORD_ZIP} from '
+              'http://www-01.sil.org/linguistics/wordlists/english/wordlist/'
+              'wordsEn.zip.  Did not find this file.')
+        raise FileNotFoundError('Dictionary zip file missing.')
+    words = _read_word_index(source)
+    if words is None:
+        words = _read_word_list(source)
+        _write_word_index(words)
+    return words
+
+
+def _read_word_index(source):
+    """ :return: The pickled words, or None if the index is missing, older
+        than source, or damaged """
+    try:
+        if os.path.getmtime(_WORD_INDEX) < os.path.getmtime(source):
+            return None
+        with open(_WORD_INDEX, 'rb') as handle:
+            words = pickle.load(handle)
+    # A damaged pickle can raise almost anything; whatever it raises, the
+    # index is simply rebuilt from the list.
+    except Exception:  # pylint: disable=broad-except
+        return None
+    return words if isinstance(words, frozenset) else None
+
+
+def _read_word_list(source):
+    """ Parses the spelling list, from wordsEn.txt or from inside the zip.
+    :return: frozenset of words
+    """
+    if source == _WORD_LIST:
+        with open(source, encoding='utf-8') as word_file:
+            return frozenset(x.strip() for x in word_file)
+    if not zipfile.is_zipfile(source):
+        print(f'It appears that {source} is not a valid zip file.')
+        raise ValueError('Dictionary zip file invalid.')
+    with zipfile.ZipFile(source) as zip_file:
+        text = zip_file.read('wordsEn.txt').decode('utf-8')
+    return frozenset(x.strip() for x in text.splitlines())
+
+
+def _write_word_index(words):
+    """ Saves the words for the next process. A directory that cannot be
+        written to just goes without the index. """
+    try:
+        descriptor, temporary = tempfile.mkstemp(dir=HERE, prefix='.wordsEn-')
+    except OSError:
+        return
+    try:
+        # mkstemp makes it private to this user; it is no secret.
+        os.fchmod(descriptor, 0o644)
+        with os.fdopen(descriptor, 'wb') as handle:
+            pickle.dump(words, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        # Whole or not at all, even with several processes writing it at once.
+        os.replace(temporary, _WORD_INDEX)
+    except OSError:
+        os.unlink(temporary)
+
 
 class Dictionary:  # pylint: disable=too-few-public-methods
-    """ This is a simple dictionary. """
+    """ This is a simple dictionary. Every instance in a process shares one
+        set of words, so only the first costs anything to make. """
     def __init__(self):
         """ Set up the dictionary.
             :return: None
         """
-        # Make sure we have our spelling list extracted. Note the capitalisation:
-        # the archive contains 'wordsEn.txt', and the original code looked for
-        # 'wordsEN.txt', which only worked because Windows filenames are
-        # case-insensitive. On Linux it extracted the zip and then failed to find
-        # what it had just extracted, on every single run.
-        txt_name = os.path.join(HERE, 'wordsEn.txt')
-        if not os.path.exists(txt_name):
-            zip_name = os.path.join(HERE, 'wordsEn.zip')
-            if os.path.exists(zip_name):
-                if zipfile.is_zipfile(zip_name):
-                    with zipfile.ZipFile(zip_name) as zip_file:
-                        zip_file.extractall(HERE)
-                else:
-                    print(f'It appears that {zip_name} is not a valid zip file.')
-                    raise ValueError('Dictionary zip file invalid.')
-            else:
-                print(f'For spell checking, we need {zip_name} from '
-                      'http://www-01.sil.org/linguistics/wordlists/english/wordlist/'
-                      'wordsEn.zip.  Did not find this file.')
-                raise FileNotFoundError('Dictionary zip file missing.')
-        with open(txt_name, encoding='utf-8') as word_file:
-            self.all_words = [x.strip() for x in word_file]
+        self.all_words = _words()
 
     def spelled_correctly(self, sentence):
         """ spelled_correctly - Spell check
@@ -315,6 +674,150 @@ class Dictionary:  # pylint: disable=too-few-public-methods
         return True
 
 
+def _warm_selector_imports():
+    """ Imports what the selectors import, so that forks inherit it. """
+    if HERE not in sys.path:
+        sys.path.append(HERE)
+    for name in _SELECTOR_IMPORTS:
+        importlib.import_module(name)
+    # And test_english's dictionary, in the copy of mutate it will import.
+    sys.modules['mutate'].Dictionary()
+
+
+class _ForkedSelector:
+    """ A selector running in a child forked from this process.
+
+        The child is set up as `python cmd` in work_dir would be: its output
+        thrown away, work_dir first on sys.path with the legacy directory after
+        it, cmd run as __main__, and a freshly seeded random module. This
+        process never imports a mutant, so each child imports the one just
+        written, and whatever a mutant or its test does to the modules it
+        imports dies with the child.
+
+        It has the two parts of subprocess.Popen that mutate uses, wait() and
+        kill(), so a selector of either kind is waited for the same way.
+    """
+
+    def __init__(self, work_dir, cmd):
+        """
+        :param work_dir: The directory holding the mutant
+        :param cmd: Bare filename of the script to run there
+        """
+        self.returncode = None
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self.pid = os.fork()
+        if self.pid == 0:
+            status = 1
+            try:
+                status = _selector_child(work_dir, cmd)
+            finally:
+                # Straight out, so the child never runs this process's atexit
+                # handlers or flushes its buffers a second time.
+                os._exit(status)  # pylint: disable=protected-access
+
+    def wait(self):
+        """ Waits for the child to finish.
+        :return: Its exit status as subprocess would give it: what it passed to
+            sys.exit(), 1 if it raised, minus the signal if one killed it
+        """
+        if self.returncode is None:
+            _, status = os.waitpid(self.pid, 0)
+            self.returncode = os.waitstatus_to_exitcode(status)
+        return self.returncode
+
+    def kill(self):
+        """ Kills the child, if it has not already been waited for. """
+        if self.returncode is None:
+            os.kill(self.pid, signal.SIGKILL)
+
+
+class _CachedSelector:
+    """ A selector seen through a SelectorCache: a verdict already known is
+        given without running anything, and a new one is remembered once the
+        selector has given it. It has the same wait() and kill() as the
+        selector it stands for. A killed selector gave no verdict, so nothing
+        is remembered for it.
+    """
+
+    def __init__(self, cache, content, start):
+        """
+        :param cache: The SelectorCache
+        :param content: The mutant's text
+        :param start: Starts the selector, if it has to be run after all
+        """
+        self._cache = cache
+        self._content = content
+        self._killed = False
+        known = cache.lookup(content)
+        self._selector = start() if known is None else None
+        self.returncode = None if known is None else (0 if known else 1)
+
+    def wait(self):
+        """ :return: The selector's exit status, 0 if the mutant survives """
+        if self.returncode is None:
+            self.returncode = self._selector.wait()
+            if not self._killed:
+                self._cache.record(self._content, self.returncode == 0)
+        return self.returncode
+
+    def kill(self):
+        """ Kills the selector, if one is running. """
+        if self.returncode is None:
+            self._killed = True
+            self._selector.kill()
+
+
+def _run_forked(work_dir, cmd):
+    """ Runs a selector in a child forked from this process.
+    :param work_dir: The run's working directory
+    :param cmd: Bare filename of the script to run there
+    :return: The child's exit status, as _ForkedSelector.wait()
+    """
+    return _ForkedSelector(work_dir, cmd).wait()
+
+
+def _selector_child(work_dir, cmd):
+    """ The forked child's side of _ForkedSelector.
+    :return: Its exit status
+    """
+    random.seed()
+    return run_as_main(work_dir, [cmd], functools.partial(runpy.run_path, cmd, run_name='__main__'),
+                       [work_dir, HERE])
+
+
+def run_as_main(directory, argv, start, path):
+    """ Runs a script or module in this process as `python` would run it in a
+        process of its own: in directory, with argv as sys.argv, path ahead of
+        the rest of sys.path, and its output thrown away. Meant for a freshly
+        forked child, whose state it changes for good; the selector forks and
+        lintd's forks both use it.
+    :param directory: The working directory to run it in
+    :param argv: Its sys.argv
+    :param start: Runs it as __main__, as runpy does
+    :param path: Directories to put first on sys.path
+    :return: The exit status an interpreter would have given
+    """
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    sys.stdout = sys.stderr = open(os.devnull, 'w', encoding='utf-8')  # pylint: disable=consider-using-with
+    os.chdir(directory)
+    sys.path[:0] = path
+    sys.argv = argv
+    try:
+        start()
+    except SystemExit as leaving:
+        if leaving.code is None:
+            return 0
+        return leaving.code if isinstance(leaving.code, int) else 1
+    # A script can fail by raising anything at all, and an interpreter
+    # reports every one of them the same way: exit status 1.
+    except BaseException:  # pylint: disable=broad-except
+        return 1
+    return 0
+
+
 def main(arguments):
     """ Entry point for command line. """
     major = 0
@@ -341,6 +844,18 @@ def main(arguments):
                              'Mean span is 1/p, so lower values make large-scale '
                              'duplication reachable.',
                         type=float, default=DEFAULT_SPAN_PROBABILITY)
+    parser.add_argument("--compile-gate",
+                        help='Reject mutants that do not compile before running the '
+                             'selector on them.  Same results, far fewer subprocesses.',
+                        action="store_true")
+    parser.add_argument("--selector",
+                        help='How to run the selector: a new interpreter per mutant, or a '
+                             'fork of this one.  Same results; fork is faster.',
+                        choices=SELECTORS, default='subprocess')
+    parser.add_argument("--speculate",
+                        help='Judge this many mutants at once, each in its own copy of '
+                             'the directory.  Same results as one at a time.',
+                        type=int, default=1)
     args = parser.parse_args(arguments)
 
     print(f'args: {args}')
@@ -356,7 +871,9 @@ def main(arguments):
     weights = LEGACY_MUTATION_WEIGHTS if args.legacy_operators else DEFAULT_MUTATION_WEIGHTS
     print(f'operators: {sorted(name for name, w in weights.items() if w > 0)}')
     creature.mutate(args.mutations, args.no_environment, args.no_keywords,
-                    mutation_weights=weights, span_probability=args.span_probability)
+                    mutation_weights=weights, span_probability=args.span_probability,
+                    compile_gate=args.compile_gate, selector=args.selector,
+                    speculation=args.speculate)
 
 
 if __name__ == "__main__":
@@ -11,6 +11,7 @@ identical inputs produce exactly one result directory.
 """
 
 import argparse
+import contextlib
 import dataclasses
 import difflib
 import json
@@ -20,7 +21,9 @@ import shutil
 import subprocess
 import sys
 
+import lintd
 import mutate
+import selector_cache
 
 HERE = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_RESULTS_ROOT = os.path.join(os.path.dirname(HERE), 'results')
@@ -33,17 +36,31 @@ DEFAULT_RESULTS_ROOT = os.path.join(os.path.dirname(HERE), 'results')
 # self_mutator.py is the abandoned 2017 self-replication attempt. It does not
 # run at all (see legacy/README.md section D) and is the starting point for
 # phase 2 of the roadmap rather than something to mutate.
-_NOT_EXPERIMENTS = {'mutate.py', 'run.py', 'summarize.py', 'self_mutator.py'}
+_NOT_EXPERIMENTS = {'mutate.py', 'run.py', 'summarize.py', 'self_mutator.py',
+                    'selector_cache.py', 'lintd.py'}
+
+# The experiments whose selectors run pylint, through lintd.lint(), and so are
+# worth starting a lint daemon for. test_run.py checks this against what the
+# test files actually call, so a new one that lints fails the suite rather than
+# silently going without.
+_LINTED_EXPERIMENTS = {'english', 'hello_world_tested'}
+
+# Where run_experiment keeps selector verdicts, shared by every run under a
+# results root. See selector_cache.py.
+SELECTOR_CACHE_FILE = 'selector-cache.sqlite'
 
 
 @dataclasses.dataclass
 class RunResult:
-    """ What a completed run produced. """
+    """ What a completed run produced. Failed mutations are either
+        syntax-rejected, not Python at all, or test-rejected by the selector. """
     experiment: str
     seed: int
     directory: str
     successful_mutations: int
     failed_mutations: int
+    syntax_rejected: int = 0
+    test_rejected: int = 0
 
 
 def available_experiments():
@@ -136,13 +153,37 @@ def _prepare_directory(experiment, key, results_root):
     return directory
 
 
-# Eight keyword-only knobs, each of which a caller legitimately varies per run.
-# Bundling them into a config object would add indirection without removing a
-# decision, so the limit is waived rather than worked around.
+@dataclasses.dataclass(frozen=True)
+class Speedups:
+    """ How fast a run goes, as opposed to what it produces. None of these
+        changes a run's result, so none of them is part of its directory name.
+
+        compile_gate        reject mutants that do not compile without running
+                            the selector
+        selector_mode       how the selector is run, one of mutate.SELECTORS
+        speculation         how many mutants to judge at once
+        use_selector_cache  take verdicts on mutants seen before from the
+                            results root's selector cache rather than running
+                            their selectors; off, every selector is run, for an
+                            audit of the cache itself
+        lint_daemon         for an experiment whose selector runs pylint, keep
+                            one pylint loaded for the whole run in a lintd
+                            daemon
+    """
+    compile_gate: bool = False
+    selector_mode: str = 'subprocess'
+    speculation: int = 1
+    use_selector_cache: bool = True
+    lint_daemon: bool = True
+
+
+# Eight keyword-only knobs, each of which changes what a run produces and so
+# is a decision the caller has to make. The ones that only change how fast it
+# goes are gathered into Speedups.
 def run_experiment(experiment, *, seed, generations,  # pylint: disable=too-many-arguments
                    results_root=DEFAULT_RESULTS_ROOT, legacy_operators=False,
                    span_probability=mutate.DEFAULT_SPAN_PROBABILITY,
-                   use_keywords=True, quiet=False):
+                   use_keywords=True, quiet=False, **speedups):
     """ Runs one experiment and records everything needed to reproduce it.
     :param experiment: Experiment name, from available_experiments()
     :param seed: Random seed; the same seed reproduces the same result
@@ -152,8 +193,10 @@ def run_experiment(experiment, *, seed, generations,  # pylint: disable=too-many
     :param span_probability: Geometric parameter for delete/duplicate spans
     :param use_keywords: Include Python keywords in the mutation alphabet
     :param quiet: Suppress the per-generation trace
+    :param speedups: Any of the fields of Speedups
     :return: A RunResult
     """
+    speed = Speedups(**speedups)
     if experiment not in available_experiments():
         raise ValueError(
             f'Unknown experiment {experiment!r}. '
@@ -170,13 +213,12 @@ def run_experiment(experiment, *, seed, generations,  # pylint: disable=too-many
     creature = mutate.Creature(f'{experiment}.py', work_dir=directory)
     start_content = creature.creature_content
 
-    random.seed(seed)
-    successful, failed = creature.mutate(
-        generations, False, use_keywords,
-        mutation_weights=weights, span_probability=span_probability, quiet=quiet)
-    end_content = creature.creature_content
+    outcome = _evolve(creature, experiment, speed, results_root, seed=seed,
+                      mutations=generations, no_environment=False,
+                      use_keywords=use_keywords, mutation_weights=weights,
+                      span_probability=span_probability, quiet=quiet)
 
-    _write_outputs(directory, experiment, start_content, end_content)
+    _write_outputs(directory, experiment, start_content, creature.creature_content)
     _write_manifest(directory, {
         'experiment': experiment,
         'seed': seed,
@@ -188,12 +230,96 @@ def run_experiment(experiment, *, seed, generations,  # pylint: disable=too-many
         'python_version': sys.version.split()[0],
         'pylint_version': _pylint_version(),
         'git_sha': _git_sha(),
-        'successful_mutations': successful,
-        'failed_mutations': failed,
+        **outcome,
         'start_bytes': len(start_content),
-        'end_bytes': len(end_content),
+        'end_bytes': len(creature.creature_content),
     })
-    return RunResult(experiment, seed, directory, successful, failed)
+    return RunResult(experiment, seed, directory, outcome['successful_mutations'],
+                     outcome['failed_mutations'], creature.stats.syntax_rejected,
+                     creature.stats.test_rejected)
+
+
+def _evolve(creature, experiment, speed, results_root, *, seed, **options):
+    """ Mutates a creature with whatever speedups were asked for, seeding the
+        random stream just before it starts.
+    :param speed: Speedups
+    :param options: Arguments for Creature.mutate
+    :return: The run's outcome, as manifest entries
+    """
+    with contextlib.ExitStack() as stack:
+        cache = None
+        if speed.use_selector_cache:
+            cache = stack.enter_context(_open_selector_cache(experiment, creature, results_root))
+        daemon = None
+        if (speed.lint_daemon and experiment in _LINTED_EXPERIMENTS
+                and _pylint_version() is not None):
+            daemon = stack.enter_context(lintd.LintDaemon())
+        random.seed(seed)
+        successful, failed = creature.mutate(
+            compile_gate=speed.compile_gate, selector=speed.selector_mode,
+            speculation=speed.speculation, selector_cache=cache, **options)
+    return {
+        'successful_mutations': successful,
+        'failed_mutations': failed,
+        'compile_gate': speed.compile_gate,
+        'selector_mode': speed.selector_mode,
+        'speculation': speed.speculation,
+        'selector_cache': cache.path if cache else None,
+        'cache_hits': cache.hits if cache else 0,
+        'cache_misses': cache.misses if cache else 0,
+        'lint_daemon': {'pylint_version': daemon.version} if daemon else None,
+        **dataclasses.asdict(creature.stats),
+    }
+
+
+def _open_selector_cache(experiment, creature, results_root):
+    """ Opens results_root's selector cache for one experiment's selector.
+    :return: A selector_cache.SelectorCache
+    """
+    selector = None
+    if has_selector(experiment):
+        with open(creature.in_work_dir(creature.test_path), encoding='utf-8') as handle:
+            selector = handle.read()
+    return selector_cache.SelectorCache(
+        os.path.join(results_root, SELECTOR_CACHE_FILE), experiment=experiment,
+        selector=selector, python_version=sys.version.split()[0],
+        pylint_version=_pylint_version(), inputs=_selector_inputs(creature.work_dir))
+
+
+def _selector_inputs(directory):
+    """ Everything besides its test file that decides what a selector makes of
+        a mutant, so that editing any of it starts the selector cache afresh:
+        mutate.py, which runs every selector and spell-checks english; the
+        word list it checks against; and whatever configuration pylint would
+        read, linting in the run's directory.
+    :param directory: Where the selectors run
+    :return: List of the files' contents, as bytes; an absent file counts as
+        empty
+    """
+    inputs = []
+    for path in (mutate.__file__, mutate.word_source(), _pylint_config(directory)):
+        if path is None or not os.path.isfile(path):
+            inputs.append(b'')
+            continue
+        with open(path, 'rb') as handle:
+            inputs.append(handle.read())
+    return inputs
+
+
+def _pylint_config(directory):
+    """ :return: The configuration file pylint would read if run in
+        directory, or None if it would read none or is not installed """
+    try:
+        # pylint: disable-next=import-outside-toplevel
+        from pylint.config import find_default_config_files
+    except ImportError:
+        return None
+    previous = os.getcwd()
+    os.chdir(directory)
+    try:
+        return next(iter(find_default_config_files()), None)
+    finally:
+        os.chdir(previous)
 
 
 def _write_manifest(directory, manifest):
@@ -241,6 +367,23 @@ def main(arguments):
                         help='Geometric parameter for delete/duplicate span length.')
     parser.add_argument('--no-keywords', dest='use_keywords', action='store_false',
                         help="Don't use python keywords as mutations.")
+    parser.add_argument('--compile-gate', action='store_true',
+                        help='Reject mutants that do not compile before running the '
+                             'selector on them. Same results, far fewer subprocesses.')
+    parser.add_argument('--selector', dest='selector_mode', choices=mutate.SELECTORS,
+                        default='subprocess',
+                        help='Run each selector in a new interpreter, or in a fork of '
+                             'this one. Same results; fork is faster.')
+    parser.add_argument('--speculate', dest='speculation', type=int, default=1,
+                        help='Judge this many mutants at once, each in its own copy of '
+                             'the run directory. Same results as one at a time.')
+    parser.add_argument('--no-selector-cache', dest='use_selector_cache',
+                        action='store_false',
+                        help='Run the selector on every mutant, even ones judged in '
+                             'earlier runs, to audit the cache.')
+    parser.add_argument('--no-lint-daemon', dest='lint_daemon', action='store_false',
+                        help='Start pylint afresh for every mutant rather than keeping '
+                             'one loaded for the run.')
     parser.add_argument('--verbose', action='store_true',
                         help='Print every generation rather than a summary.')
     args = parser.parse_args(arguments)
@@ -262,9 +405,12 @@ def main(arguments):
             legacy_operators=args.legacy_operators,
             span_probability=args.span_probability,
             use_keywords=args.use_keywords,
-            quiet=not args.verbose)
+            quiet=not args.verbose, compile_gate=args.compile_gate,
+            selector_mode=args.selector_mode, speculation=args.speculation,
+            use_selector_cache=args.use_selector_cache, lint_daemon=args.lint_daemon)
         print(f'{result.experiment:24} '
               f'accepted {result.successful_mutations:5} / {args.generations:<5} '
+              f'(rejected {result.syntax_rejected} syntax, {result.test_rejected} test) '
               f'-> {result.directory}')
     return 0
 
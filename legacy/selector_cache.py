@@ -0,0 +1,124 @@
+""" selector_cache.py - remembers which mutants each selector passed.
+
+The operators regenerate the same text far more often than chance would
+suggest. Deleting a character and then putting the same one back, or
+duplicating a span that a later delete removes, gives a mutant byte for byte
+identical to one already judged. A selector is a fresh process every time, so
+every repeat used to cost a full selector run to get an answer already known.
+
+SelectorCache keeps those answers in a SQLite file, by default
+results/selector-cache.sqlite, shared by every seed and every run of every
+experiment. An answer is keyed by everything that decides it:
+
+    experiment       which experiment the mutant belongs to
+    selector_sha     SHA-256 of the test file and of every other file the
+                     verdicts depend on, such as mutate.py and pylint's
+                     configuration (run.py says which), or '' when the
+                     mutant's own execution is the selector and nothing else
+                     is
+    python_version   the interpreter that ran the selector
+    pylint_version   pylint is a selector in two experiments; '' if absent
+    mutant_sha       SHA-256 of the mutant's text
+
+so an edited test file or word list, a different Python or a different pylint
+starts from nothing rather than trusting answers it never gave. The selectors are
+deterministic, which is what makes an answer worth keeping. A mutant that
+behaved differently from run to run would be remembered as whatever it did
+first, which is why run.py can turn the cache off for an audit.
+
+The file uses SQLite's write-ahead log, so runs going at once share it: each
+answer is committed as it is learnt, and readers never wait for writers.
+"""
+
+import hashlib
+import sqlite3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outcomes (
+    experiment TEXT NOT NULL,
+    selector_sha TEXT NOT NULL,
+    python_version TEXT NOT NULL,
+    pylint_version TEXT NOT NULL,
+    mutant_sha TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    PRIMARY KEY (experiment, selector_sha, python_version, pylint_version, mutant_sha)
+)
+"""
+
+
+def _sha(text):
+    """ :return: The SHA-256 of some text, in hex """
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def _selector_sha(selector, inputs):
+    """ :return: The hash of a selector and the files its verdicts depend on,
+        or '' if there is neither """
+    if selector is None and not inputs:
+        return ''
+    return _sha('\n'.join([_sha(selector or '')]
+                          + [hashlib.sha256(data).hexdigest() for data in inputs]))
+
+
+class SelectorCache:
+    """ One experiment's view of the shared cache of selector outcomes. """
+
+    # One knob per part of the key, each of which a caller must supply.
+    def __init__(self, path, *, experiment, selector,  # pylint: disable=too-many-arguments
+                 python_version, pylint_version, inputs=()):
+        """
+        :param path: The SQLite file, created if it does not exist
+        :param experiment: Experiment name
+        :param selector: Text of the experiment's test file, or None if the
+            mutant's own execution is the selector
+        :param python_version: Version of the Python that runs the selector
+        :param pylint_version: Version of pylint, or None if not installed
+        :param inputs: Contents, as bytes, of every other file the verdicts
+            depend on
+        """
+        self.path = path
+        self._context = (experiment, _selector_sha(selector, inputs),
+                         python_version, pylint_version or '')
+        self.hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(path, timeout=60)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        with self._connection:
+            self._connection.execute(_SCHEMA)
+
+    def lookup(self, content):
+        """ The selector's verdict on a mutant, if it has been judged before.
+        :param content: The mutant's text
+        :return: True or False, or None if it has not been seen
+        """
+        row = self._connection.execute(
+            'SELECT passed FROM outcomes WHERE experiment = ? AND selector_sha = ? '
+            'AND python_version = ? AND pylint_version = ? AND mutant_sha = ?',
+            self._context + (_sha(content),)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return bool(row[0])
+
+    def record(self, content, passed):
+        """ Remembers the selector's verdict on a mutant.
+        :param content: The mutant's text
+        :param passed: True if it survived
+        :return: None
+        """
+        with self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?, ?, ?)',
+                self._context + (_sha(content), int(passed)))
+
+    def close(self):
+        """ Closes the file. """
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,15 +1,14 @@
 import unittest
-import subprocess
-import sys
 
 import mutated_english
 import mutate
+import lintd
 
 
 class TestEnglish(unittest.TestCase):
     def test_return(self):
         self.assertTrue(mutate.Dictionary().spelled_correctly(mutated_english.QUOTE))
-        self.assertEqual(0, subprocess.call([sys.executable, '-m', 'pylint', 'mutated_english.py']))
+        self.assertEqual(0, lintd.lint('mutated_english.py'))
 
 
 if __name__ == '__main__':
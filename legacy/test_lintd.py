@@ -0,0 +1,131 @@
+"""Tests for the lint daemon.
+
+pylint itself need not be installed: the daemon runs any module as python -m
+would, so most of these use a stand-in linter that does whatever the file it
+is given says. What matters is that asking the daemon gives the same exit
+status as running the command.
+"""
+
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import lintd
+
+FAKE_LINTER = {
+    '__init__.py': "__version__ = '0.1'\n",
+    '__main__.py': 'import sys\n'
+                   'with open(sys.argv[1], encoding="utf-8") as handle:\n'
+                   '    exec(handle.read())\n',
+}
+
+
+class LintdTestCase(unittest.TestCase):
+    """A scratch directory holding fakelint, on PYTHONPATH."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='mutate-lintd-')
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        os.makedirs(os.path.join(self.root, 'fakelint'))
+        for name, text in FAKE_LINTER.items():
+            self.write(os.path.join('fakelint', name), text)
+        patcher = mock.patch.dict(os.environ, {'PYTHONPATH': os.pathsep.join(
+            filter(None, [self.root, os.environ.get('PYTHONPATH')]))})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        os.environ.pop(lintd.LINTD_SOCKET, None)
+
+    def write(self, name, text):
+        """Writes a file under the test's root; returns its relative name."""
+        with open(os.path.join(self.root, name), 'w', encoding='utf-8') as handle:
+            handle.write(text)
+        return name
+
+    def command(self, module, name):
+        """The exit status of `python -m module name`, run in the root."""
+        return subprocess.call([sys.executable, '-m', module, name], cwd=self.root,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def lint(self, name):
+        """Calls lintd.lint from the root, as a selector would."""
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        try:
+            return lintd.lint(name)
+        finally:
+            os.chdir(cwd)
+
+
+class TestDaemon(LintdTestCase):
+
+    def test_exit_statuses_match_the_command(self):
+        files = {'pass.py': 'print("fine")',
+                 'exit.py': 'sys.exit(3)',
+                 'message.py': 'sys.exit("no")',
+                 'raise.py': 'raise ValueError("no")',
+                 'import.py': 'import helper; sys.exit(helper.CODE)'}
+        self.write('helper.py', 'CODE = 5\n')
+        expected = {name: self.command('fakelint', self.write(name, text))
+                    for name, text in files.items()}
+        self.assertEqual({'pass.py': 0, 'exit.py': 3, 'message.py': 1, 'raise.py': 1,
+                          'import.py': 5}, expected)
+        with lintd.LintDaemon('fakelint') as daemon:
+            self.assertEqual('0.1', daemon.version)
+            self.assertEqual(expected, {name: self.lint(name) for name in files})
+
+    def test_each_request_sees_the_file_as_it_is_now(self):
+        with lintd.LintDaemon('fakelint'):
+            for code in (2, 4):
+                self.write('mutant.py', f'sys.exit({code})')
+                self.assertEqual(code, self.lint('mutant.py'))
+
+    def test_the_socket_is_advertised_only_while_the_daemon_runs(self):
+        with lintd.LintDaemon('fakelint'):
+            socket_path = os.environ[lintd.LINTD_SOCKET]
+            self.assertTrue(os.path.exists(socket_path))
+        self.assertNotIn(lintd.LINTD_SOCKET, os.environ)
+        self.assertFalse(os.path.exists(os.path.dirname(socket_path)))
+
+    def test_a_linter_that_cannot_start_is_reported(self):
+        with self.assertRaises(RuntimeError), \
+                mock.patch.object(lintd, 'STARTUP_SECONDS', 10):
+            with lintd.LintDaemon('no_such_linter'):
+                pass
+        self.assertNotIn(lintd.LINTD_SOCKET, os.environ)
+
+
+class TestFallback(LintdTestCase):
+
+    def test_without_a_daemon_pylint_is_run_directly(self):
+        self.write('mutant.py', '"""Nothing."""\n')
+        self.assertEqual(self.command('pylint', 'mutant.py'), self.lint('mutant.py'))
+
+    def test_an_unreachable_daemon_is_worked_around(self):
+        self.write('mutant.py', '"""Nothing."""\n')
+        os.environ[lintd.LINTD_SOCKET] = os.path.join(self.root, 'gone.sock')
+        self.assertEqual(self.command('pylint', 'mutant.py'), self.lint('mutant.py'))
+
+
+@unittest.skipIf(importlib.util.find_spec('pylint') is None,
+                 'pylint not installed; see requirements.txt')
+class TestPylint(LintdTestCase):
+
+    def test_the_daemon_lints_as_pylint_does(self):
+        files = {'clean.py': '""" Clean. """\n',
+                 'unused.py': '""" Unused. """\nimport os\n',
+                 'broken.py': 'def f(:\n'}
+        for name, text in files.items():
+            self.write(name, text)
+        expected = {name: self.command('pylint', name) for name in files}
+        with lintd.LintDaemon() as daemon:
+            self.assertIsNotNone(daemon.version)
+            self.assertEqual(expected, {name: self.lint(name) for name in files})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,12 @@
 import importlib.util
+import os
+import shutil
 import subprocess
 import sys
+import tempfile
+import time
 import unittest
+from unittest import mock
 
 import mutate
 
@@ -58,5 +63,134 @@ class TestMutate(unittest.TestCase):
         self.assertEqual(0, subprocess.call([sys.executable, '-m', 'pylint', 'mutate.py']))
 
 
+class TestDictionary(unittest.TestCase):
+    """The spelling list, its index, and the one copy of it a process keeps."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='mutate-words-')
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        shutil.copy(os.path.join(mutate.HERE, 'wordsEn.zip'), self.root)
+        self.paths = {name: os.path.join(self.root, os.path.basename(getattr(mutate, name)))
+                      for name in ('_WORD_LIST', '_WORD_ZIP', '_WORD_INDEX')}
+        for name, path in self.paths.items():
+            patcher = mock.patch.object(mutate, name, path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def load(self):
+        """Loads the words afresh, as a new process would."""
+        # Past the per-process cache, which is the only way to load them twice.
+        return mutate._words.__wrapped__()  # pylint: disable=protected-access
+
+    def age(self, name, seconds):
+        """Backdates one of the word files by some seconds."""
+        path = self.paths[name]
+        os.utime(path, (time.time() - seconds, time.time() - seconds))
+
+    def test_every_dictionary_shares_one_set_of_words(self):
+        self.assertIs(mutate.Dictionary().all_words, mutate.Dictionary().all_words)
+
+    def test_the_index_is_built_from_the_zip_without_extracting_it(self):
+        words = self.load()
+        self.assertIsInstance(words, frozenset)
+        self.assertIn('hello', words)
+        self.assertTrue(os.path.exists(self.paths['_WORD_INDEX']))
+        self.assertFalse(os.path.exists(self.paths['_WORD_LIST']))
+        self.assertEqual(words, self.load())
+
+    def test_a_fresh_index_is_read_rather_than_the_list(self):
+        self.load()
+        with mock.patch.object(mutate, '_read_word_list') as read_word_list:
+            self.load()
+        read_word_list.assert_not_called()
+
+    def test_an_extracted_list_newer_than_the_index_replaces_it(self):
+        self.load()
+        self.age('_WORD_INDEX', 60)
+        with open(self.paths['_WORD_LIST'], 'w', encoding='utf-8') as handle:
+            handle.write('only\nthese\n')
+        self.assertEqual(frozenset({'only', 'these'}), self.load())
+        self.assertEqual(frozenset({'only', 'these'}), self.load())
+
+    def test_a_damaged_index_is_rebuilt(self):
+        with open(self.paths['_WORD_INDEX'], 'wb') as handle:
+            handle.write(b'not a pickle')
+        self.assertIn('hello', self.load())
+
+    def test_a_missing_list_is_reported(self):
+        os.unlink(self.paths['_WORD_ZIP'])
+        with mock.patch('builtins.print'), self.assertRaises(FileNotFoundError):
+            self.load()
+
+
+class TestForkedSelector(unittest.TestCase):
+    """A forked selector must pass and fail exactly what a new interpreter would."""
+
+    # These hold the forked runner up against the subprocess one directly,
+    # below mutate(), so that a difference is pinned to the script causing it.
+    # pylint: disable=protected-access
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='mutate-fork-')
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        self.creature = mutate.Creature.__new__(mutate.Creature)
+        self.creature.work_dir = self.work_dir
+        self.creature.stats = mutate.MutationStats()
+
+    def script(self, text):
+        """Writes a selector into the work dir; returns its name."""
+        with open(os.path.join(self.work_dir, 'selector.py'), 'w', encoding='utf-8') as handle:
+            handle.write(text)
+        return 'selector.py'
+
+    def test_exit_statuses_match_a_new_interpreter(self):
+        scripts = ['pass',
+                   'import sys; sys.exit()',
+                   'import sys; sys.exit(3)',
+                   'import sys; sys.exit("a message")',
+                   'raise ValueError("no")',
+                   'import os; os._exit(4)',
+                   'def f(:',
+                   'import os, signal; os.kill(os.getpid(), signal.SIGTERM)',
+                   'print("noise"); import sys; print("more", file=sys.stderr)']
+        for text in scripts:
+            with self.subTest(script=text):
+                cmd = self.script(text)
+                self.assertEqual(self.creature._selector_passes(cmd),
+                                 self.creature._forked_selector_passes(cmd))
+                self.assertEqual(subprocess.call([sys.executable, cmd], cwd=self.work_dir,
+                                                 stdout=subprocess.DEVNULL,
+                                                 stderr=subprocess.DEVNULL),
+                                 mutate._run_forked(self.work_dir, cmd))
+
+    def test_the_selector_runs_as_main_in_the_work_dir(self):
+        with open(os.path.join(self.work_dir, 'mutated_x.py'), 'w', encoding='utf-8') as handle:
+            handle.write('VALUE = 7\n')
+        cmd = self.script('import os, sys, mutated_x\n'
+                          'assert __name__ == "__main__"\n'
+                          'assert sys.argv == ["selector.py"]\n'
+                          f'assert os.getcwd() == {os.path.realpath(self.work_dir)!r}\n'
+                          'sys.exit(mutated_x.VALUE)\n')
+        self.assertEqual(7, mutate._run_forked(self.work_dir, cmd))
+
+    def test_each_mutant_is_imported_afresh(self):
+        mutant = os.path.join(self.work_dir, 'mutated_x.py')
+        cmd = self.script('import sys, mutated_x; sys.exit(mutated_x.VALUE)')
+        for value in (1, 2, 3):
+            with open(mutant, 'w', encoding='utf-8') as handle:
+                handle.write(f'VALUE = {value}\n')
+            self.assertEqual(value, mutate._run_forked(self.work_dir, cmd))
+        self.assertNotIn('mutated_x', sys.modules)
+
+    def test_a_selector_cannot_change_this_process(self):
+        cmd = self.script('import mutate; mutate.DEFAULT_SPAN_PROBABILITY = 9')
+        mutate._run_forked(self.work_dir, cmd)
+        self.assertEqual(0.3, mutate.DEFAULT_SPAN_PROBABILITY)
+
+    def test_an_unknown_selector_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.creature.mutate(1, False, True, selector='thread')
+
+
 if __name__ == '__main__':
     unittest.main()
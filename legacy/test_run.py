@@ -7,11 +7,14 @@ the committed 2016 artifacts. Each run therefore gets an isolated working
 directory, keyed by experiment and seed.
 """
 
+import contextlib
+import io
 import json
 import os
 import shutil
 import tempfile
 import unittest
+from unittest import mock
 
 import run
 
@@ -27,6 +30,11 @@ class RunnerTestCase(unittest.TestCase):
         return run.run_experiment(experiment, seed=seed, generations=generations,
                                   results_root=self.results_root, quiet=True, **kwargs)
 
+    def read(self, result, name):
+        """:return: The text of one of a run's files."""
+        with open(os.path.join(result.directory, name), encoding='utf-8') as handle:
+            return handle.read()
+
 
 class TestDiscovery(RunnerTestCase):
 
@@ -157,6 +165,25 @@ class TestManifest(RunnerTestCase):
         self.assertEqual(0, legacy['operator_weights']['delete'])
         self.assertEqual(0, legacy['operator_weights']['duplicate'])
 
+    def test_records_the_lint_daemon_that_served_the_run(self):
+        """Only the two experiments that lint get a daemon, and only if there
+        is a pylint for it to keep loaded."""
+        # pylint: disable-next=protected-access
+        self.assertEqual({'english', 'hello_world_tested'}, run._LINTED_EXPERIMENTS)
+        calling = set()
+        for name in filter(run.has_selector, run.available_experiments()):
+            with open(os.path.join(run.HERE, f'test_{name}.py'), encoding='utf-8') as handle:
+                if 'lintd.lint(' in handle.read():
+                    calling.add(name)
+        self.assertEqual(calling, run._LINTED_EXPERIMENTS)  # pylint: disable=protected-access
+        self.assertIsNone(self.load(self.go(experiment='beak'))['lint_daemon'])
+        english = self.load(self.go(experiment='english', generations=3))
+        version = run._pylint_version()  # pylint: disable=protected-access
+        expected = None if version is None else {'pylint_version': version}
+        self.assertEqual(expected, english['lint_daemon'])
+        without = self.load(self.go(experiment='english', generations=3, lint_daemon=False))
+        self.assertIsNone(without['lint_daemon'])
+
 
 class TestReproducibility(RunnerTestCase):
     """The whole point of the runner."""
@@ -194,5 +221,183 @@ class TestSelectorBehaviour(RunnerTestCase):
             self.assertEqual('', handle.read())
 
 
+class UncachedTestCase(RunnerTestCase):
+    """Runs with the selector cache off, so that every mutant really is judged."""
+
+    def go(self, *args, **kwargs):
+        return super().go(*args, use_selector_cache=False, **kwargs)
+
+
+class TestCompileGate(UncachedTestCase):
+    """Rejecting mutants that do not compile before the selector sees them."""
+
+    def test_rejections_are_split_by_kind(self):
+        for compile_gate in (False, True):
+            with self.subTest(compile_gate=compile_gate):
+                result = self.go(seed=3, generations=30, compile_gate=compile_gate)
+                self.assertEqual(result.failed_mutations,
+                                 result.syntax_rejected + result.test_rejected)
+                self.assertGreater(result.syntax_rejected, 0)
+
+    def test_the_gate_changes_nothing_but_how_often_the_selector_runs(self):
+        plain = self.go(seed=3, generations=30)
+        plain_end = self.read(plain, 'end.py')
+        plain_manifest = json.loads(self.read(plain, 'manifest.json'))
+        gated = self.go(seed=3, generations=30, compile_gate=True)
+        gated_manifest = json.loads(self.read(gated, 'manifest.json'))
+        self.assertEqual(plain.directory, gated.directory)
+        self.assertEqual(plain_end, self.read(gated, 'end.py'))
+        for key in ('successful_mutations', 'syntax_rejected', 'test_rejected'):
+            self.assertEqual(plain_manifest[key], gated_manifest[key])
+        self.assertEqual(30, plain_manifest['selector_runs'])
+        self.assertEqual(30 - gated_manifest['syntax_rejected'],
+                         gated_manifest['selector_runs'])
+        self.assertFalse(plain_manifest['compile_gate'])
+        self.assertTrue(gated_manifest['compile_gate'])
+
+    def test_an_untested_experiment_is_gated_too(self):
+        result = self.go(experiment='hello_world_untested', seed=2, generations=20,
+                         compile_gate=True)
+        self.assertEqual(20, result.successful_mutations + result.failed_mutations)
+        self.assertEqual(result.failed_mutations,
+                         result.syntax_rejected + result.test_rejected)
+
+
+class TestForkSelector(UncachedTestCase):
+    """Running selectors in forks rather than new interpreters."""
+
+    def test_forking_changes_nothing_but_the_manifest_entry(self):
+        for experiment in ('beak', 'hello_world_untested'):
+            with self.subTest(experiment=experiment):
+                plain = self.go(experiment=experiment, seed=4, generations=25)
+                plain_end = self.read(plain, 'end.py')
+                plain_manifest = json.loads(self.read(plain, 'manifest.json'))
+                forked = self.go(experiment=experiment, seed=4, generations=25,
+                                 selector_mode='fork')
+                forked_manifest = json.loads(self.read(forked, 'manifest.json'))
+                self.assertEqual(plain.directory, forked.directory)
+                self.assertEqual(plain_end, self.read(forked, 'end.py'))
+                self.assertEqual('fork', forked_manifest.pop('selector_mode'))
+                self.assertEqual('subprocess', plain_manifest.pop('selector_mode'))
+                self.assertEqual(plain_manifest, forked_manifest)
+
+    def test_it_combines_with_the_compile_gate(self):
+        result = self.go(seed=3, generations=30, compile_gate=True, selector_mode='fork')
+        self.assertEqual(30, result.successful_mutations + result.failed_mutations)
+
+
+class TestSpeculation(UncachedTestCase):
+    """Judging several mutants at once must come out exactly as one at a time."""
+
+    SPECULATIVE_ENTRIES = ('selector_runs', 'speculation', 'speculative_discards')
+
+    def run_both(self, speculation, **kwargs):
+        """Runs serially and speculatively; returns both manifests, minus the
+        entries that describe the speculation, and both end.py files."""
+        manifests = []
+        ends = []
+        for value in (1, speculation):
+            result = self.go(speculation=value, **kwargs)
+            with open(os.path.join(result.directory, 'manifest.json'), encoding='utf-8') as handle:
+                manifests.append(json.load(handle))
+            with open(os.path.join(result.directory, 'end.py'), encoding='utf-8') as handle:
+                ends.append(handle.read())
+        return manifests, ends
+
+    def test_the_lineage_is_the_serial_one(self):
+        for experiment in ('beak', 'hello_world_untested'):
+            with self.subTest(experiment=experiment):
+                (serial, speculative), (serial_end, speculative_end) = self.run_both(
+                    3, experiment=experiment, seed=4, generations=40)
+                self.assertEqual(serial_end, speculative_end)
+                self.assertEqual(serial['selector_runs'] + speculative['speculative_discards'],
+                                 speculative['selector_runs'])
+                for key in self.SPECULATIVE_ENTRIES:
+                    serial.pop(key)
+                    speculative.pop(key)
+                self.assertEqual(serial, speculative)
+
+    def test_it_combines_with_the_gate_and_the_fork_selector(self):
+        (serial, speculative), ends = self.run_both(
+            4, seed=3, generations=30, compile_gate=True, selector_mode='fork')
+        self.assertEqual(ends[0], ends[1])
+        for key in ('successful_mutations', 'syntax_rejected', 'test_rejected'):
+            self.assertEqual(serial[key], speculative[key])
+
+    def test_the_trace_is_the_serial_one(self):
+        for compile_gate in (False, True):
+            with self.subTest(compile_gate=compile_gate):
+                traces = []
+                for speculation in (1, 4):
+                    with contextlib.redirect_stdout(io.StringIO()) as output:
+                        run.run_experiment('beak', seed=3, generations=30,
+                                           results_root=self.results_root,
+                                           compile_gate=compile_gate,
+                                           speculation=speculation,
+                                           use_selector_cache=False)
+                    traces.append(output.getvalue())
+                self.assertIn('===== failed - reverting to this =====', traces[0])
+                self.assertEqual(traces[0], traces[1])
+
+    def test_more_speculation_than_generations(self):
+        result = self.go(experiment='hello_world_untested', generations=3, speculation=10)
+        self.assertEqual(3, result.successful_mutations + result.failed_mutations)
+
+    def test_speculation_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            self.go(speculation=0)
+
+
+class TestSelectorCache(RunnerTestCase):
+    """Verdicts shared between runs through results_root's selector cache."""
+
+    def load(self, result):
+        """:return: A run's manifest."""
+        return json.loads(self.read(result, 'manifest.json'))
+
+    def end(self, result):
+        """:return: The creature a run ended with."""
+        return self.read(result, 'end.py')
+
+    def test_a_rerun_is_answered_entirely_from_the_cache(self):
+        first = self.go(seed=2, generations=20)
+        first_end = self.end(first)
+        manifest = self.load(first)
+        self.assertEqual(os.path.join(self.results_root, run.SELECTOR_CACHE_FILE),
+                         manifest['selector_cache'])
+        self.assertEqual((0, 20), (manifest['cache_hits'], manifest['cache_misses']))
+        again = self.go(seed=2, generations=20)
+        manifest = self.load(again)
+        self.assertEqual(first_end, self.end(again))
+        self.assertEqual((20, 0, 0), (manifest['cache_hits'], manifest['cache_misses'],
+                                      manifest['selector_runs']))
+
+    def test_an_edited_word_list_starts_afresh(self):
+        self.go(seed=2, generations=20)
+        words = os.path.join(self.results_root, 'words.txt')
+        with open(words, 'w', encoding='utf-8') as handle:
+            handle.write('beak\n')
+        with mock.patch.object(run.mutate, 'word_source', return_value=words):
+            manifest = self.load(self.go(seed=2, generations=20))
+        self.assertEqual((0, 20), (manifest['cache_hits'], manifest['cache_misses']))
+
+    def test_the_cache_changes_no_result(self):
+        self.go(experiment='hello_world_untested', seed=3, generations=25)
+        cached = self.go(experiment='hello_world_untested', seed=3, generations=25)
+        cached_end = self.end(cached)
+        audited = self.go(experiment='hello_world_untested', seed=3, generations=25,
+                          use_selector_cache=False)
+        manifest = self.load(audited)
+        self.assertEqual(cached_end, self.end(audited))
+        self.assertIsNone(manifest['selector_cache'])
+        self.assertEqual((0, 0, 25), (manifest['cache_hits'], manifest['cache_misses'],
+                                      manifest['selector_runs']))
+
+    def test_a_speculative_run_remembers_only_what_it_judged(self):
+        self.go(seed=5, generations=20, speculation=4)
+        serial = self.load(self.go(seed=5, generations=20))
+        self.assertEqual(0, serial['cache_misses'])
+
+
 if __name__ == '__main__':
     unittest.main()
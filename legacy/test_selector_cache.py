@@ -0,0 +1,66 @@
+"""Tests for the selector outcome cache.
+
+An answer is only worth reusing if everything that decided it is the same, so
+most of these change one part of the key and check that nothing is found.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import selector_cache
+
+
+class TestSelectorCache(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='mutate-cache-')
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.path = os.path.join(self.root, 'cache.sqlite')
+
+    def open(self, **kwargs):
+        """A cache on the test's file, keyed as given and closed after the test."""
+        key = {'experiment': 'beak', 'selector': 'import mutated_beak\n',
+               'python_version': '3.11.7', 'pylint_version': '3.0.0'}
+        key.update(kwargs)
+        cache = selector_cache.SelectorCache(self.path, **key)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_a_verdict_is_remembered(self):
+        cache = self.open()
+        self.assertIsNone(cache.lookup('x = 1'))
+        cache.record('x = 1', True)
+        cache.record('x = (', False)
+        self.assertIs(True, cache.lookup('x = 1'))
+        self.assertIs(False, cache.lookup('x = ('))
+        self.assertEqual((2, 1), (cache.hits, cache.misses))
+
+    def test_verdicts_outlive_the_run_that_learnt_them(self):
+        with selector_cache.SelectorCache(self.path, experiment='beak', selector=None,
+                                          python_version='3.11.7',
+                                          pylint_version=None) as cache:
+            cache.record('x = 1', True)
+        self.assertIs(True, self.open(selector=None, pylint_version=None).lookup('x = 1'))
+
+    def test_any_change_to_the_key_starts_afresh(self):
+        self.open().record('x = 1', True)
+        for change in ({'experiment': 'body_plans'},
+                       {'selector': 'import mutated_beak\nassert False\n'},
+                       {'selector': None},
+                       {'python_version': '3.12.0'},
+                       {'pylint_version': None},
+                       {'inputs': [b'an edited word list']}):
+            with self.subTest(change=change):
+                self.assertIsNone(self.open(**change).lookup('x = 1'))
+
+    def test_a_verdict_can_be_corrected(self):
+        cache = self.open()
+        cache.record('x = 1', True)
+        cache.record('x = 1', False)
+        self.assertIs(False, cache.lookup('x = 1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -41,6 +41,8 @@ def competitive_fitness(source, *, regrowth=DEFAULT_REGROWTH,
         return 0
     world = lifecycle.World(food=starting_food, regrowth=regrowth)
     cohort = [lifecycle.Lifecycle(fuel=endowment) for endowment in endowments]
+    # One loaded act() per offspring, so siblings share no module state.
+    acts = [genome.ActCache(size=1) for _ in cohort]
     reproduced = [False] * len(cohort)
     for _ in range(lifecycle.DEFAULT_MAX_AGE):
         world.tick()
@@ -48,19 +50,20 @@ def competitive_fitness(source, *, regrowth=DEFAULT_REGROWTH,
         if alive == 0:
             break
         for index, creature in enumerate(cohort):
-            if creature.alive and _live_one_tick(source, creature, world, alive):
+            if creature.alive and _live_one_tick(source, acts[index], creature, world, alive):
                 reproduced[index] = True
     return sum(reproduced)
 
 
-def _live_one_tick(source, creature, world, population):
+def _live_one_tick(source, acts, creature, world, population):
     """ Advances one competing creature by a single tick.
+    :param acts: The creature's own genome.ActCache
     :return: True if the creature reproduced this tick
     """
     try:
         decision = genome.decide(
             source, age=creature.age, fuel=creature.fuel, max_fuel=creature.max_fuel,
-            food_available=world.food, population=population)
+            food_available=world.food, population=population, cache=acts)
     except genome.MisbehavingCreatureError:
         creature.tick()  # a creature that cannot act just ages toward starvation
         return False
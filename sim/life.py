@@ -35,6 +35,8 @@ def offspring_endowments(source, *, starting_fuel=lifecycle.DEFAULT_FUEL,
     if not genome.is_viable(source):
         return []
     creature = lifecycle.Lifecycle(fuel=starting_fuel)
+    # Its own, so the assay does not depend on what earlier ones left behind.
+    acts = genome.ActCache(size=1)
     world = lifecycle.World(food=starting_food, regrowth=regrowth)
     endowments = []
     while creature.alive and creature.age < creature.max_age:
@@ -42,7 +44,8 @@ def offspring_endowments(source, *, starting_fuel=lifecycle.DEFAULT_FUEL,
         try:
             decision = genome.decide(
                 source, age=creature.age, fuel=creature.fuel,
-                max_fuel=creature.max_fuel, food_available=world.food, population=1)
+                max_fuel=creature.max_fuel, food_available=world.food, population=1,
+                cache=acts)
         except genome.MisbehavingCreatureError:
             break
         creature.eat(world.request(decision['eat']))
@@ -42,8 +42,10 @@ def evaluate(source):
     """
     if not genome.is_viable(source):
         return None
+    # Its own, so a fingerprint does not depend on what earlier ones left behind.
+    acts = genome.ActCache(size=1)
     try:
-        return tuple(tuple(sorted(genome.decide(source, **context).items()))
+        return tuple(tuple(sorted(genome.decide(source, cache=acts, **context).items()))
                      for context in CONTEXTS)
     except genome.MisbehavingCreatureError:
         return None
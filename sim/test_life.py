@@ -52,6 +52,13 @@ class TestReproductiveOutput(unittest.TestCase):
         self.assertEqual(life.reproductive_output(substrate.ANCESTOR),
                          life.reproductive_output(substrate.ANCESTOR))
 
+    def test_an_assay_starts_from_fresh_module_state(self):
+        counting = ('def act(age, fuel, max_fuel, food_available, population, calls=[]):\n'
+                    '    calls.append(age)\n'
+                    '    return {"eat": 5, "reproduce": len(calls) < 40, "endowment": 1}\n')
+        self.assertEqual(life.reproductive_output(counting),
+                         life.reproductive_output(counting))
+
 
 if __name__ == '__main__':
     unittest.main()